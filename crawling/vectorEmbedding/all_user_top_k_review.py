@@ -1,14 +1,24 @@
 import os
 import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
-from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 
-import weaviate
-from weaviate.auth import AuthApiKey
-from weaviate.classes import query as wq
+from embedding_store import load_embedding_store
+from encoder_backend import get_encoder
+from quantize import QuantizedMatrix
+from retrieval import build_retriever, build_async_retriever, GeoRetriever, HybridRetriever
+from geo_index import build_geo_index
+from keyword_index import build_bm25_index
+from attribute_filter import build_attribute_index
+from diversity import MMRReranker
+from festival_index import load_festival_index
+from place_metadata import load_place_metadata
+from recommender import Recommender
+from recommendation_cache import RecommendationCache
+from result_store import ResultStoreWriter
 
 
 # ========== CONFIG ==========
@@ -16,156 +26,251 @@ CONFIG = {
     "USER_FILE": r"C:\Users\changjin\workspace\lab\pln\data_set\5_user_info.csv",
     "DATA_DIR": r"C:\Users\changjin\workspace\lab\pln\data_set\null_X",
     "OUTPUT_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\user_results",
+    "RESULT_DB": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\recommendations.sqlite",
+    "OUTPUT_FORMAT": "sqlite",   # "sqlite" (RESULT_DB 한 파일) | "json" (유저별 JSON, 기존 방식) | "both"
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "RETRIEVER": "weaviate",   # "weaviate" | "exact" (로컬 numpy) | "hnsw" (로컬 hnswlib)
+    "WEAVIATE_MODE": "cloud",   # "cloud" | "local" | "embedded"
+    "PARTITIONED": False,   # True: 카테고리별 파티션 검색 (Weaviate tenant — run_weaviate.py PARTITION="tenant" / 로컬 하위 인덱스)
+    "LIKE_QUANT": None,   # RETRIEVER="exact" 검색 행렬 양자화 (후보 + float32 재채점, python quantize.py 로 생성): None | "int8" | "fp16"
+    "DISLIKE_QUANT": None,   # 로컬 dislike 조회 시 양자화: None | "int8" | "fp16"
+    "ENCODER_BACKEND": "auto",   # "auto" (서버 우선) | "server" | "torch" | "onnx" (int8) | "onnx_fp32"
+    "PENALTY_MODE": "blob",   # "blob" (dislike 키워드 합친 벡터 1개) | "keyword" (키워드별 멀티벡터 max-sim)
     "TOP_K": 30,
-    "GAMMA": 0.3   # 리뷰수 가중치
+    "GAMMA": 0.3,   # 리뷰수 가중치
+    "ADAPTIVE_FETCH": False,   # True: dislike 필터 후 TOP_K 미달이면 다음 페이지를 더 검색
+    "MAX_FETCH_FACTOR": 24,   # 적응형 검색 상한 (TOP_K * 배수)
+    "EXECUTION": "sequential",   # "sequential" | "async" (Weaviate async 클라이언트, 카테고리/유저 동시 처리)
+    "MAX_IN_FLIGHT": 16,   # async: 동시에 보내는 Weaviate 쿼리 수 상한
+    "USER_CONCURRENCY": 8,   # async: 동시에 진행하는 유저 수 (인코딩과 검색을 파이프라인)
+    "GEO_MODE": None,   # None | "restrict" | "decay" — 로컬 검색에서 1순위 숙소 기준 거리 반영 (geo_index.py)
+    "GEO_RADIUS_KM": 10.0,   # 숙소 반경 (이 밖의 장소는 검색 안 함)
+    "GEO_DECAY_KM": 5.0,   # decay: like 유사도 * exp(-거리 / GEO_DECAY_KM)
+    "HYBRID": False,   # True: 벡터 + BM25 키워드 검색 RRF 융합 (로컬 검색, keyword_index.py)
+    "RRF_K": 60,
+    # 카테고리별 속성 pre-filter (attribute_filter.py) — 예: {"음식점": {"avg_price": (None, 15000)},
+    #   "관광지": {"entrance_fee": (None, 5000)}, "카페": {"open_at": ("토", "20:00")}, "Accommodation": {"sub_category": ["펜션"]}}
+    "FILTERS": None,
+    "MMR_LAMBDA": None,   # None | 0~1 — 최종 결과 MMR 다양성 재정렬 (1에 가까울수록 점수 우선, diversity.py)
+    "MMR_GEO_WEIGHT": 0.0,   # 유사도에 섞는 거리 비중 (가까운 장소끼리도 중복으로 취급)
+    "MMR_GEO_KM": 1.0,   # 거리 유사도 exp(-거리 / MMR_GEO_KM)
+    "FESTIVALS": False,   # True: 유저 여행 기간(start_date, duration_days)과 겹치는 축제를 Attraction에 섞음 (festival_index.py)
+    "FESTIVAL_PARAMS": {"weight": 0.9, "radius_km": None, "decay_km": 5.0},   # FestivalIndex.blend_trip 인자
+    "CACHE": None,   # None | "exact" (같은 키워드 목록, 순서 포함) | "semantic" (+ 비슷한 like 벡터, LSH 버킷)
+    "CACHE_SIZE": 1024,   # LRU 최대 항목 수
+    "CACHE_TOLERANCE": 0.98,   # semantic 히트 최소 like 코사인 유사도
+    "CACHE_DISLIKE_TOLERANCE": 0.98   # semantic 히트 최소 dislike(평균 벡터) 코사인 유사도
 }
 
-CATEGORY_FILES = {
-    "Accommodation": "accommodations_fixed.csv",
-    "카페": "cafe_fixed.csv",
-    "음식점": "restaurants_fixed.csv",
-    "관광지": "attractions_fixed.csv"
-}
-
-# 카테고리 한글 → 영어 변환 매핑
-CATEGORY_TRANSLATE = {
-    "Accommodation": "Accommodation",
-    "카페": "Cafe",
-    "음식점": "Restaurant",
-    "관광지": "Attraction"
-}
-
-
-# ========== 1. 환경 변수 및 클라이언트 연결 ==========
-print("🔐 환경 변수 로딩...")
-load_dotenv()
-
-api_key = os.getenv("WEAVIATE_API_KEY")
-cluster_url = os.getenv("WEAVIATE_CLUSTER_URL")
-
-client = weaviate.connect_to_weaviate_cloud(
-    cluster_url=cluster_url,
-    auth_credentials=AuthApiKey(api_key)
-)
-print("✅ Weaviate 연결 완료\n")
-
-collection = client.collections.get("Place")
-
-
-# ========== 2. 모델 로드 ==========
-model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
-
-
-# ========== 3. 추천 함수 ==========
-def rerank_with_penalty(user_like_vec, user_dislike_vecs, category_name,
-                        top_k=30, alpha=1.0, beta=0.5, dislike_threshold=0.75):
-    results = collection.query.near_vector(
-        near_vector=user_like_vec.tolist(),
-        limit=top_k*3,
-        return_metadata=["distance"],
-        include_vector=True,
-        filters=wq.Filter.by_property("category").equal(category_name)
-    )
-
-    scored = []
-    for obj in results.objects:
-        like_sim = 1 - obj.metadata.distance
-
-        place_dislike_vec = obj.properties.get("dislike_embedding", [])
-        max_dislike_sim = 0
-        if place_dislike_vec:
-            sims = [
-                cosine_similarity([ud], [place_dislike_vec])[0][0]
-                for ud in user_dislike_vecs if len(ud) > 0
-            ]
-            max_dislike_sim = max(sims) if sims else 0
-
-        if max_dislike_sim > dislike_threshold:
-            continue
-
-        sim_score = alpha * like_sim - beta * max_dislike_sim
-        scored.append((obj, sim_score))
-
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return scored[:top_k]
-
-
-# ========== 4. 리뷰수 기반 정규화 + 최종 스코어 ==========
-def attach_review_scores_and_final(results_by_cat, data_dir, gamma=0.3):
-    final_scores = {}
-
-    for cat, scored_list in results_by_cat.items():
-        if not scored_list:
-            continue
-
-        df = pd.read_csv(os.path.join(data_dir, CATEGORY_FILES[cat]))
-        review_col = "review_count" if cat == "Accommodation" else "all_review_count"
-        review_dict = dict(zip(df["id"], df[review_col]))
-
-        enriched = []
-        for obj, sim_score in scored_list:
-            pid = obj.properties.get("place_id")
-            rc = review_dict.get(pid, 0)
-            enriched.append((pid, sim_score, rc))
-
-        counts = np.array([rc for _, _, rc in enriched], dtype=float)
-        if counts.sum() > 0:
-            counts = np.log1p(counts)
-            exp_counts = np.exp(counts - counts.max())
-            review_norms = exp_counts / exp_counts.sum()
-        else:
-            review_norms = np.ones(len(enriched)) / len(enriched)
-
-        cat_list = []
-        for (pid, sim_score, _), rn in zip(enriched, review_norms):
-            final_score = (1 - gamma) * sim_score + gamma * rn
-            cat_list.append({
-                "id": pid,
-                "category": CATEGORY_TRANSLATE[cat],  # ✅ 영어 변환
-                "final_score": float(final_score)
-            })
-
-        cat_list = sorted(cat_list, key=lambda x: x["final_score"], reverse=True)
-
-        # ✅ key 자체도 영어로 변환
-        final_scores[CATEGORY_TRANSLATE[cat]] = cat_list
-
-    return final_scores
-
-
-# ========== 5. 모든 유저 처리 ==========
-user_df = pd.read_csv(CONFIG["USER_FILE"])
-os.makedirs(CONFIG["OUTPUT_DIR"], exist_ok=True)
-
-for idx, user in user_df.iterrows():
-    user_id = user["user_id"]
-    like_keywords = eval(user["like_keywords"])
-    dislike_keywords = eval(user["dislike_keywords"])
-
-    print(f"\n👤 Processing User {idx+1}/{len(user_df)} → {user_id}")
-    print("   👍 like:", like_keywords)
-    print("   👎 dislike:", dislike_keywords)
 
+# ========== 1. 리소스 로드 ==========
+# 무거운 리소스(검색 백엔드, 인코더, 저장소)는 import 시점이 아니라 main에서 로드
+def load_resources(retriever=None):
+    # 로컬 검색 / dislike 벡터 로컬 조회 (DISLIKE_STORAGE="none") 에 사용
+    store = load_embedding_store(CONFIG["STORE_DIR"]) if os.path.isdir(CONFIG["STORE_DIR"]) else None
+    dislike_qmat = QuantizedMatrix(store, "dislike", CONFIG["DISLIKE_QUANT"]) if store and CONFIG["DISLIKE_QUANT"] else None
+
+    metadata = load_place_metadata(CONFIG["DATA_DIR"])
+    if retriever is None:
+        retriever = build_retriever(CONFIG["RETRIEVER"], store=store, weaviate_mode=CONFIG["WEAVIATE_MODE"],
+                                    partitioned=CONFIG["PARTITIONED"], quantization=CONFIG["LIKE_QUANT"])
+        if CONFIG["GEO_MODE"]:
+            if CONFIG["RETRIEVER"] == "weaviate":
+                raise ValueError("GEO_MODE는 로컬 검색(RETRIEVER='exact' | 'hnsw')에서만 사용합니다")
+            retriever = GeoRetriever(retriever, build_geo_index(store, metadata), mode=CONFIG["GEO_MODE"],
+                                     radius_km=CONFIG["GEO_RADIUS_KM"], decay_km=CONFIG["GEO_DECAY_KM"])
+        if CONFIG["HYBRID"]:
+            if CONFIG["RETRIEVER"] == "weaviate" or CONFIG["GEO_MODE"]:
+                raise ValueError("HYBRID는 로컬 검색(RETRIEVER='exact' | 'hnsw'), GEO_MODE=None 에서만 사용합니다")
+            retriever = HybridRetriever(retriever, build_bm25_index(store, CONFIG["DATA_DIR"]), store,
+                                        rrf_k=CONFIG["RRF_K"])
+    elif getattr(retriever, "store", False) is None:
+        retriever.store = store   # async Weaviate: 속성 필터 비트맵 → place_id 변환용
+    print(f"✅ 검색 백엔드 준비 완료 ({CONFIG['RETRIEVER']}, {CONFIG['EXECUTION']})\n")
+
+    attribute_index = None
+    if CONFIG["FILTERS"]:
+        if store is None:
+            raise ValueError("FILTERS는 임베딩 저장소(STORE_DIR)가 필요합니다")
+        attribute_index = build_attribute_index(store, metadata)
+
+    diversifier = None
+    if CONFIG["MMR_LAMBDA"] is not None:
+        if store is None:
+            raise ValueError("MMR_LAMBDA는 임베딩 저장소(STORE_DIR)가 필요합니다")
+        diversifier = MMRReranker(store, metadata, lambda_=CONFIG["MMR_LAMBDA"],
+                                  geo_weight=CONFIG["MMR_GEO_WEIGHT"], geo_scale_km=CONFIG["MMR_GEO_KM"])
+
+    # ========== 2. 모델 로드 ==========
+    model = get_encoder(CONFIG["ENCODER_BACKEND"])
+
+    recommender = Recommender(retriever, store=store, metadata=metadata,
+                              penalty_mode=CONFIG["PENALTY_MODE"], dislike_qmat=dislike_qmat,
+                              adaptive_fetch=CONFIG["ADAPTIVE_FETCH"], max_fetch_factor=CONFIG["MAX_FETCH_FACTOR"],
+                              attribute_index=attribute_index, diversifier=diversifier,
+                              festival_index=load_festival_index(CONFIG["DATA_DIR"]) if CONFIG["FESTIVALS"] else None,
+                              festival_params=CONFIG["FESTIVAL_PARAMS"])
+    return model, recommender
+
+
+def print_overfetch_report(recommender):
+    """카테고리별 후보 over-fetch 비율 (기본 검색 크기 튜닝용)"""
+    print("\n📊 카테고리별 over-fetch (가져온 후보 수 / TOP_K)")
+    for cat, r in recommender.overfetch_report().items():
+        print(f"   {cat:<14} mean {r['mean_ratio']:.2f}x | p95 {r['p95_ratio']:.2f}x | max {r['max_ratio']:.2f}x"
+              f" | TOP_K 미달 {r['starved'] * 100:.1f}% ({r['queries']} queries)")
+
+
+def build_cache():
+    if CONFIG["CACHE"] is None:
+        return None
+    tolerance = CONFIG["CACHE_TOLERANCE"] if CONFIG["CACHE"] == "semantic" else None
+    return RecommendationCache(capacity=CONFIG["CACHE_SIZE"], tolerance=tolerance,
+                               dislike_tolerance=CONFIG["CACHE_DISLIKE_TOLERANCE"])
+
+
+def print_cache_stats(cache):
+    if cache is None:
+        return
+    st = cache.stats()
+    print(f"\n🗃️ 캐시 히트율 {st['hit_rate'] * 100:.1f}% (exact {st['exact_hits']} | semantic {st['semantic_hits']}"
+          f" | miss {st['misses']} | 항목 {st['size']})")
+
+
+def parse_user(user):
+    return user["user_id"], eval(user["like_keywords"]), eval(user["dislike_keywords"])
+
+
+def user_trip(user):
+    """(start_date, duration_days) — 유저 파일에 여행 기간이 없으면 None (축제 섞지 않음)"""
+    if pd.isna(user.get("start_date")) or pd.isna(user.get("duration_days")):
+        return None
+    return user["start_date"], int(user["duration_days"])
+
+
+def encode_user(model, like_keywords, dislike_keywords):
     user_like_vec = model.encode(" ".join(like_keywords), convert_to_numpy=True)
-    user_dislike_vecs = [model.encode(kw, convert_to_numpy=True) for kw in dislike_keywords]
-
-    results_by_cat = {}
-    for cat in CATEGORY_FILES.keys():
-        results_by_cat[cat] = rerank_with_penalty(user_like_vec, user_dislike_vecs,
-                                                  cat, top_k=CONFIG["TOP_K"])
-
-    review_scores_by_cat = attach_review_scores_and_final(results_by_cat,
-                                                          CONFIG["DATA_DIR"],
-                                                          gamma=CONFIG["GAMMA"])
-
-    # 유저별 결과 저장
-    out_path = os.path.join(CONFIG["OUTPUT_DIR"], f"{user_id}_recommendations.json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(review_scores_by_cat, f, ensure_ascii=False, indent=2)
-
-    print(f"✅ {user_id} 결과 저장 완료 → {out_path}")
-
+    user_dislike_vecs = list(model.encode(dislike_keywords, convert_to_numpy=True)) if dislike_keywords else []
+    return user_like_vec, user_dislike_vecs
+
+
+def save_result(writer, user_id, review_scores_by_cat):
+    """writer: ResultStoreWriter (OUTPUT_FORMAT이 "json"이면 None). 반환: 저장 위치"""
+    out_path = CONFIG["RESULT_DB"]
+    if writer is not None:
+        writer.write(user_id, review_scores_by_cat)
+
+    # 유저별 JSON 저장 (호환 모드)
+    if CONFIG["OUTPUT_FORMAT"] in ("json", "both"):
+        out_path = os.path.join(CONFIG["OUTPUT_DIR"], f"{user_id}_recommendations.json")
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(review_scores_by_cat, f, ensure_ascii=False, indent=2)
+    return out_path
+
+
+# ========== 3. 모든 유저 처리 ==========
+def run_sequential(user_df, writer):
+    model, recommender = load_resources()
+    cache = build_cache()
+
+    for idx, user in user_df.iterrows():
+        user_id, like_keywords, dislike_keywords = parse_user(user)
+
+        print(f"\n👤 Processing User {idx+1}/{len(user_df)} → {user_id}")
+        print("   👍 like:", like_keywords)
+        print("   👎 dislike:", dislike_keywords)
+
+        # 캐시: 같은 키워드 조합이면 인코딩도 생략, 아니면 인코딩 후 비슷한 like 벡터 조회
+        review_scores_by_cat = cache.lookup_exact(like_keywords, dislike_keywords) if cache is not None else None
+        if review_scores_by_cat is None:
+            user_like_vec, user_dislike_vecs = encode_user(model, like_keywords, dislike_keywords)
+            review_scores_by_cat = cache.lookup_similar(user_like_vec, user_dislike_vecs) if cache is not None else None
+
+        if review_scores_by_cat is None:
+            if CONFIG["HYBRID"]:
+                recommender.retriever.set_query(like_keywords)
+            review_scores_by_cat = recommender.recommend(user_like_vec, user_dislike_vecs,
+                                                         top_k=CONFIG["TOP_K"], gamma=CONFIG["GAMMA"],
+                                                         filters=CONFIG["FILTERS"])
+            if cache is not None:
+                cache.put(like_keywords, dislike_keywords, user_like_vec, user_dislike_vecs, review_scores_by_cat)
+
+        # 축제는 유저별 여행 기간에 따라 달라지므로 캐시 밖에서 섞음
+        review_scores_by_cat = recommender.blend_festivals(review_scores_by_cat, user_trip(user))
+        out_path = save_result(writer, user_id, review_scores_by_cat)
+        print(f"✅ {user_id} 결과 저장 완료 → {out_path}")
+
+    print_overfetch_report(recommender)
+    print_cache_stats(cache)
+    recommender.retriever.close()
+
+
+async def run_async(user_df, writer):
+    """
+    유저당 4개 카테고리 쿼리를 동시에 보내고, USER_CONCURRENCY 명의 유저를 겹쳐서 처리.
+    인코딩은 전용 스레드 1개에서 (인코더/임베딩 클라이언트는 스레드 안전하지 않음) — 결과는 sequential과 동일.
+    """
+    retriever = await build_async_retriever(CONFIG["WEAVIATE_MODE"], max_in_flight=CONFIG["MAX_IN_FLIGHT"],
+                                            partitioned=CONFIG["PARTITIONED"])
+    model, recommender = load_resources(retriever)
+    cache = build_cache()
+
+    loop = asyncio.get_running_loop()
+    encode_executor = ThreadPoolExecutor(max_workers=1)
+    user_slots = asyncio.Semaphore(CONFIG["USER_CONCURRENCY"])
+    done = 0
+
+    async def process(user):
+        nonlocal done
+        user_id, like_keywords, dislike_keywords = parse_user(user)
+        async with user_slots:
+            review_scores_by_cat = cache.lookup_exact(like_keywords, dislike_keywords) if cache is not None else None
+            if review_scores_by_cat is None:
+                user_like_vec, user_dislike_vecs = await loop.run_in_executor(
+                    encode_executor, encode_user, model, like_keywords, dislike_keywords)
+                review_scores_by_cat = cache.lookup_similar(user_like_vec, user_dislike_vecs) if cache is not None else None
+
+            if review_scores_by_cat is None:
+                review_scores_by_cat = await recommender.arecommend(user_like_vec, user_dislike_vecs,
+                                                                    top_k=CONFIG["TOP_K"], gamma=CONFIG["GAMMA"],
+                                                                    filters=CONFIG["FILTERS"])
+                if cache is not None:
+                    cache.put(like_keywords, dislike_keywords, user_like_vec, user_dislike_vecs, review_scores_by_cat)
+        review_scores_by_cat = recommender.blend_festivals(review_scores_by_cat, user_trip(user))
+        save_result(writer, user_id, review_scores_by_cat)
+        done += 1
+        print(f"✅ {done}/{len(user_df)} {user_id} 결과 저장 완료")
+
+    try:
+        await asyncio.gather(*[process(user) for _, user in user_df.iterrows()])
+    finally:
+        encode_executor.shutdown()
+        await retriever.close()
+
+    print_overfetch_report(recommender)
+    print_cache_stats(cache)
+    if retriever.latencies_ms:
+        p50, p95 = np.percentile(retriever.latencies_ms, [50, 95])
+        print(f"\n📊 쿼리 {len(retriever.latencies_ms)}개 지연시간 p50 {p50:.1f} ms | p95 {p95:.1f} ms")
+
+
+if __name__ == "__main__":
+    user_df = pd.read_csv(CONFIG["USER_FILE"])
+    if CONFIG["OUTPUT_FORMAT"] in ("json", "both"):
+        os.makedirs(CONFIG["OUTPUT_DIR"], exist_ok=True)
+    writer = ResultStoreWriter(CONFIG["RESULT_DB"]) if CONFIG["OUTPUT_FORMAT"] in ("sqlite", "both") else None
+
+    t0 = time.perf_counter()
+    try:
+        if CONFIG["EXECUTION"] == "async":
+            if CONFIG["RETRIEVER"] != "weaviate":
+                raise ValueError("EXECUTION='async'는 RETRIEVER='weaviate'에서만 사용합니다 (로컬 검색은 sequential로 충분)")
+            asyncio.run(run_async(user_df, writer))
+        else:
+            run_sequential(user_df, writer)
+    finally:
+        if writer is not None:
+            writer.close()
 
-# ========== 6. 연결 종료 ==========
-client.close()
-print("\n🔒 전체 유저 처리 완료 & 연결 종료")
+    # ========== 4. 연결 종료 ==========
+    print(f"\n🔒 전체 유저 처리 완료 & 연결 종료 ({time.perf_counter() - t0:.1f}s)")
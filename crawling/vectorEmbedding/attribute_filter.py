@@ -0,0 +1,170 @@
+"""
+속성 사전 필터 (가격 / sub_category / 입장료 / 영업시간) → 검색에 넣는 bool 비트맵
+
+임베딩 저장소 행 순서로 속성 배열을 만들고
+    숫자 컬럼 : 값 기준 정렬 인덱스 + searchsorted 로 범위 질의 (O(log n + k))
+    sub_category : "카페,디저트" 를 쉼표로 나눈 토큰 → 행 번호 역색인
+    영업시간 : 요일별 open/close 분 단위 배열
+필터 조건(dict) → (N,) bool 마스크. 같은 조건은 캐시해서 유저가 바뀌어도 재계산하지 않음.
+
+필터 조건 예 (카테고리별로 따로 지정):
+    {"avg_price": (None, 15000)}                             # 평균 가격 15,000원 이하
+    {"peak_weekend_price_avg": (50000, 200000)}              # 숙소 성수기 주말 평균가 범위
+    {"sub_category": ["펜션", "호텔"]}                        # 토큰 중 하나라도 일치
+    {"entrance_fee": (None, 5000)}                           # 관광지 입장료 (원문 첫 요금 = 기본 입장권)
+    {"open_at": ("토", "20:00")}                              # 토요일 20시에 영업 중
+결측값(가격 없음, 영업시간 없음)은 include_unknown=True 일 때만 통과.
+"""
+import re
+from collections import OrderedDict
+import numpy as np
+
+from place_metadata import PRICE_COLUMNS
+
+
+WEEKDAYS = "월화수목금토일"
+_HOURS_RE = re.compile(r"([월화수목금토일])\s*:\s*(?:(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})|휴무)")
+_FEE_RE = re.compile(r"([\d,]+)(?:\s*~\s*[\d,]+)?\s*원|^\s*무료\s*$")
+
+
+def parse_entrance_fee(text):
+    """
+    입장료 원문 ("성인: 18,000원 | 어린이: 9,000원 | 24개월 미만: 무료") → 첫 번째 요금 (보통 성인/기본 입장권)
+    영유아 무료 항목에 끌려 0원이 되지 않도록 최저가 대신 첫 항목 기준. 금액이 없으면 NaN.
+    """
+    for item in str(text or "").split("|"):
+        value = item.rsplit(":", 1)[-1]
+        m = _FEE_RE.search(value)
+        if m:
+            return float(m.group(1).replace(",", "")) if m.group(1) else 0.0
+    return np.nan
+
+
+def parse_store_hours(text):
+    """
+    "금: 10:30 - 20:00; 토: ...; 수: 휴무" → (open (7,), close (7,)) 분 단위, 월=0
+    휴무는 open=close=-1, 정보 없는 요일은 NaN. 자정을 넘기면 close += 1440.
+    """
+    open_min = np.full(7, np.nan)
+    close_min = np.full(7, np.nan)
+    for day, oh, om, ch, cm in _HOURS_RE.findall(text or ""):
+        d = WEEKDAYS.index(day)
+        if not oh:
+            open_min[d] = close_min[d] = -1
+            continue
+        o, c = int(oh) * 60 + int(om), int(ch) * 60 + int(cm)
+        open_min[d], close_min[d] = o, (c + 1440 if c <= o else c)
+    return open_min, close_min
+
+
+def _minutes(hhmm):
+    h, m = str(hhmm).split(":")
+    return int(h) * 60 + int(m)
+
+
+class AttributeIndex:
+    """
+    store: EmbeddingStore, metadata: PlaceMetadata — 반환 마스크는 store 행 순서
+    """
+
+    def __init__(self, store, metadata, cache_size=256):
+        n = len(store)
+        meta_rows = np.full(n, -1, dtype=np.int64)
+        for cat in np.unique(store.categories):
+            rows = store.category_rows(cat)
+            meta_rows[rows] = metadata.rows(store.ids[rows], cat)
+        found = meta_rows >= 0
+        safe = np.maximum(meta_rows, 0)
+
+        def aligned(values, fill):
+            values = np.asarray(values)
+            return np.where(found, values[safe], fill)
+
+        self.numeric = {col: aligned(metadata.prices[col], np.nan) for col in PRICE_COLUMNS}
+        self.numeric["entrance_fee"] = aligned([parse_entrance_fee(t) for t in metadata.entrance_fees], np.nan)
+        self.sub_categories = aligned(metadata.sub_categories, "")
+
+        hours = [parse_store_hours(t) for t in metadata.store_hours]
+        self.open_min = np.where(found[:, None], np.array([h[0] for h in hours])[safe], np.nan)
+        self.close_min = np.where(found[:, None], np.array([h[1] for h in hours])[safe], np.nan)
+
+        # 숫자 컬럼: (정렬된 값, 행 번호) — 결측 제외
+        self.sorted_numeric = {}
+        for col, values in self.numeric.items():
+            rows = np.flatnonzero(np.isfinite(values))
+            order = np.argsort(values[rows], kind="stable")
+            self.sorted_numeric[col] = (values[rows][order], rows[order])
+
+        # sub_category 토큰 역색인
+        self.sub_index = {}
+        for r, sub in enumerate(self.sub_categories):
+            for tok in filter(None, (t.strip() for t in sub.split(","))):
+                self.sub_index.setdefault(tok, []).append(r)
+        self.sub_index = {tok: np.asarray(rows, dtype=np.int64) for tok, rows in self.sub_index.items()}
+
+        self.n = n
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    # ---------- 조건별 마스크 ----------
+    def range_mask(self, col, low=None, high=None, include_unknown=False):
+        values, rows = self.sorted_numeric[col]
+        lo = 0 if low is None else np.searchsorted(values, low, side="left")
+        hi = len(values) if high is None else np.searchsorted(values, high, side="right")
+        mask = np.zeros(self.n, dtype=bool)
+        mask[rows[lo:hi]] = True
+        if include_unknown:
+            mask |= ~np.isfinite(self.numeric[col])
+        return mask
+
+    def sub_category_mask(self, tokens):
+        mask = np.zeros(self.n, dtype=bool)
+        for tok in ([tokens] if isinstance(tokens, str) else tokens):
+            rows = self.sub_index.get(tok)
+            if rows is not None:
+                mask[rows] = True
+        return mask
+
+    def open_mask(self, day, time, include_unknown=False):
+        """day: "월"~"일" 또는 0(월)~6(일), time: "HH:MM" — 그 시각에 영업 중 (전날 자정 넘김 영업 포함)"""
+        d = WEEKDAYS.index(day) if isinstance(day, str) else int(day)
+        t = _minutes(time)
+        prev = (d - 1) % 7
+        with np.errstate(invalid="ignore"):
+            today = (self.open_min[:, d] >= 0) & (self.open_min[:, d] <= t) & (t < self.close_min[:, d])
+            overnight = (self.close_min[:, prev] > 1440) & (t + 1440 < self.close_min[:, prev])
+        mask = today | overnight
+        if include_unknown:
+            mask |= np.isnan(self.open_min[:, d])
+        return mask
+
+    # ---------- 조건 dict → 마스크 ----------
+    def mask(self, filters, include_unknown=False):
+        """filters: {컬럼: (low, high) | sub_category: [...] | open_at: (요일, "HH:MM")} — 모든 조건 AND"""
+        if not filters:
+            return None
+        key = (repr(sorted(filters.items(), key=lambda kv: kv[0])), include_unknown)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            return cached
+
+        mask = np.ones(self.n, dtype=bool)
+        for name, cond in filters.items():
+            if name == "sub_category":
+                mask &= self.sub_category_mask(cond)
+            elif name == "open_at":
+                mask &= self.open_mask(*cond, include_unknown=include_unknown)
+            elif name in self.numeric:
+                mask &= self.range_mask(name, *cond, include_unknown=include_unknown)
+            else:
+                raise ValueError(f"지원하지 않는 필터: {name}")
+
+        self.cache[key] = mask
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return mask
+
+
+def build_attribute_index(store, metadata):
+    return AttributeIndex(store, metadata)
@@ -0,0 +1,320 @@
+"""
+전체 유저 일괄 추천 (1000_user_info.csv 등)
+
+유저 단위 루프 대신:
+    1) 모든 유저의 like 문자열 + dislike 키워드를 한 번에 배치 인코딩 (중복 제거)
+    2) 카테고리별로 (유저 블록 × 장소) 행렬곱 → 유저별 Top-K*3 후보 (Weaviate limit과 동일)
+    3) dislike 패널티 / 하드 필터 / 리뷰수 softmax / 최종 점수를 행렬 단위로 계산
+    4) 결과를 한 번에 저장 (SQLite 결과 저장소 또는 JSON 한 파일)
+
+RETRIEVER="exact" + Recommender 와 같은 결과를 냄 (동점 처리 순서만 다를 수 있음).
+"""
+import os
+import ast
+import json
+import time
+import numpy as np
+import pandas as pd
+
+from embedding_store import load_embedding_store, normalize_rows
+from encoder_backend import get_encoder
+from recommender import CATEGORY_FILES, CATEGORY_TRANSLATE, CATEGORY_KOREAN
+from place_metadata import load_place_metadata
+from diversity import MMRReranker
+from festival_index import load_festival_index
+from result_store import ResultStoreWriter
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "USER_FILE": r"C:\Users\changjin\workspace\lab\pln\data_set\1000_user_info.csv",
+    "DATA_DIR": r"C:\Users\changjin\workspace\lab\pln\data_set\null_X",
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "RESULT_DB": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\recommendations.sqlite",
+    "OUTPUT_PATH": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\all_recommendations.json",
+    "OUTPUT_FORMAT": "sqlite",   # "sqlite" (RESULT_DB, result_store.py) | "json" (OUTPUT_PATH 한 파일)
+    "OUTPUT_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\user_results",
+    "WRITE_PER_USER": False,   # True면 기존처럼 유저별 JSON도 저장
+    "ENCODER_BACKEND": "auto",
+    "PENALTY_MODE": "blob",    # "blob" | "keyword"
+    "TOP_K": 30,
+    "GAMMA": 0.3,
+    "ALPHA": 1.0,
+    "BETA": 0.5,
+    "DISLIKE_THRESHOLD": 0.75,
+    "MMR_LAMBDA": None,        # None | 0~1 — 유저별 결과 MMR 다양성 재정렬 (diversity.py)
+    "MMR_GEO_WEIGHT": 0.0,
+    "MMR_GEO_KM": 1.0,
+    "FESTIVALS": False,        # True: 여행 기간(start_date, duration_days)과 겹치는 축제를 Attraction에 섞음 (festival_index.py)
+    "FESTIVAL_WEIGHT": 0.9,    # 축제 점수 = 가중치 * Attraction 최고 점수 * exp(-숙소 거리 / FESTIVAL_DECAY_KM)
+    "FESTIVAL_RADIUS_KM": None,   # None | km — 1순위 숙소 반경 밖 축제 제외
+    "FESTIVAL_DECAY_KM": 5.0,
+    "USER_BLOCK": 256          # 한 번에 처리할 유저 수 (메모리 ↔ 속도)
+}
+
+
+# ========== 입력 준비 ==========
+def load_users(user_file):
+    df = pd.read_csv(user_file)
+    likes = [ast.literal_eval(x) for x in df["like_keywords"]]
+    dislikes = [ast.literal_eval(x) for x in df["dislike_keywords"]]
+    return df["user_id"].tolist(), likes, dislikes
+
+
+def load_trips(user_file):
+    """유저별 (start_date, duration_days) — 축제 기간 조회용 (user_id 순서, start_date 가 없으면 None)"""
+    df = pd.read_csv(user_file)
+    return [
+        None if pd.isna(start) else (start, 1 if pd.isna(days) else int(days))
+        for start, days in zip(df["start_date"], df["duration_days"])
+    ]
+
+
+def encode_users(model, likes, dislikes, batch_size=128):
+    """
+    반환: user_like (U, D) 정규화, dislike_offsets (U+1,), dislike_mat (K, D) 정규화
+    같은 문자열은 한 번만 인코딩.
+    """
+    like_texts = [" ".join(kws) for kws in likes]
+    flat_dislikes = [kw for kws in dislikes for kw in kws]
+
+    unique = sorted(set(like_texts) | set(flat_dislikes))
+    unique_idx = {t: i for i, t in enumerate(unique)}
+    unique_vecs = normalize_rows(model.encode(unique, batch_size=batch_size, convert_to_numpy=True))
+
+    user_like = unique_vecs[[unique_idx[t] for t in like_texts]]
+
+    dislike_offsets = np.zeros(len(dislikes) + 1, dtype=np.int64)
+    np.cumsum([len(kws) for kws in dislikes], out=dislike_offsets[1:])
+    dim = unique_vecs.shape[1]
+    dislike_mat = unique_vecs[[unique_idx[t] for t in flat_dislikes]] if flat_dislikes else np.zeros((0, dim), np.float32)
+    return user_like, dislike_offsets, dislike_mat
+
+
+def load_review_counts(store, metadata):
+    """저장소 행 순서에 맞춘 리뷰수 배열 (없으면 0)"""
+    counts = np.zeros(len(store), dtype=np.float64)
+    for cat in CATEGORY_FILES:
+        rows = store.category_rows(cat)
+        counts[rows] = metadata.review_counts_for(store.ids[rows], cat)
+    return counts
+
+
+# ========== 구간(segment) max ==========
+def segment_max(mat, offsets, axis):
+    """
+    mat의 axis 방향을 offsets 구간별로 max (빈 구간은 0)
+    offsets: (S+1,) 누적 오프셋
+    """
+    lengths = np.diff(offsets)
+    shape = list(mat.shape)
+    shape[axis] = len(lengths)
+    out = np.zeros(shape, dtype=np.float32)
+
+    nonempty = np.flatnonzero(lengths > 0)
+    if len(nonempty) == 0 or mat.shape[axis] == 0:
+        return out
+    reduced = np.maximum.reduceat(mat, offsets[:-1][nonempty], axis=axis)
+    if axis == 0:
+        out[nonempty] = reduced
+    else:
+        out[:, nonempty] = reduced
+    return out
+
+
+def dislike_matrix(user_kw, user_offsets, store, rows, penalty_mode):
+    """
+    (유저 블록 U_b × 카테고리 장소 P) 최대 dislike 유사도
+    user_kw: 블록 유저들의 dislike 키워드 벡터 (K_b, D), user_offsets: (U_b+1,)
+    """
+    n_users = len(user_offsets) - 1
+    if len(user_kw) == 0:
+        return np.zeros((n_users, len(rows)), dtype=np.float32)
+
+    if penalty_mode == "keyword":
+        offsets, kw_matrix = store.keywords["dislike"]
+        starts, ends = offsets[rows], offsets[rows + 1]
+        lengths = ends - starts
+        place_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=place_offsets[1:])
+        flat_idx = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)]) if lengths.sum() else np.empty(0, np.int64)
+        sims = user_kw @ normalize_rows(kw_matrix[flat_idx]).T            # (K_b, T)
+        per_place = segment_max(sims, place_offsets, axis=1)         # (K_b, P)
+    else:
+        place_dis = normalize_rows(store.dislike[rows])
+        per_place = user_kw @ place_dis.T                            # (K_b, P)
+        per_place[:, ~store.dislike_mask[rows]] = 0
+
+    return segment_max(per_place, user_offsets, axis=0)              # (U_b, P)
+
+
+# ========== 카테고리별 일괄 점수 계산 ==========
+def batch_category(user_like, dislike_offsets, dislike_mat, store, review_counts, cat, cfg):
+    """
+    반환: (place_rows (U, k), final_scores (U, k)) — 최종 점수 내림차순, 후보 부족 시 -inf 패딩
+    """
+    rows = store.unique_category_rows(cat)
+    like_cat = normalize_rows(store.like[rows])
+    n_users, n_places = len(user_like), len(rows)
+    top_k = cfg["TOP_K"]
+    m = min(top_k * 3, n_places)
+    k = min(top_k, m)
+
+    out_rows = np.full((n_users, k), -1, dtype=np.int64)
+    out_scores = np.full((n_users, k), -np.inf, dtype=np.float32)
+    if k == 0:
+        return out_rows, out_scores
+
+    for b0 in range(0, n_users, cfg["USER_BLOCK"]):
+        b1 = min(b0 + cfg["USER_BLOCK"], n_users)
+
+        # 1) like 유사도 + 후보 Top-K*3
+        like_sims = user_like[b0:b1] @ like_cat.T                                   # (B, P)
+        cand = np.argpartition(-like_sims, m - 1, axis=1)[:, :m] if m < n_places else np.tile(np.arange(n_places), (b1 - b0, 1))
+        cand_like = np.take_along_axis(like_sims, cand, axis=1)
+
+        # 2) dislike 패널티
+        kw0, kw1 = dislike_offsets[b0], dislike_offsets[b1]
+        dis = dislike_matrix(dislike_mat[kw0:kw1], dislike_offsets[b0:b1 + 1] - kw0, store, rows, cfg["PENALTY_MODE"])
+        cand_dis = np.take_along_axis(dis, cand, axis=1)
+
+        scores = cfg["ALPHA"] * cand_like - cfg["BETA"] * cand_dis
+        scores[cand_dis > cfg["DISLIKE_THRESHOLD"]] = -np.inf
+
+        # 3) 유저별 Top-K
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < m else np.tile(np.arange(m), (b1 - b0, 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        top_cand = np.take_along_axis(cand, top, axis=1)
+        valid = np.isfinite(top_scores)
+
+        # 4) 리뷰수 log1p + softmax (유저별, 유효 후보만)
+        counts = np.where(valid, review_counts[rows[top_cand]], 0.0)
+        has_reviews = counts.sum(axis=1) > 0
+        logc = np.where(valid, np.log1p(counts), -np.inf)
+        row_max = np.max(np.where(valid, logc, -np.inf), axis=1, keepdims=True)
+        row_max[~np.isfinite(row_max)] = 0
+        exp_c = np.where(valid, np.exp(logc - row_max), 0.0)
+        n_valid = np.maximum(valid.sum(axis=1, keepdims=True), 1)
+        review_norm = np.where(
+            has_reviews[:, None],
+            exp_c / np.maximum(exp_c.sum(axis=1, keepdims=True), 1e-300),
+            valid / n_valid
+        )
+
+        final = (1 - cfg["GAMMA"]) * top_scores + cfg["GAMMA"] * review_norm
+        final[~valid] = -np.inf
+
+        order = np.argsort(-final, axis=1, kind="stable")
+        out_rows[b0:b1] = rows[np.take_along_axis(top_cand, order, axis=1)]
+        out_scores[b0:b1] = np.take_along_axis(final, order, axis=1)
+
+    return out_rows, out_scores
+
+
+def batch_recommend(user_like, dislike_offsets, dislike_mat, store, review_counts, cfg):
+    """반환: {영문 카테고리: (place_rows (U, k), final_scores (U, k))}"""
+    if cfg["PENALTY_MODE"] == "keyword" and "dislike" not in store.keywords:
+        raise ValueError("PENALTY_MODE='keyword'는 키워드 멀티벡터가 있는 저장소가 필요합니다 (place_like_embeding.py 재실행)")
+    return {
+        CATEGORY_TRANSLATE[cat]: batch_category(user_like, dislike_offsets, dislike_mat, store, review_counts, cat, cfg)
+        for cat in CATEGORY_FILES
+    }
+
+
+def diversify_batch(results, diversifier):
+    """유저 × 카테고리별 MMR 재정렬 (diversity.MMRReranker) — 유효 후보만 순서를 바꾸고 나머지는 -inf 패딩 유지"""
+    out = {}
+    for cat_en, (rows, scores) in results.items():
+        rows, scores = rows.copy(), scores.copy()
+        cat = CATEGORY_KOREAN[cat_en]
+        for u in range(len(rows)):
+            n = int(np.isfinite(scores[u]).sum())   # 유효 후보는 앞쪽에 연속 (점수 내림차순)
+            if n < 2:
+                continue
+            order = diversifier.order_rows(rows[u, :n], scores[u, :n], cat)
+            rows[u, :len(order)], scores[u, :len(order)] = rows[u, order], scores[u, order]
+            rows[u, len(order):], scores[u, len(order):] = -1, -np.inf
+        out[cat_en] = (rows, scores)
+    return out
+
+
+def blend_festivals(user_results, user_ids, trips, festivals, metadata, cfg):
+    """
+    유저별 여행 기간과 겹치는 축제를 Attraction 결과에 섞음 (1순위 숙소를 위치 앵커로)
+    user_ids / trips: load_users / load_trips 와 같은 행 순서 — user_id가 반복되면 to_user_results 처럼 마지막 행 기준
+    """
+    last_row = {user_id: i for i, user_id in enumerate(user_ids)}
+    for user_id, i in last_row.items():
+        trip = trips[i]
+        if trip is None or user_id not in user_results:
+            continue
+        start_date, duration_days = trip
+        user_results[user_id] = festivals.blend_trip(user_results[user_id], start_date, duration_days, metadata,
+                                                     category=CATEGORY_TRANSLATE["관광지"],
+                                                     weight=cfg["FESTIVAL_WEIGHT"], radius_km=cfg["FESTIVAL_RADIUS_KM"],
+                                                     decay_km=cfg["FESTIVAL_DECAY_KM"])
+    return user_results
+
+
+def to_user_results(user_ids, results, store):
+    """배치 결과 → {user_id: {카테고리: [{id, category, final_score}, ...]}} (기존 JSON 형식)"""
+    out = {}
+    for u, user_id in enumerate(user_ids):
+        per_user = {}
+        for cat_en, (rows, scores) in results.items():
+            valid = np.isfinite(scores[u])
+            if not valid.any():
+                continue
+            per_user[cat_en] = [
+                {"id": int(store.ids[r]), "category": cat_en, "final_score": float(s)}
+                for r, s in zip(rows[u][valid], scores[u][valid])
+            ]
+        out[user_id] = per_user
+    return out
+
+
+if __name__ == "__main__":
+    t_start = time.perf_counter()
+
+    store = load_embedding_store(CONFIG["STORE_DIR"])
+    metadata = load_place_metadata(CONFIG["DATA_DIR"])
+    review_counts = load_review_counts(store, metadata)
+    user_ids, likes, dislikes = load_users(CONFIG["USER_FILE"])
+    print(f"👥 유저 {len(user_ids)}명, 장소 {len(store)}개")
+
+    t0 = time.perf_counter()
+    model = get_encoder(CONFIG["ENCODER_BACKEND"])
+    user_like, dislike_offsets, dislike_mat = encode_users(model, likes, dislikes)
+    t_encode = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    results = batch_recommend(user_like, dislike_offsets, dislike_mat, store, review_counts, CONFIG)
+    if CONFIG["MMR_LAMBDA"] is not None:
+        results = diversify_batch(results, MMRReranker(store, metadata, lambda_=CONFIG["MMR_LAMBDA"],
+                                                       geo_weight=CONFIG["MMR_GEO_WEIGHT"],
+                                                       geo_scale_km=CONFIG["MMR_GEO_KM"]))
+    t_score = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    user_results = to_user_results(user_ids, results, store)
+    if CONFIG["FESTIVALS"]:
+        user_results = blend_festivals(user_results, user_ids, load_trips(CONFIG["USER_FILE"]),
+                                       load_festival_index(CONFIG["DATA_DIR"]), metadata, CONFIG)
+    if CONFIG["OUTPUT_FORMAT"] == "sqlite":
+        out_path = CONFIG["RESULT_DB"]
+        with ResultStoreWriter(out_path) as writer:
+            for user_id, res in user_results.items():
+                writer.write(user_id, res)
+    else:
+        out_path = CONFIG["OUTPUT_PATH"]
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(user_results, f, ensure_ascii=False)
+    if CONFIG["WRITE_PER_USER"]:
+        os.makedirs(CONFIG["OUTPUT_DIR"], exist_ok=True)
+        for user_id, res in user_results.items():
+            with open(os.path.join(CONFIG["OUTPUT_DIR"], f"{user_id}_recommendations.json"), "w", encoding="utf-8") as f:
+                json.dump(res, f, ensure_ascii=False, indent=2)
+    t_write = time.perf_counter() - t0
+
+    print(f"⏱️ 인코딩 {t_encode:.2f}s | 점수 계산 {t_score:.2f}s | 저장 {t_write:.2f}s | 전체 {time.perf_counter() - t_start:.2f}s")
+    print(f"✅ 저장 완료 → {out_path}")
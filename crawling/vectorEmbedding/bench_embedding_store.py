@@ -0,0 +1,88 @@
+"""
+기존 JSONL / Pickle vs. mmap 임베딩 저장소 비교 (디스크 크기 + 로드 시간)
+
+기존 place_embeddings.pkl 을 읽어 저장소로 변환한 뒤 양쪽 로드 시간을 측정함.
+"""
+import os
+import json
+import time
+import pickle
+import numpy as np
+
+from embedding_store import save_embedding_store, load_embedding_store, store_disk_size
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "PKL_PATH": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_embeddings.pkl",
+    "JSONL_PATH": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_embeddings.jsonl",
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "REPEAT": 5
+}
+
+
+def convert_legacy(data, store_dir):
+    """pickle 레코드 목록 → 바이너리 저장소"""
+    dim = next(len(item["like_embedding"]) for item in data if item.get("like_embedding"))
+    n = len(data)
+
+    matrices = {vtype: np.zeros((n, dim), dtype=np.float32) for vtype in ("like", "dislike")}
+    masks = {vtype: np.zeros(n, dtype=bool) for vtype in ("like", "dislike")}
+    for i, item in enumerate(data):
+        for vtype in ("like", "dislike"):
+            vec = item.get(f"{vtype}_embedding")
+            if vec:
+                matrices[vtype][i] = vec
+                masks[vtype][i] = True
+
+    save_embedding_store(store_dir, data, matrices, masks)
+
+
+def best_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def load_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def load_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def load_store_touch(store_dir):
+    """mmap 로드 후 전체 행렬을 한 번 읽어서 공정하게 비교"""
+    store = load_embedding_store(store_dir)
+    return float(store.like.sum()) + float(store.dislike.sum())
+
+
+if __name__ == "__main__":
+    with open(CONFIG["PKL_PATH"], "rb") as f:
+        data = pickle.load(f)
+
+    if not os.path.exists(os.path.join(CONFIG["STORE_DIR"], "meta.json")):
+        print("🔄 기존 pickle → 저장소 변환 중...")
+        convert_legacy(data, CONFIG["STORE_DIR"])
+
+    rows = []
+    if os.path.exists(CONFIG["JSONL_PATH"]):
+        rows.append(("JSONL", os.path.getsize(CONFIG["JSONL_PATH"]),
+                     best_time(lambda: load_jsonl(CONFIG["JSONL_PATH"]), CONFIG["REPEAT"])))
+    rows.append(("Pickle", os.path.getsize(CONFIG["PKL_PATH"]),
+                 best_time(lambda: load_pickle(CONFIG["PKL_PATH"]), CONFIG["REPEAT"])))
+    store_size = store_disk_size(CONFIG["STORE_DIR"])
+    rows.append(("Store (mmap)", store_size,
+                 best_time(lambda: load_embedding_store(CONFIG["STORE_DIR"]), CONFIG["REPEAT"])))
+    rows.append(("Store (mmap + 전체 읽기)", store_size,
+                 best_time(lambda: load_store_touch(CONFIG["STORE_DIR"]), CONFIG["REPEAT"])))
+
+    print(f"\n{'format':<26}{'size(MB)':>10}{'load(ms)':>12}")
+    for name, size, sec in rows:
+        print(f"{name:<26}{size / 1e6:>10.2f}{sec * 1e3:>12.2f}")
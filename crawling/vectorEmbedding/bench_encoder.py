@@ -0,0 +1,82 @@
+"""
+인코더 백엔드 parity 체크 + 지연시간/처리량 벤치마크
+
+- parity: PyTorch 대비 ONNX 임베딩 코사인 유사도 (최소값 ≥ MIN_COSINE 이어야 통과)
+- 단일 쿼리: 유저 like 문자열 1개씩 인코딩 p50 / p95 (ms)
+- 배치: 전체 유저 like + dislike 키워드 일괄 인코딩 처리량 (sentences/sec)
+"""
+import ast
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from encoder_backend import get_encoder
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "USER_FILE": r"C:\Users\changjin\workspace\lab\pln\data_set\1000_user_info.csv",
+    "BACKENDS": ["torch", "onnx_fp32", "onnx"],
+    "MIN_COSINE": 0.99,
+    "SINGLE_QUERIES": 200,
+    "BATCH_SIZE": 64
+}
+
+
+def load_texts(user_file):
+    df = pd.read_csv(user_file)
+    like_texts = [" ".join(ast.literal_eval(x)) for x in df["like_keywords"]]
+    dislike_texts = [kw for x in df["dislike_keywords"] for kw in ast.literal_eval(x)]
+    return like_texts, dislike_texts
+
+
+def cosine_rows(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+if __name__ == "__main__":
+    like_texts, dislike_texts = load_texts(CONFIG["USER_FILE"])
+    all_texts = like_texts + dislike_texts
+    print(f"📄 문장 수: like {len(like_texts)}, dislike {len(dislike_texts)}")
+
+    reference = None
+    failed = False
+
+    print(f"\n{'backend':<12}{'load(s)':>9}{'p50(ms)':>10}{'p95(ms)':>10}{'batch(s/s)':>12}{'min cos':>10}{'mean cos':>10}")
+    for backend in CONFIG["BACKENDS"]:
+        t0 = time.perf_counter()
+        encoder = get_encoder(backend)
+        load_sec = time.perf_counter() - t0
+
+        encoder.encode(like_texts[:8])  # warm-up
+
+        # 단일 쿼리 지연
+        lat = []
+        for text in like_texts[:CONFIG["SINGLE_QUERIES"]]:
+            t0 = time.perf_counter()
+            encoder.encode(text, convert_to_numpy=True)
+            lat.append((time.perf_counter() - t0) * 1e3)
+
+        # 배치 처리량
+        t0 = time.perf_counter()
+        emb = encoder.encode(all_texts, batch_size=CONFIG["BATCH_SIZE"], convert_to_numpy=True)
+        throughput = len(all_texts) / (time.perf_counter() - t0)
+
+        if reference is None:
+            reference = emb
+            min_cos = mean_cos = 1.0
+        else:
+            cos = cosine_rows(reference, emb)
+            min_cos, mean_cos = float(cos.min()), float(cos.mean())
+            failed |= min_cos < CONFIG["MIN_COSINE"]
+
+        print(f"{backend:<12}{load_sec:>9.2f}{np.percentile(lat, 50):>10.2f}{np.percentile(lat, 95):>10.2f}"
+              f"{throughput:>12.1f}{min_cos:>10.4f}{mean_cos:>10.4f}")
+
+    if failed:
+        print(f"\n❌ parity 실패: 코사인 < {CONFIG['MIN_COSINE']}")
+        sys.exit(1)
+    print(f"\n✅ parity 통과 (코사인 ≥ {CONFIG['MIN_COSINE']})")
@@ -0,0 +1,182 @@
+"""
+HNSW 파라미터 튜닝 벤치마크 (Place 인덱스)
+
+(max_connections M, ef_construction) 조합마다 인덱스를 한 번 만들고, 검색 시 ef 를 바꿔가며
+유저 쿼리 워크로드 (1000_user_info.csv like 키워드 × 4개 카테고리, limit = TOP_K * 3) 를 재생해서
+    recall@LIMIT (로컬 exact 검색 대비) / 구축 시간 / 인덱스 메모리 / 쿼리 지연시간 p50·p95·p99
+를 출력. 결과를 보고 run_weaviate.py CONFIG["HNSW"] 를 정함.
+
+BACKEND:
+    "local"    : hnswlib (Weaviate HNSW 대용, 같은 M / ef_construction / ef 의미) — 메모리는 직렬화 크기
+    "weaviate" : WEAVIATE_MODE 인스턴스에 조합별 임시 컬렉션을 만들어 업로드 후 측정 (끝나면 삭제, 메모리는 측정 안 함)
+QUERY_SOURCE: "users" (인코더로 유저 like 키워드 인코딩) | "synthetic" (저장소 like 벡터 + 노이즈, 모델 불필요)
+"""
+import os
+import ast
+import time
+import tempfile
+import itertools
+import numpy as np
+import pandas as pd
+
+from embedding_store import load_embedding_store
+from retrieval import LocalRetriever, WeaviateRetriever
+from bench_retrieval import make_queries
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "USER_FILE": r"C:\Users\changjin\workspace\lab\pln\data_set\1000_user_info.csv",
+    "OUTPUT_PATH": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\hnsw_bench.csv",
+    "BACKEND": "local",   # "local" | "weaviate"
+    "WEAVIATE_MODE": "local",
+    "COLLECTION_PREFIX": "HnswBench",
+    "PARTITIONED": False,   # local: 카테고리별 하위 인덱스 (retrieval.LocalRetriever partitioned)
+    "QUERY_SOURCE": "users",
+    "ENCODER_BACKEND": "auto",
+    "MAX_QUERIES": 1000,
+    "CATEGORIES": ["Accommodation", "카페", "음식점", "관광지"],
+    "LIMIT": 90,
+    "GRID": {
+        "max_connections": [8, 16, 32, 64],
+        "ef_construction": [64, 128, 256],
+        "ef": [90, 128, 256, 512]   # LIMIT 보다 작은 ef는 검색 시 LIMIT으로 올라가므로 (hnswlib / Weaviate 공통) 의미 없음
+    }
+}
+
+
+# ========== 쿼리 워크로드 ==========
+def load_queries(store):
+    if CONFIG["QUERY_SOURCE"] == "synthetic":
+        return make_queries(store, CONFIG["MAX_QUERIES"])
+    from encoder_backend import get_encoder
+
+    likes = [ast.literal_eval(x) for x in pd.read_csv(CONFIG["USER_FILE"])["like_keywords"]][:CONFIG["MAX_QUERIES"]]
+    model = get_encoder(CONFIG["ENCODER_BACKEND"])
+    return np.asarray(model.encode([" ".join(kw) for kw in likes], convert_to_numpy=True), dtype=np.float32)
+
+
+def ground_truth(store, queries):
+    """{카테고리: [정답 place_id set, ...]} — 검색은 (카테고리, id)별 첫 행만 대상이라 set 크기 = LIMIT"""
+    exact = LocalRetriever(store, method="exact")
+    return {
+        cat: [set(store.ids[exact.search_rows(q, cat, CONFIG["LIMIT"])[0]].tolist()) for q in queries]
+        for cat in CONFIG["CATEGORIES"]
+    }
+
+
+def replay(retriever, queries, truth):
+    """반환: (recall, p50, p95, p99 ms)"""
+    latencies, recalls = [], []
+    for cat in CONFIG["CATEGORIES"]:
+        for q, expected in zip(queries, truth[cat]):
+            t0 = time.perf_counter()
+            hits = retriever.search(q, cat, limit=CONFIG["LIMIT"])
+            latencies.append((time.perf_counter() - t0) * 1e3)
+            if expected:
+                recalls.append(len({int(hit.place_id) for hit in hits} & expected) / len(expected))
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return float(np.mean(recalls)), p50, p95, p99
+
+
+# ========== 백엔드 ==========
+def _hnswlib_bytes(indexes):
+    """hnswlib 인덱스 직렬화 크기 합 (그래프 + 벡터 = 메모리 상주 크기와 거의 같음)"""
+    total = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, index in enumerate(indexes):
+            path = os.path.join(tmp, f"index_{i}.bin")
+            index.save_index(path)
+            total += os.path.getsize(path)
+    return total
+
+
+class LocalBackend:
+    def __init__(self, store):
+        self.store = store
+
+    def build(self, max_connections, ef_construction):
+        """반환: (retriever, 구축 s, 메모리 bytes)"""
+        t0 = time.perf_counter()
+        retriever = LocalRetriever(self.store, method="hnsw", partitioned=CONFIG["PARTITIONED"],
+                                   hnsw_params={"M": max_connections, "ef_construction": ef_construction})
+        elapsed = time.perf_counter() - t0
+        indexes = list(retriever.cat_index.values()) if CONFIG["PARTITIONED"] else [retriever.index]
+        return retriever, elapsed, _hnswlib_bytes(indexes)
+
+    def set_ef(self, retriever, ef):
+        for index in (retriever.cat_index.values() if CONFIG["PARTITIONED"] else [retriever.index]):
+            index.set_ef(ef)
+
+    def drop(self, retriever):
+        pass
+
+
+class WeaviateBackend:
+    def __init__(self, store):
+        import run_weaviate
+        from weaviate_conn import connect_weaviate
+
+        self.store = store
+        self.rw = run_weaviate
+        self.client = connect_weaviate(CONFIG["WEAVIATE_MODE"])
+
+    def build(self, max_connections, ef_construction):
+        name = f"{CONFIG['COLLECTION_PREFIX']}_M{max_connections}_EFC{ef_construction}"
+        if self.client.collections.exists(name):
+            self.client.collections.delete(name)
+        hnsw = {"ef": None, "ef_construction": ef_construction, "max_connections": max_connections}
+
+        t0 = time.perf_counter()
+        self.rw.create_collection(self.client, name, hnsw=hnsw, partition=None)
+        rows = self.rw.unique_store_rows(self.store)
+        failed = self.rw.batch_import(self.client.collections.get(name),
+                                      self.rw.iter_store_objects(self.store, rows, name), len(rows))
+        elapsed = time.perf_counter() - t0
+        if failed:
+            print(f"⚠️ {name}: 업로드 실패 {len(failed)}건")
+        return WeaviateRetriever(self.client, name), elapsed, np.nan
+
+    def set_ef(self, retriever, ef):
+        from weaviate.classes.config import Reconfigure
+        retriever.collection.config.update(vector_index_config=Reconfigure.VectorIndex.hnsw(ef=ef))
+
+    def drop(self, retriever):
+        self.client.collections.delete(retriever.collection.name)
+
+    def close(self):
+        self.client.close()
+
+
+if __name__ == "__main__":
+    store = load_embedding_store(CONFIG["STORE_DIR"])
+    queries = load_queries(store)
+    truth = ground_truth(store, queries)
+    print(f"🔎 쿼리 {len(queries)}개 × 카테고리 {len(CONFIG['CATEGORIES'])}개, limit={CONFIG['LIMIT']}, "
+          f"backend={CONFIG['BACKEND']}")
+
+    backend = WeaviateBackend(store) if CONFIG["BACKEND"] == "weaviate" else LocalBackend(store)
+    grid = CONFIG["GRID"]
+    rows = []
+    print(f"{'M':>4}{'efC':>6}{'ef':>6}{'build(s)':>10}{'mem(MB)':>9}{'recall':>9}{'p50(ms)':>9}{'p95(ms)':>9}{'p99(ms)':>9}")
+    try:
+        for m, efc in itertools.product(grid["max_connections"], grid["ef_construction"]):
+            retriever, build_s, mem = backend.build(m, efc)
+            try:
+                for ef in grid["ef"]:
+                    backend.set_ef(retriever, ef)
+                    recall, p50, p95, p99 = replay(retriever, queries, truth)
+                    rows.append({"max_connections": m, "ef_construction": efc, "ef": ef, "build_s": build_s,
+                                 "memory_mb": mem / 2 ** 20, "recall": recall,
+                                 "p50_ms": p50, "p95_ms": p95, "p99_ms": p99})
+                    print(f"{m:>4}{efc:>6}{ef:>6}{build_s:>10.2f}{mem / 2 ** 20:>9.2f}{recall:>9.4f}"
+                          f"{p50:>9.3f}{p95:>9.3f}{p99:>9.3f}")
+            finally:
+                backend.drop(retriever)
+    finally:
+        if hasattr(backend, "close"):
+            backend.close()
+
+    pd.DataFrame(rows).to_csv(CONFIG["OUTPUT_PATH"], index=False)
+    print(f"✅ 저장 완료 → {CONFIG['OUTPUT_PATH']}")
@@ -0,0 +1,84 @@
+"""
+카테고리 필터 검색 vs 카테고리별 파티션 검색 비교 (지연시간 + recall)
+
+    filtered    : 전체 장소 인덱스 하나 + 검색 시 category 필터 (기존 방식)
+    partitioned : 카테고리별 하위 인덱스 / Weaviate tenant 로 라우팅 (필터 없음)
+
+recall@LIMIT 은 로컬 exact 검색 결과 대비. 쿼리는 bench_retrieval 과 같이 저장소 like 벡터 + 노이즈.
+WEAVIATE_COLLECTIONS 를 채우면 Weaviate 쪽도 비교
+(예: {"filtered": "Place", "partitioned": "PlacePartitioned"} — 후자는 run_weaviate.py PARTITION="tenant" 로 업로드).
+"""
+import time
+import numpy as np
+
+from embedding_store import load_embedding_store
+from retrieval import build_retriever
+from bench_retrieval import make_queries
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "METHODS": ["exact", "hnsw"],
+    "HNSW_PARAMS": {"M": 16, "ef_construction": 200, "ef": 64},
+    "WEAVIATE_MODE": "cloud",
+    "WEAVIATE_COLLECTIONS": None,   # None | {"filtered": 컬렉션명, "partitioned": tenant 컬렉션명}
+    "CATEGORIES": ["Accommodation", "카페", "음식점", "관광지"],
+    "LIMIT": 90,
+    "QUERIES": 500
+}
+
+
+def ground_truth(store, queries, category, limit):
+    exact = build_retriever("exact", store=store)
+    # 카페/음식점 사이에 같은 id가 있어도 카테고리 안에서는 유일 → place_id 로 비교
+    return [set(store.ids[exact.search_rows(q, category, limit)[0]].tolist()) for q in queries]
+
+
+def run(retriever, queries, category, limit, truth):
+    """반환: (p50 ms, p95 ms, recall@limit)"""
+    latencies, recalls = [], []
+    for q, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        hits = retriever.search(q, category, limit=limit)
+        latencies.append((time.perf_counter() - t0) * 1e3)
+        if expected:
+            found = {int(hit.place_id) for hit in hits}
+            recalls.append(len(found & expected) / len(expected))
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return p50, p95, float(np.mean(recalls)) if recalls else float("nan")
+
+
+def make_backends(store):
+    """[(이름, 준비 ms, retriever)]"""
+    backends = []
+    for method in CONFIG["METHODS"]:
+        for partitioned in (False, True):
+            t0 = time.perf_counter()
+            retriever = build_retriever(method, store=store, hnsw_params=CONFIG["HNSW_PARAMS"], partitioned=partitioned)
+            name = f"{method}-{'partitioned' if partitioned else 'filtered'}"
+            backends.append((name, (time.perf_counter() - t0) * 1e3, retriever))
+    for layout, collection in (CONFIG["WEAVIATE_COLLECTIONS"] or {}).items():
+        t0 = time.perf_counter()
+        retriever = build_retriever("weaviate", store=store, weaviate_mode=CONFIG["WEAVIATE_MODE"],
+                                    collection_name=collection, partitioned=layout == "partitioned")
+        backends.append((f"weaviate-{layout}", (time.perf_counter() - t0) * 1e3, retriever))
+    return backends
+
+
+if __name__ == "__main__":
+    store = load_embedding_store(CONFIG["STORE_DIR"])
+    queries = make_queries(store, CONFIG["QUERIES"])
+    truth = {cat: ground_truth(store, queries, cat, CONFIG["LIMIT"]) for cat in CONFIG["CATEGORIES"]}
+
+    backends = make_backends(store)
+    for name, build_ms, _ in backends:
+        print(f"🔧 {name} 준비: {build_ms:.1f} ms")
+
+    print(f"\n{'backend':<24}{'category':<16}{'rows':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'recall':>9}")
+    for name, _, retriever in backends:
+        for cat in CONFIG["CATEGORIES"]:
+            p50, p95, recall = run(retriever, queries, cat, CONFIG["LIMIT"], truth[cat])
+            n_rows = len(store.category_rows(cat))
+            print(f"{name:<24}{cat:<16}{n_rows:>6}{p50:>10.3f}{p95:>10.3f}{recall:>9.3f}")
+        retriever.close()
@@ -0,0 +1,86 @@
+"""
+int8 / fp16 양자화 recall@K 벤치마크 (1000명 유저 기준)
+
+- 기준: float32 정확 검색 (카테고리별 코사인 Top-K)
+- 비교: 양자화 행렬만으로 검색 / 양자화 후보(K * SHORTLIST_FACTOR) + float32 재채점
+- 메모리: like/dislike 행렬 크기
+- 서빙 경로에서는 build_retriever("exact", quantization="int8" | "fp16") 로 같은 검색을 사용
+"""
+import ast
+import time
+import numpy as np
+import pandas as pd
+
+from embedding_store import load_embedding_store, normalize_rows
+from encoder_backend import get_encoder
+from quantize import QuantizedMatrix, save_quantized, quantized_search, top_k_indices
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "USER_FILE": r"C:\Users\changjin\workspace\lab\pln\data_set\1000_user_info.csv",
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "TOP_K": 30,
+    "SHORTLIST_FACTOR": 4,
+    "CATEGORIES": ["Accommodation", "카페", "음식점", "관광지"]
+}
+
+
+def exact_search(like_norm, rows, query, k):
+    scores = like_norm[rows] @ query
+    idx = top_k_indices(scores, k)
+    return rows[idx]
+
+
+def recall(truth, pred):
+    return len(set(truth.tolist()) & set(pred.tolist())) / max(len(truth), 1)
+
+
+if __name__ == "__main__":
+    store = load_embedding_store(CONFIG["STORE_DIR"])
+    like_norm = normalize_rows(store.like)
+
+    # 유저 like 벡터 (한 번에 배치 인코딩)
+    user_df = pd.read_csv(CONFIG["USER_FILE"])
+    like_texts = [" ".join(ast.literal_eval(x)) for x in user_df["like_keywords"]]
+    model = get_encoder("torch")
+    user_vecs = normalize_rows(model.encode(like_texts, batch_size=64, convert_to_numpy=True))
+    print(f"👤 유저 {len(user_vecs)}명 인코딩 완료")
+
+    k = CONFIG["TOP_K"]
+    cat_rows = {
+        cat: np.intersect1d(store.unique_category_rows(cat), np.flatnonzero(store.like_mask))
+        for cat in CONFIG["CATEGORIES"]
+    }
+
+    # float32 기준 정답
+    truth = {
+        cat: [exact_search(like_norm, rows, q, k) for q in user_vecs]
+        for cat, rows in cat_rows.items()
+    }
+
+    float_bytes = store.like.nbytes + store.dislike.nbytes
+    n_queries = len(user_vecs) * len(CONFIG["CATEGORIES"])
+
+    print(f"\n{'mode':<20}{'recall@' + str(k):>12}{'ms/query':>12}{'matrix MB':>12}{'saved':>9}")
+    print(f"{'float32':<20}{1.0:>12.4f}{'-':>12}{float_bytes / 1e6:>12.2f}{'-':>9}")
+
+    for kind in ("int8", "fp16"):
+        save_quantized(store, kind)   # 벤치마크는 항상 현재 저장소로 다시 생성
+        qmats = {vtype: QuantizedMatrix(store, vtype, kind) for vtype in ("like", "dislike")}
+        q_bytes = sum(m.nbytes for m in qmats.values())
+
+        for rescore in (False, True):
+            recalls = []
+            t0 = time.perf_counter()
+            for cat, rows in cat_rows.items():
+                for i, q in enumerate(user_vecs):
+                    pred, _ = quantized_search(qmats["like"], q, rows, k,
+                                               shortlist_factor=CONFIG["SHORTLIST_FACTOR"],
+                                               rescore=rescore)
+                    recalls.append(recall(truth[cat][i], pred))
+            ms = (time.perf_counter() - t0) * 1e3 / n_queries
+
+            name = f"{kind}{' + rescore' if rescore else ''}"
+            saved = 1 - q_bytes / float_bytes
+            print(f"{name:<20}{np.mean(recalls):>12.4f}{ms:>12.3f}{q_bytes / 1e6:>12.2f}{saved:>8.0%}")
@@ -0,0 +1,60 @@
+"""
+추천 HTTP 서비스 부하 테스트 (recommend_server.py 를 먼저 실행)
+
+1000_user_info.csv 의 유저 프로필을 CONCURRENCY 개의 동시 연결로 REQUESTS 번 보내고
+요청 지연시간 p50 / p99 와 처리량(requests/sec) 출력.
+"""
+import time
+import asyncio
+import numpy as np
+import pandas as pd
+import httpx
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "URL": "http://127.0.0.1:8000/recommend",
+    "USER_FILE": r"C:\Users\changjin\workspace\lab\pln\data_set\1000_user_info.csv",
+    "REQUESTS": 1000,
+    "CONCURRENCY": [1, 8, 32],
+    "WARMUP": 20
+}
+
+
+def load_profiles(user_file):
+    df = pd.read_csv(user_file)
+    return df.where(df.notna(), None).to_dict(orient="records")
+
+
+async def run_load(client, profiles, n_requests, concurrency):
+    latencies = []
+    cursor = iter(range(n_requests))
+
+    async def worker():
+        for i in cursor:
+            t0 = time.perf_counter()
+            resp = await client.post(CONFIG["URL"], json=profiles[i % len(profiles)])
+            resp.raise_for_status()
+            latencies.append((time.perf_counter() - t0) * 1e3)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, time.perf_counter() - t0
+
+
+async def main():
+    profiles = load_profiles(CONFIG["USER_FILE"])
+    limits = httpx.Limits(max_connections=max(CONFIG["CONCURRENCY"]))
+
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        await run_load(client, profiles, CONFIG["WARMUP"], 1)
+
+        print(f"{'concurrency':>12}{'p50(ms)':>10}{'p99(ms)':>10}{'req/s':>10}")
+        for concurrency in CONFIG["CONCURRENCY"]:
+            latencies, elapsed = await run_load(client, profiles, CONFIG["REQUESTS"], concurrency)
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(f"{concurrency:>12}{p50:>10.2f}{p99:>10.2f}{len(latencies) / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+검색 백엔드 지연시간 비교 (카테고리별 Top-K*3 검색)
+
+쿼리는 저장소의 like 벡터에 노이즈를 섞어 생성 (모델 로드 없이 실행 가능).
+"weaviate" 를 BACKENDS에 넣으면 원격 왕복 지연도 함께 측정.
+"hybrid" 는 exact 벡터 검색 + BM25 (유저 like 키워드) RRF 융합 — 벡터 단독과 지연시간 비교용.
+"""
+import ast
+import time
+import numpy as np
+import pandas as pd
+
+from embedding_store import load_embedding_store
+from keyword_index import build_bm25_index
+from retrieval import build_retriever, HybridRetriever
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "DATA_DIR": r"C:\Users\changjin\workspace\lab\pln\data_set\null_X",
+    "USER_FILE": r"C:\Users\changjin\workspace\lab\pln\data_set\1000_user_info.csv",
+    "BACKENDS": ["exact", "hnsw", "hybrid"],
+    "WEAVIATE_MODE": "cloud",
+    "CATEGORIES": ["Accommodation", "카페", "음식점", "관광지"],
+    "LIMIT": 90,
+    "QUERIES": 500
+}
+
+
+def make_queries(store, n, seed=0):
+    rng = np.random.default_rng(seed)
+    valid = np.flatnonzero(store.like_mask)
+    base = np.asarray(store.like[rng.choice(valid, n)])
+    return base + 0.05 * rng.standard_normal(base.shape).astype(np.float32)
+
+
+def make_retriever(backend, store):
+    if backend == "hybrid":
+        return HybridRetriever(build_retriever("exact", store=store), build_bm25_index(store, CONFIG["DATA_DIR"]), store)
+    return build_retriever(backend, store=store, weaviate_mode=CONFIG["WEAVIATE_MODE"])
+
+
+if __name__ == "__main__":
+    store = load_embedding_store(CONFIG["STORE_DIR"])
+    queries = make_queries(store, CONFIG["QUERIES"])
+    user_likes = [ast.literal_eval(x) for x in pd.read_csv(CONFIG["USER_FILE"])["like_keywords"]]
+
+    print(f"{'backend':<10}{'category':<16}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for backend in CONFIG["BACKENDS"]:
+        t0 = time.perf_counter()
+        retriever = make_retriever(backend, store)
+        print(f"🔧 {backend} 준비: {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+        for cat in CONFIG["CATEGORIES"]:
+            lat = []
+            for i, q in enumerate(queries):
+                if backend == "hybrid":
+                    retriever.set_query(user_likes[i % len(user_likes)])
+                t0 = time.perf_counter()
+                retriever.search(q, cat, limit=CONFIG["LIMIT"])
+                lat.append((time.perf_counter() - t0) * 1e3)
+            p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+            print(f"{backend:<10}{cat:<16}{p50:>10.3f}{p95:>10.3f}{p99:>10.3f}")
+
+        retriever.close()
@@ -0,0 +1,98 @@
+"""
+MMR (Maximal Marginal Relevance) 다양성 재정렬
+
+카테고리별 top-k 결과에서 같은 체인 지점 / 같은 골목의 비슷한 카페가 줄줄이 나오지 않도록
+    mmr(i) = lambda * relevance(i) - (1 - lambda) * max_{j ∈ 선택됨} sim(i, j)
+를 한 개씩 뽑으며 재정렬.
+    sim(i, j) = (1 - geo_weight) * cos(like_i, like_j) + geo_weight * exp(-거리(i, j) / geo_scale_km)
+
+후보 n개의 유사도 행렬(n × n)을 한 번에 만들고, 선택할 때마다 max_sim 벡터를 선택 행과 np.maximum 으로만 갱신
+(쌍별 Python 루프 없음) — n=30 기준 카테고리당 수십 µs.
+
+    mmr = MMRReranker(store, metadata, lambda_=0.7, geo_weight=0.3)
+    results = mmr.rerank(recommender.recommend(...))   # {영문 카테고리: [{id, category, final_score}, ...]}
+"""
+import numpy as np
+
+from embedding_store import normalize_rows
+from geo_index import haversine_km
+from recommender import CATEGORY_KOREAN
+
+
+def mmr_order(relevance, emb, k=None, lambda_=0.7, lat=None, lng=None, geo_weight=0.0, geo_scale_km=1.0):
+    """
+    relevance: (n,) 관련도 (클수록 좋음, 내부에서 0~1로 min-max 정규화)
+    emb: (n, D) 정규화된 like 벡터 (없는 장소는 0벡터 → 유사도 0)
+    lat, lng: (n,) 좌표 (geo_weight > 0 일 때, NaN이면 거리 유사도 0)
+    반환: 선택 순서의 인덱스 배열 (최대 k개)
+    """
+    relevance = np.asarray(relevance, dtype=np.float64)
+    n = len(relevance)
+    k = n if k is None else min(k, n)
+    if n == 0 or k == 0:
+        return np.empty(0, dtype=np.int64)
+
+    span = relevance.max() - relevance.min()
+    rel = (relevance - relevance.min()) / span if span > 0 else np.ones(n)
+
+    sim = np.asarray(emb, dtype=np.float64) @ np.asarray(emb, dtype=np.float64).T
+    if geo_weight > 0 and lat is not None:
+        lat, lng = np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64)
+        geo_sim = np.exp(-haversine_km(lat[:, None], lng[:, None], lat[None, :], lng[None, :]) / geo_scale_km)
+        sim = (1 - geo_weight) * sim + geo_weight * np.nan_to_num(geo_sim)
+
+    order = np.empty(k, dtype=np.int64)
+    max_sim = np.full(n, -np.inf)
+    gain = lambda_ * rel
+    for step in range(k):
+        # 첫 선택은 관련도 최대 (max_sim = -inf 이면 페널티 없음)
+        score = gain - (1 - lambda_) * np.where(np.isfinite(max_sim), max_sim, 0.0)
+        score[order[:step]] = -np.inf
+        pick = int(np.argmax(score))
+        order[step] = pick
+        np.maximum(max_sim, sim[pick], out=max_sim)
+    return order
+
+
+class MMRReranker:
+    """
+    store: EmbeddingStore (like 벡터), metadata: PlaceMetadata (좌표, geo_weight > 0 일 때만 필요)
+    top_n: 재정렬 후 남길 개수 (None이면 전체 순서만 바꿈)
+    """
+
+    def __init__(self, store, metadata=None, lambda_=0.7, geo_weight=0.0, geo_scale_km=1.0, top_n=None):
+        if geo_weight > 0 and metadata is None:
+            raise ValueError("geo_weight > 0 에는 좌표(metadata)가 필요합니다.")
+        self.store = store
+        self.metadata = metadata
+        self.lambda_ = lambda_
+        self.geo_weight = geo_weight
+        self.geo_scale_km = geo_scale_km
+        self.top_n = top_n
+
+    def order_rows(self, rows, relevance, category):
+        """저장소 행 번호 + 관련도 → MMR 순서 인덱스 (batch_recommender 처럼 행 번호를 바로 가진 경우)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        safe = np.maximum(rows, 0)
+        emb = normalize_rows(self.store.like[safe]) * (rows >= 0)[:, None]
+        lat = lng = None
+        if self.geo_weight > 0:
+            meta_rows = self.metadata.rows(self.store.ids[safe], category)
+            found = (rows >= 0) & (meta_rows >= 0)
+            lat = np.where(found, self.metadata.lat[np.maximum(meta_rows, 0)], np.nan)
+            lng = np.where(found, self.metadata.lng[np.maximum(meta_rows, 0)], np.nan)
+        return mmr_order(relevance, emb, k=self.top_n, lambda_=self.lambda_, lat=lat, lng=lng,
+                         geo_weight=self.geo_weight, geo_scale_km=self.geo_scale_km)
+
+    def rerank(self, results_by_cat):
+        """{영문 카테고리: [{id, category, final_score}, ...]} → 같은 형식, 카테고리별 MMR 순서"""
+        out = {}
+        for cat_en, items in results_by_cat.items():
+            cat = CATEGORY_KOREAN.get(cat_en)
+            if len(items) < 2 or cat is None:
+                out[cat_en] = items
+                continue
+            rows = self.store.rows([item["id"] for item in items], cat)   # 축제(음수 id)는 -1
+            order = self.order_rows(rows, [item["final_score"] for item in items], cat)
+            out[cat_en] = [items[i] for i in order]
+        return out
@@ -0,0 +1,87 @@
+"""
+임베딩 서버 클라이언트 (embedding_server.py)
+
+torch / sentence_transformers 를 import 하지 않으므로 스크립트 시작이 빠름.
+SentenceTransformer.encode 와 같은 형태로 호출 가능:
+    client = EmbeddingClient()
+    vec = client.encode("Fresh seafood")          # (D,)
+    mat = client.encode(["Quiet", "Clean"])       # (2, D)
+
+서버 주소는 EMBEDDING_SERVER 환경변수 ("127.0.0.1:8765" 또는 "unix:/tmp/embedding.sock")로 지정 가능.
+"""
+import os
+import json
+import socket
+import numpy as np
+
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+
+class EmbeddingClient:
+    def __init__(self, address=None, timeout=60):
+        self.address = address or os.getenv("EMBEDDING_SERVER", DEFAULT_ADDRESS)
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._dim = None
+
+    # ---------- 연결 ----------
+    def _connect(self):
+        if self.address.startswith("unix:"):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address[len("unix:"):])
+        else:
+            host, port = self.address.rsplit(":", 1)
+            sock = socket.create_connection((host, int(port)), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._file = sock.makefile("rb")
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = None
+            self._file = None
+
+    def _request(self, payload):
+        if self._sock is None:
+            self._connect()
+        try:
+            self._sock.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+            header = json.loads(self._file.readline())
+        except (OSError, ValueError):
+            # 서버 재시작 등으로 끊긴 연결은 한 번 재연결 후 재시도
+            self.close()
+            self._connect()
+            self._sock.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+            header = json.loads(self._file.readline())
+
+        if "error" in header:
+            raise RuntimeError(f"임베딩 서버 오류: {header['error']}")
+        return header
+
+    # ---------- SentenceTransformer 호환 API ----------
+    def get_sentence_embedding_dimension(self):
+        if self._dim is None:
+            self._dim = self._request({"op": "info"})["dim"]
+        return self._dim
+
+    def encode(self, sentences, batch_size=None, convert_to_numpy=True, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        header = self._request({"op": "encode", "texts": texts})
+        n, dim = header["n"], header["dim"]
+        buf = self._file.read(n * dim * 4)
+        emb = np.frombuffer(buf, dtype="<f4").reshape(n, dim)
+
+        return emb[0] if single else emb
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
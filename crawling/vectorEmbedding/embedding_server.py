@@ -0,0 +1,151 @@
+"""
+로컬 임베딩 서버 (asyncio)
+
+모델을 한 번만 올려두고 여러 스크립트가 공유. 동시에 들어온 요청은 마이크로 배치로 묶어서 인코딩.
+
+프로토콜 (TCP 또는 Unix 소켓, 연결 유지):
+    요청: JSON 한 줄  {"op": "encode", "texts": [...]}  |  {"op": "info"}
+    응답: JSON 한 줄  {"n": N, "dim": D}  뒤에 N*D*4 바이트 float32 (little-endian)
+          info 요청은 {"dim": D, "backend": ...} 한 줄만
+          오류는 {"error": "..."} 한 줄
+
+실행:
+    python embedding_server.py
+클라이언트는 embedding_client.py (또는 get_encoder("server")) 사용.
+"""
+import os
+import json
+import time
+import asyncio
+import numpy as np
+
+from encoder_backend import get_encoder
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "HOST": "127.0.0.1",
+    "PORT": 8765,
+    "UNIX_SOCKET": None,      # 예: "/tmp/embedding.sock" (지정하면 TCP 대신 사용)
+    "BACKEND": "torch",       # "torch" | "onnx" | "onnx_fp32"
+    "MAX_BATCH": 64,          # 한 번에 인코딩할 최대 문장 수
+    "MAX_WAIT_MS": 5          # 첫 요청 이후 배치를 모으는 최대 대기 시간
+}
+
+
+class MicroBatcher:
+    """요청 큐를 모아 한 번에 encode → 요청별 future에 결과 분배"""
+
+    def __init__(self, encoder, max_batch, max_wait_ms):
+        self.encoder = encoder
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.stats = {"requests": 0, "batches": 0, "sentences": 0}
+
+    async def encode(self, texts):
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, fut))
+        return await fut
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            total = len(items[0][0])
+            deadline = loop.time() + self.max_wait
+
+            while total < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                total += len(item[0])
+
+            texts = [t for item_texts, _ in items for t in item_texts]
+            try:
+                # 모델 연산은 스레드에서 (이벤트 루프는 계속 요청을 받음)
+                emb = await loop.run_in_executor(
+                    None,
+                    lambda: self.encoder.encode(texts, batch_size=self.max_batch, convert_to_numpy=True)
+                )
+                emb = np.asarray(emb, dtype=np.float32).reshape(len(texts), -1)
+            except Exception as e:
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            start = 0
+            for item_texts, fut in items:
+                if not fut.done():
+                    fut.set_result(emb[start:start + len(item_texts)])
+                start += len(item_texts)
+
+            self.stats["requests"] += len(items)
+            self.stats["batches"] += 1
+            self.stats["sentences"] += len(texts)
+
+
+async def handle_client(reader, writer, batcher, dim):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                req = json.loads(line)
+                if req.get("op") == "info":
+                    writer.write((json.dumps({"dim": dim, "backend": CONFIG["BACKEND"], **batcher.stats}) + "\n").encode())
+                else:
+                    texts = [str(t) for t in req["texts"]]
+                    emb = await batcher.encode(texts) if texts else np.zeros((0, dim), dtype=np.float32)
+                    writer.write((json.dumps({"n": len(texts), "dim": dim}) + "\n").encode())
+                    writer.write(np.ascontiguousarray(emb, dtype="<f4").tobytes())
+            except Exception as e:
+                writer.write((json.dumps({"error": str(e)}, ensure_ascii=False) + "\n").encode())
+            await writer.drain()
+    except (ConnectionResetError, BrokenPipeError):
+        pass
+    finally:
+        writer.close()
+
+
+async def main():
+    t0 = time.perf_counter()
+    encoder = get_encoder(CONFIG["BACKEND"])
+    dim = encoder.get_sentence_embedding_dimension()
+    encoder.encode(["warm up"], convert_to_numpy=True)
+    print(f"✅ 모델 로드 완료 ({CONFIG['BACKEND']}, dim={dim}, {time.perf_counter() - t0:.1f}s)")
+
+    batcher = MicroBatcher(encoder, CONFIG["MAX_BATCH"], CONFIG["MAX_WAIT_MS"])
+    batch_task = asyncio.create_task(batcher.run())
+
+    def on_connect(reader, writer):
+        return handle_client(reader, writer, batcher, dim)
+
+    if CONFIG["UNIX_SOCKET"]:
+        if os.path.exists(CONFIG["UNIX_SOCKET"]):
+            os.remove(CONFIG["UNIX_SOCKET"])
+        server = await asyncio.start_unix_server(on_connect, path=CONFIG["UNIX_SOCKET"])
+        print(f"🚀 임베딩 서버 시작: unix:{CONFIG['UNIX_SOCKET']}")
+    else:
+        server = await asyncio.start_server(on_connect, CONFIG["HOST"], CONFIG["PORT"])
+        print(f"🚀 임베딩 서버 시작: {CONFIG['HOST']}:{CONFIG['PORT']}")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n🔒 임베딩 서버 종료")
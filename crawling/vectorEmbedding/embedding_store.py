@@ -0,0 +1,181 @@
+"""
+장소 임베딩 바이너리 저장소
+
+디렉토리 구조:
+    like.npy          (N, D) float32  like 임베딩 행렬
+    dislike.npy       (N, D) float32  dislike 임베딩 행렬
+    like_mask.npy     (N,)   bool     like 벡터 유효 여부 (키워드 없으면 False, 행은 0벡터)
+    dislike_mask.npy  (N,)   bool     dislike 벡터 유효 여부
+    ids.npy           (N,)   int64    장소 id (행 순서)
+    meta.json                         name / category / sub_category 목록 + 차원 + fingerprint (벡터 내용 해시)
+
+    (선택) 키워드별 멀티벡터 — multi_vector.py 참고
+    {vtype}_kw.npy          (K, D) float32  키워드 벡터 (장소 순서대로 이어붙임)
+    {vtype}_kw_offsets.npy  (N+1,) int64    장소 i의 키워드 = kw[offsets[i]:offsets[i+1]]
+
+    (선택) 파생 파일 — 저장소를 다시 저장하면 지워짐 (원본과 어긋난 채로 남지 않도록)
+    {vtype}_int8.npy / {vtype}_scale.npy / {vtype}_fp16.npy / {vtype}_norm.npy / quant_meta.json  quantize.py
+    knn_indptr.npy / knn_indices.npy / knn_scores.npy                                             place_graph.py
+
+np.load(mmap_mode="r")로 열기 때문에 로드 시 복사 없이 페이지 단위로만 읽힘.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+
+
+VECTOR_TYPES = ("like", "dislike")
+META_FILE = "meta.json"
+DERIVED_FILES = (
+    *(f"{vtype}_{suffix}.npy" for vtype in VECTOR_TYPES for suffix in ("int8", "scale", "fp16", "norm")),
+    "quant_meta.json", "knn_indptr.npy", "knn_indices.npy", "knn_scores.npy"
+)
+
+
+def _path(store_dir, name):
+    return os.path.join(store_dir, name)
+
+
+def normalize_rows(mat):
+    """행별 L2 정규화 (0벡터는 그대로 0) — 코사인 유사도 계산용 공용 함수"""
+    mat = np.asarray(mat, dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+# ========== 저장 ==========
+def save_embedding_store(store_dir, records, matrices, masks):
+    """
+    records: [{"id", "name", "category", "sub_category"}, ...]  (행 순서)
+    matrices: {"like": (N, D) array, "dislike": (N, D) array}
+    masks: {"like": (N,) bool, "dislike": (N,) bool}
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    for fname in DERIVED_FILES:
+        if os.path.exists(_path(store_dir, fname)):
+            os.remove(_path(store_dir, fname))
+
+    n = len(records)
+    dim = None
+    fingerprint = hashlib.sha1()
+    for vtype in VECTOR_TYPES:
+        mat = np.ascontiguousarray(matrices[vtype], dtype=np.float32)
+        mask = np.asarray(masks[vtype], dtype=bool)
+        if mat.shape[0] != n or mask.shape[0] != n:
+            raise ValueError(f"{vtype} 행 수가 records({n})와 다릅니다: {mat.shape[0]}, {mask.shape[0]}")
+        if dim is None:
+            dim = mat.shape[1]
+        elif mat.shape[1] != dim:
+            raise ValueError(f"{vtype} 차원 불일치: {mat.shape[1]} != {dim}")
+
+        np.save(_path(store_dir, f"{vtype}.npy"), mat)
+        np.save(_path(store_dir, f"{vtype}_mask.npy"), mask)
+        fingerprint.update(mat.tobytes())
+
+    ids = np.array([r["id"] for r in records], dtype=np.int64)
+    np.save(_path(store_dir, "ids.npy"), ids)
+    fingerprint.update(ids.tobytes())
+
+    meta = {
+        "dim": int(dim),
+        "count": n,
+        "fingerprint": fingerprint.hexdigest(),
+        "name": [r.get("name", "") for r in records],
+        "category": [r.get("category", "") for r in records],
+        "sub_category": [r.get("sub_category", "") for r in records],
+    }
+    with open(_path(store_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def save_keyword_vectors(store_dir, vtype, offsets, matrix):
+    """키워드별 멀티벡터 (ragged) 저장"""
+    np.save(_path(store_dir, f"{vtype}_kw_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+    np.save(_path(store_dir, f"{vtype}_kw.npy"), np.ascontiguousarray(matrix, dtype=np.float32))
+
+
+def store_disk_size(store_dir):
+    """저장소 전체 바이트 수"""
+    return sum(
+        os.path.getsize(_path(store_dir, fname))
+        for fname in os.listdir(store_dir)
+        if os.path.isfile(_path(store_dir, fname))
+    )
+
+
+# ========== 로드 ==========
+class EmbeddingStore:
+    """
+    mmap 기반 임베딩 저장소.
+    store.like / store.dislike 는 (N, D) float32 memmap, store.row(pid, category)로 행 번호 조회.
+    카페/음식점 사이에 같은 id가 있어 (카테고리, id) 기준으로 조회 (같은 카테고리 안 중복 id는 첫 행).
+    """
+
+    def __init__(self, store_dir, mmap=True):
+        self.store_dir = store_dir
+        mmap_mode = "r" if mmap else None
+
+        with open(_path(store_dir, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.dim = meta["dim"]
+        self.fingerprint = meta.get("fingerprint")   # 이전 버전 저장소에는 없음
+        self.names = meta["name"]
+        self.categories = np.array(meta["category"])
+        self.sub_categories = meta["sub_category"]
+
+        self.ids = np.load(_path(store_dir, "ids.npy"))
+        self.like = np.load(_path(store_dir, "like.npy"), mmap_mode=mmap_mode)
+        self.dislike = np.load(_path(store_dir, "dislike.npy"), mmap_mode=mmap_mode)
+        self.like_mask = np.load(_path(store_dir, "like_mask.npy"))
+        self.dislike_mask = np.load(_path(store_dir, "dislike_mask.npy"))
+
+        # 키워드 멀티벡터: {vtype: (offsets, matrix)} (저장된 경우만)
+        self.keywords = {}
+        for vtype in VECTOR_TYPES:
+            kw_path = _path(store_dir, f"{vtype}_kw.npy")
+            if os.path.exists(kw_path):
+                self.keywords[vtype] = (
+                    np.load(_path(store_dir, f"{vtype}_kw_offsets.npy")),
+                    np.load(kw_path, mmap_mode=mmap_mode)
+                )
+
+        self.key_to_row = {}
+        for i, (cat, pid) in enumerate(zip(self.categories.tolist(), self.ids.tolist())):
+            self.key_to_row.setdefault((cat, pid), i)
+        # CSV에 같은 (카테고리, id)가 반복된 행은 첫 행만 True — 검색 / 업로드 대상
+        self.first_mask = np.zeros(len(self.ids), dtype=bool)
+        self.first_mask[list(self.key_to_row.values())] = True
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, place_id, category):
+        """(place_id, 카테고리) → 행 번호 (없으면 None)"""
+        return self.key_to_row.get((category, int(place_id)))
+
+    def rows(self, place_ids, category):
+        """place_id 목록 (같은 카테고리) → 행 번호 배열 (없는 id는 -1)"""
+        return np.array([self.key_to_row.get((category, int(pid)), -1) for pid in place_ids], dtype=np.int64)
+
+    def category_rows(self, category):
+        """해당 카테고리 장소의 행 번호 배열"""
+        return np.flatnonzero(self.categories == category)
+
+    def unique_category_rows(self, category=None):
+        """(카테고리, id)별 첫 행만 — 같은 장소가 검색 결과에 두 번 나오지 않도록 (category=None이면 전체)"""
+        mask = self.first_mask if category is None else self.first_mask & (self.categories == category)
+        return np.flatnonzero(mask)
+
+    def vector(self, vtype, place_id, category):
+        """유효한 벡터면 (D,) 배열, 없으면 None"""
+        r = self.row(place_id, category)
+        if r is None or not getattr(self, f"{vtype}_mask")[r]:
+            return None
+        return getattr(self, vtype)[r]
+
+
+def load_embedding_store(store_dir, mmap=True):
+    return EmbeddingStore(store_dir, mmap=mmap)
@@ -0,0 +1,177 @@
+"""
+문장 인코더 백엔드
+
+- "torch": SentenceTransformer (PyTorch fp32, 기존 방식)
+- "onnx" : ONNX Runtime (CPU). 최초 실행 시 모델을 ONNX로 export + 동적 int8 양자화 후 캐시
+- "server": 로컬 임베딩 서버 클라이언트 (embedding_server.py, 모델 로드 없음)
+- "auto" : 서버가 떠 있으면 "server", 아니면 "torch"
+
+두 백엔드 모두 SentenceTransformer와 같은 토크나이저 / mean pooling / 정규화를 사용하고
+encode(sentences, batch_size=..., convert_to_numpy=True) 시그니처를 맞춰서 교체 가능함.
+무거운 import(torch, onnxruntime)는 백엔드 생성 시점에만 수행.
+"""
+import os
+import json
+import numpy as np
+
+
+MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+ONNX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_model")
+
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model_int8.onnx"
+ONNX_META_FILE = "encoder_meta.json"
+
+
+# ========== PyTorch (SentenceTransformer) ==========
+class TorchEncoder:
+    def __init__(self, model_name=MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, **kwargs):
+        return self.model.encode(sentences, batch_size=batch_size, convert_to_numpy=convert_to_numpy, **kwargs)
+
+    def get_sentence_embedding_dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+
+# ========== ONNX export ==========
+def export_onnx(model_name=MODEL_NAME, onnx_dir=ONNX_DIR, quantize=True, opset=14):
+    """SentenceTransformer의 transformer 부분만 ONNX로 export (pooling/정규화는 numpy에서 수행)"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize
+
+    os.makedirs(onnx_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+    # 토크나이저를 그대로 저장해서 토큰화 결과를 동일하게 유지
+    st_model.tokenizer.save_pretrained(onnx_dir)
+    dummy = st_model.tokenizer(["onnx export"], return_tensors="pt")
+
+    fp32_path = os.path.join(onnx_dir, ONNX_FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(transformer),
+            (dummy["input_ids"], dummy["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "seq"},
+                "attention_mask": {0: "batch", 1: "seq"},
+                "last_hidden_state": {0: "batch", 1: "seq"}
+            },
+            opset_version=opset,
+            dynamo=False  # TorchScript 기반 exporter (dynamic_axes 지원)
+        )
+    print(f"✅ ONNX export 완료: {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, os.path.join(onnx_dir, ONNX_INT8_FILE), weight_type=QuantType.QInt8)
+        print(f"✅ 동적 int8 양자화 완료: {ONNX_INT8_FILE}")
+
+    meta = {
+        "model_name": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "dim": st_model.get_sentence_embedding_dimension(),
+        "normalize": any(isinstance(m, Normalize) for m in st_model)
+    }
+    with open(os.path.join(onnx_dir, ONNX_META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+# ========== ONNX Runtime ==========
+class OnnxEncoder:
+    def __init__(self, model_name=MODEL_NAME, onnx_dir=ONNX_DIR, quantized=True, num_threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_file = ONNX_INT8_FILE if quantized else ONNX_FP32_FILE
+        model_path = os.path.join(onnx_dir, model_file)
+        if not os.path.exists(model_path):
+            export_onnx(model_name, onnx_dir, quantize=quantized)
+
+        with open(os.path.join(onnx_dir, ONNX_META_FILE), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            opts.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, sess_options=opts, providers=["CPUExecutionProvider"])
+
+    def get_sentence_embedding_dimension(self):
+        return self.meta["dim"]
+
+    def _encode_batch(self, texts):
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.meta["max_seq_length"],
+            return_tensors="np"
+        )
+        mask = tokens["attention_mask"].astype(np.int64)
+        hidden = self.session.run(None, {
+            "input_ids": tokens["input_ids"].astype(np.int64),
+            "attention_mask": mask
+        })[0]
+
+        # mean pooling (SentenceTransformer Pooling과 동일)
+        m = mask[:, :, None].astype(np.float32)
+        emb = (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+        if self.meta["normalize"]:
+            emb /= np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+        return emb.astype(np.float32)
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.meta["dim"]), dtype=np.float32)
+
+        # 길이순 정렬 후 배치 → 패딩 최소화 (SentenceTransformer와 같은 방식)
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        out = np.empty((len(texts), self.meta["dim"]), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+
+        return out[0] if single else out
+
+
+# ========== 백엔드 선택 ==========
+def get_encoder(backend="torch", **kwargs):
+    """backend: "torch" | "onnx" | "onnx_fp32" | "server" | "auto" """
+    if backend in ("server", "auto"):
+        from embedding_client import EmbeddingClient
+        client = EmbeddingClient(**kwargs)
+        try:
+            client.get_sentence_embedding_dimension()
+            return client
+        except OSError:
+            if backend == "server":
+                raise
+            print(f"⚠️ 임베딩 서버({client.address})에 연결할 수 없어 로컬 모델을 로드합니다.")
+            return TorchEncoder()
+    if backend == "torch":
+        return TorchEncoder(**kwargs)
+    if backend == "onnx":
+        return OnnxEncoder(quantized=True, **kwargs)
+    if backend == "onnx_fp32":
+        return OnnxEncoder(quantized=False, **kwargs)
+    raise ValueError(f"지원하지 않는 인코더 백엔드: {backend}")
@@ -0,0 +1,209 @@
+"""
+추천 오프라인 평가 + 벤치마크 (1000_user_info.csv × 로컬 검색)
+
+품질 지표 (정답 라벨이 없어 키워드 기반 대리 지표 — 유저 키워드는 모두 장소 like/dislike 키워드 어휘 안에 있음):
+    like_hit      : 추천 장소 중 like 키워드가 유저 like 키워드와 하나 이상 겹치는 비율
+    dislike_leak  : 추천 장소 중 dislike 키워드가 유저 dislike 키워드와 하나 이상 겹치는 비율 (낮을수록 좋음)
+    coverage      : 카테고리별 (한 번이라도 추천된 장소 수 / 전체 장소 수) 평균
+    diversity     : 카테고리별 상위 DIVERSITY_AT 개의 like 벡터 평균 쌍별 (1 - 코사인) — 클수록 다양
+시간 지표 (유저당 ms): encode / retrieve / rerank / enrich (리뷰수 + 최종 점수 + MMR + 축제) / e2e
+FESTIVALS=True 면 유저 여행 기간의 축제도 섞음 — 축제 항목(음수 id)은 품질 지표 계산에서 제외.
+
+SWEEP 의 파라미터 조합마다 같은 유저 벡터로 평가 (인코딩은 한 번만). 조합들은 WORKERS 개 프로세스에서 병렬 실행.
+성능 변경을 넣을 때 BASE_PARAMS 한 줄 결과를 전후로 비교해 품질이 유지되는지 확인하는 용도.
+시간 지표는 워커끼리 CPU를 나눠 쓰므로, 지연시간을 비교할 때는 WORKERS=1 (코어 수 이하) 로 실행.
+"""
+import os
+import ast
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from embedding_store import load_embedding_store
+from encoder_backend import get_encoder
+from place_metadata import CATEGORY_FILES, load_place_metadata
+from retrieval import build_retriever
+from recommender import Recommender, CATEGORY_TRANSLATE, CATEGORY_KOREAN
+from diversity import MMRReranker
+from festival_index import load_festival_index
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "USER_FILE": r"C:\Users\changjin\workspace\lab\pln\data_set\1000_user_info.csv",
+    "DATA_DIR": r"C:\Users\changjin\workspace\lab\pln\data_set\null_X",
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "OUTPUT_PATH": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\eval_results.csv",
+    "ENCODER_BACKEND": "auto",
+    "RETRIEVER": "exact",   # "exact" | "hnsw"
+    "PENALTY_MODE": "blob",
+    "FESTIVALS": False,
+    "FESTIVAL_PARAMS": {"weight": 0.9, "radius_km": None, "decay_km": 5.0},
+    "MAX_USERS": None,   # None이면 전체
+    "DIVERSITY_AT": 10,
+    "BASE_PARAMS": {"TOP_K": 30, "ALPHA": 1.0, "BETA": 0.5, "DISLIKE_THRESHOLD": 0.75, "GAMMA": 0.3, "MMR_LAMBDA": None},
+    # 파라미터 → 후보 값 (BASE_PARAMS 위에 덮어쓴 모든 조합을 평가)
+    "SWEEP": {"BETA": [0.0, 0.5, 1.0], "DISLIKE_THRESHOLD": [0.6, 0.75, 0.9], "GAMMA": [0.0, 0.3]},
+    "WORKERS": 4
+}
+
+
+# ========== 입력 ==========
+def load_users(user_file, max_users=None):
+    df = pd.read_csv(user_file)
+    if max_users is not None:
+        df = df.head(max_users)
+    likes = [ast.literal_eval(x) for x in df["like_keywords"]]
+    dislikes = [ast.literal_eval(x) for x in df["dislike_keywords"]]
+    trips = list(zip(df["start_date"], df["duration_days"]))
+    return df["user_id"].tolist(), likes, dislikes, trips
+
+
+def encode_users(model, likes, dislikes):
+    """반환: (like 벡터 리스트, dislike 벡터 리스트의 리스트, 유저당 인코딩 ms)"""
+    t0 = time.perf_counter()
+    like_vecs, dislike_vecs = [], []
+    for like_keywords, dislike_keywords in zip(likes, dislikes):
+        like_vecs.append(np.asarray(model.encode(" ".join(like_keywords), convert_to_numpy=True), dtype=np.float32))
+        dislike_vecs.append(list(model.encode(dislike_keywords, convert_to_numpy=True)) if dislike_keywords else [])
+    return like_vecs, dislike_vecs, (time.perf_counter() - t0) * 1e3 / max(len(likes), 1)
+
+
+def load_place_keywords(data_dir):
+    """(카테고리, id) → (like 키워드 set, dislike 키워드 set) — 소문자"""
+    def split(x):
+        return frozenset(k.strip().lower() for k in str(x).split(";") if k.strip()) if pd.notna(x) else frozenset()
+
+    keywords = {}
+    for cat, fname in CATEGORY_FILES.items():
+        df = pd.read_csv(os.path.join(data_dir, fname))
+        for pid, like, dislike in zip(df["id"], df.get("like", [None] * len(df)), df.get("dislike", [None] * len(df))):
+            keywords[(CATEGORY_TRANSLATE[cat], int(pid))] = (split(like), split(dislike))
+    return keywords
+
+
+# ========== 워커 (파라미터 조합 1개 평가) ==========
+_STATE = {}
+
+
+def _init_worker(config, like_vecs, dislike_vecs, likes, dislikes, trips):
+    store = load_embedding_store(config["STORE_DIR"])
+    metadata = load_place_metadata(config["DATA_DIR"])
+    _STATE.update(
+        config=config, store=store, metadata=metadata,
+        retriever=build_retriever(config["RETRIEVER"], store=store),
+        keywords=load_place_keywords(config["DATA_DIR"]),
+        festivals=load_festival_index(config["DATA_DIR"]) if config["FESTIVALS"] else None, trips=trips,
+        like_vecs=like_vecs, dislike_vecs=dislike_vecs,
+        likes=[{k.lower() for k in x} for x in likes], dislikes=[{k.lower() for k in x} for x in dislikes],
+        n_places={CATEGORY_TRANSLATE[c]: len(store.category_rows(c)) for c in CATEGORY_FILES}
+    )
+
+
+def recommend_timed(recommender, like_vec, dislike_vecs, params, trip=None):
+    """Recommender.recommend 와 같은 흐름을 단계별 시간과 함께 (반환: 결과, {retrieve, rerank, enrich} ms)"""
+    t_retrieve = t_rerank = 0.0
+    results_by_cat = {}
+    for cat in CATEGORY_FILES:
+        t0 = time.perf_counter()
+        hits, dislike_sims = recommender.fetch_candidates(like_vec, dislike_vecs, cat, top_k=params["TOP_K"],
+                                                          dislike_threshold=params["DISLIKE_THRESHOLD"])
+        t1 = time.perf_counter()
+        results_by_cat[cat] = recommender.rerank_hits(hits, dislike_vecs, top_k=params["TOP_K"], alpha=params["ALPHA"],
+                                                      beta=params["BETA"], dislike_threshold=params["DISLIKE_THRESHOLD"],
+                                                      dislike_sims=dislike_sims)
+        t2 = time.perf_counter()
+        t_retrieve += t1 - t0
+        t_rerank += t2 - t1
+
+    t0 = time.perf_counter()
+    results = recommender.diversify(recommender.attach_review_scores_and_final(results_by_cat, gamma=params["GAMMA"]))
+    results = recommender.blend_festivals(results, trip)
+    t_enrich = time.perf_counter() - t0
+    return results, {"retrieve": t_retrieve * 1e3, "rerank": t_rerank * 1e3, "enrich": t_enrich * 1e3}
+
+
+def intra_list_diversity(store, rows):
+    rows = rows[rows >= 0]
+    if len(rows) < 2:
+        return np.nan
+    emb = np.asarray(store.like[rows], dtype=np.float32)
+    emb /= np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+    sims = emb @ emb.T
+    n = len(rows)
+    return 1.0 - (sims.sum() - np.trace(sims)) / (n * (n - 1))
+
+
+def evaluate(params):
+    s = _STATE
+    store, keywords, cfg = s["store"], s["keywords"], s["config"]
+    diversifier = None
+    if params.get("MMR_LAMBDA") is not None:
+        diversifier = MMRReranker(store, s["metadata"], lambda_=params["MMR_LAMBDA"])
+    recommender = Recommender(s["retriever"], store=store, metadata=s["metadata"],
+                              penalty_mode=cfg["PENALTY_MODE"], diversifier=diversifier,
+                              festival_index=s["festivals"], festival_params=cfg["FESTIVAL_PARAMS"])
+
+    hits = leaks = total = 0
+    seen = {cat: set() for cat in s["n_places"]}
+    diversity, timings = [], {"retrieve": [], "rerank": [], "enrich": [], "e2e": []}
+    for u, (like_vec, dislike_vecs) in enumerate(zip(s["like_vecs"], s["dislike_vecs"])):
+        t0 = time.perf_counter()
+        results, t = recommend_timed(recommender, like_vec, dislike_vecs, params, s["trips"][u])
+        t["e2e"] = (time.perf_counter() - t0) * 1e3
+        for name, value in t.items():
+            timings[name].append(value)
+
+        for cat_en, items in results.items():
+            pids = [item["id"] for item in items if not item.get("festival")]   # 축제 제외
+            seen[cat_en].update(pids)
+            for pid in pids:
+                place_like, place_dislike = keywords.get((cat_en, pid), (frozenset(), frozenset()))
+                hits += bool(place_like & s["likes"][u])
+                leaks += bool(place_dislike & s["dislikes"][u])
+            total += len(pids)
+            diversity.append(intra_list_diversity(store, store.rows(pids[:cfg["DIVERSITY_AT"]], CATEGORY_KOREAN[cat_en])))
+
+    report = dict(params)
+    report.update({
+        "like_hit": hits / max(total, 1),
+        "dislike_leak": leaks / max(total, 1),
+        "coverage": float(np.mean([len(seen[c]) / max(n, 1) for c, n in s["n_places"].items()])),
+        "diversity": float(np.nanmean(diversity)) if diversity else np.nan,
+        "items_per_user": total / max(len(s["like_vecs"]), 1)
+    })
+    for name, values in timings.items():
+        report[f"{name}_p50_ms"] = float(np.percentile(values, 50))
+        report[f"{name}_p95_ms"] = float(np.percentile(values, 95))
+    return report
+
+
+def sweep_params(base, sweep):
+    names = list(sweep)
+    return [dict(base, **dict(zip(names, values))) for values in itertools.product(*(sweep[n] for n in names))]
+
+
+if __name__ == "__main__":
+    t_start = time.perf_counter()
+    user_ids, likes, dislikes, trips = load_users(CONFIG["USER_FILE"], CONFIG["MAX_USERS"])
+    model = get_encoder(CONFIG["ENCODER_BACKEND"])
+    like_vecs, dislike_vecs, encode_ms = encode_users(model, likes, dislikes)
+    print(f"👥 유저 {len(user_ids)}명 인코딩 완료 (유저당 {encode_ms:.2f} ms)")
+
+    grid = sweep_params(CONFIG["BASE_PARAMS"], CONFIG["SWEEP"])
+    print(f"🔧 파라미터 조합 {len(grid)}개, 워커 {CONFIG['WORKERS']}개")
+    with ProcessPoolExecutor(max_workers=CONFIG["WORKERS"], initializer=_init_worker,
+                             initargs=(CONFIG, like_vecs, dislike_vecs, likes, dislikes, trips)) as pool:
+        reports = list(pool.map(evaluate, grid))
+
+    df = pd.DataFrame(reports)
+    df["encode_ms"] = encode_ms
+    df.to_csv(CONFIG["OUTPUT_PATH"], index=False, encoding="utf-8-sig")
+
+    cols = [*CONFIG["SWEEP"], "like_hit", "dislike_leak", "coverage", "diversity", "e2e_p50_ms", "e2e_p95_ms"]
+    with pd.option_context("display.width", 200, "display.float_format", "{:.4f}".format):
+        print(df[cols].sort_values("like_hit", ascending=False).to_string(index=False))
+    print(f"⏱️ 전체 {time.perf_counter() - t_start:.1f}s")
+    print(f"✅ 저장 완료 → {CONFIG['OUTPUT_PATH']}")
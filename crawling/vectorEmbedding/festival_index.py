@@ -0,0 +1,208 @@
+"""
+축제 기간 인덱스 (festivals_fixed.csv)
+
+start_date / end_date 는 연도 없는 "MM/DD" → 윤년 기준 day-of-year (1/1 = 0, 12/31 = 365) 로 변환.
+연말을 넘기는 축제 (예: 12/20 ~ 1/10) 는 [시작, 365] + [0, 종료] 두 구간으로 나눠 저장.
+구간들은 중심(center) 기준 interval tree 에 넣어 겹침 질의를 O(log n + k) 로 처리.
+
+    festivals = load_festival_index(data_dir)
+    rows = festivals.active("2025-12-30", 5)                       # 여행 기간과 겹치는 축제 행 번호
+    rows = festivals.active("2025-08-16", 3, lat, lng, radius_km=10)  # + 위치 반경
+    results = festivals.blend(results, rows)                        # Attraction 후보에 섞기
+    results = festivals.blend_trip(results, "2025-08-16", 3, metadata)  # 1순위 숙소 기준 조회 + 섞기
+
+축제는 임베딩 저장소에 없는 항목이라 결과에서는 음수 id (-(행 번호 + 1)) 로 구분 (항목 형식은 다른 장소와 같은
+{id, category, final_score}). 상세 정보는 festivals.festival(id).
+"""
+import os
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+
+from geo_index import haversine_km
+
+
+FESTIVAL_FILE = "festivals_fixed.csv"
+
+# 윤년 기준 월별 시작 day-of-year (2/29 도 표현 가능하도록)
+_MONTH_START = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+DAYS_IN_YEAR = 366
+
+
+def day_of_year(month, day):
+    return int(_MONTH_START[int(month) - 1]) + int(day) - 1
+
+
+def parse_month_day(text):
+    """"MM/DD" → day-of-year (윤년 기준)"""
+    month, day = str(text).strip().split("/")
+    return day_of_year(month, day)
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def trip_intervals(start_date, duration_days):
+    """여행 기간 → day-of-year 구간 리스트 (연말을 넘기면 2개, 1년 이상이면 전체)"""
+    start = _to_date(start_date)
+    end = start + timedelta(days=max(int(duration_days), 1) - 1)
+    if (end - start).days >= DAYS_IN_YEAR - 1:
+        return [(0, DAYS_IN_YEAR - 1)]
+    a, b = day_of_year(start.month, start.day), day_of_year(end.month, end.day)
+    return [(a, b)] if a <= b else [(a, DAYS_IN_YEAR - 1), (0, b)]
+
+
+class _Node:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+
+class IntervalTree:
+    """
+    정적 centered interval tree. starts, ends: (m,) 닫힌 구간, labels: (m,) 구간별 반환 값
+    노드마다 중심을 지나는 구간을 시작 오름차순 / 끝 내림차순 두 배열로 보관 →
+    질의가 중심 한쪽에 있으면 정렬 배열 앞부분만 훑고 (보고할 것만) 한쪽 자식으로 내려감.
+    """
+
+    def __init__(self, starts, ends, labels):
+        starts, ends, labels = (np.asarray(x) for x in (starts, ends, labels))
+        self.root = self._build(np.arange(len(starts)), starts, ends, labels)
+
+    def _build(self, idx, starts, ends, labels):
+        if len(idx) == 0:
+            return None
+        points = np.sort(np.concatenate([starts[idx], ends[idx]]))
+        center = points[len(points) // 2]
+        here = idx[(starts[idx] <= center) & (ends[idx] >= center)]
+
+        node = _Node()
+        node.center = center
+        order = np.argsort(starts[here], kind="stable")
+        node.by_start = (starts[here][order], labels[here][order])
+        order = np.argsort(-ends[here], kind="stable")
+        node.by_end = (-ends[here][order], labels[here][order])   # -끝 오름차순 (searchsorted용)
+        node.left = self._build(idx[ends[idx] < center], starts, ends, labels)
+        node.right = self._build(idx[starts[idx] > center], starts, ends, labels)
+        return node
+
+    def overlap(self, a, b):
+        """[a, b] 와 겹치는 구간의 label 리스트"""
+        out = []
+        node = self.root
+        stack = [node] if node is not None else []
+        while stack:
+            node = stack.pop()
+            if b < node.center:
+                # 노드 구간은 모두 center 이상에서 끝남 → 시작이 b 이하인 것만
+                values, labels = node.by_start
+                out.extend(labels[:np.searchsorted(values, b, side="right")].tolist())
+                if node.left is not None:
+                    stack.append(node.left)
+            elif a > node.center:
+                # 노드 구간은 모두 center 이하에서 시작 → 끝이 a 이상인 것만
+                neg_ends, labels = node.by_end
+                out.extend(labels[:np.searchsorted(neg_ends, -a, side="right")].tolist())
+                if node.right is not None:
+                    stack.append(node.right)
+            else:
+                out.extend(node.by_start[1].tolist())
+                stack.extend(child for child in (node.left, node.right) if child is not None)
+        return out
+
+
+class FestivalIndex:
+    def __init__(self, df):
+        df = df.reset_index(drop=True)
+        self.titles = df["festival_title"].astype(str).tolist()
+        self.start_dates = df["start_date"].astype(str).tolist()
+        self.end_dates = df["end_date"].astype(str).tolist()
+        self.sub_categories = df["sub_category"].fillna("").astype(str).tolist()
+        self.addresses = df["address"].fillna("").astype(str).tolist()
+        self.lat = pd.to_numeric(df["latitude"], errors="coerce").to_numpy(dtype=np.float64)
+        self.lng = pd.to_numeric(df["longitude"], errors="coerce").to_numpy(dtype=np.float64)
+
+        starts, ends, labels = [], [], []
+        for i, (s, e) in enumerate(zip(self.start_dates, self.end_dates)):
+            a, b = parse_month_day(s), parse_month_day(e)
+            if a <= b:
+                starts += [a]
+                ends += [b]
+                labels += [i]
+            else:   # 연말을 넘기는 축제
+                starts += [a, 0]
+                ends += [DAYS_IN_YEAR - 1, b]
+                labels += [i, i]
+        self.tree = IntervalTree(starts, ends, labels)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def active(self, start_date, duration_days, lat=None, lng=None, radius_km=None):
+        """여행 기간과 겹치는 축제 행 번호 (오름차순). lat/lng + radius_km 지정 시 반경 안만."""
+        rows = set()
+        for a, b in trip_intervals(start_date, duration_days):
+            rows.update(self.tree.overlap(a, b))
+        rows = np.array(sorted(rows), dtype=np.int64)
+        if radius_km is not None and lat is not None and len(rows):
+            dist = haversine_km(lat, lng, self.lat[rows], self.lng[rows])
+            rows = rows[dist <= radius_km]
+        return rows
+
+    @staticmethod
+    def festival_id(row):
+        return -(int(row) + 1)
+
+    def festival(self, festival_id):
+        """음수 id → 축제 정보 dict"""
+        i = -int(festival_id) - 1
+        return {"title": self.titles[i], "start_date": self.start_dates[i], "end_date": self.end_dates[i],
+                "sub_category": self.sub_categories[i], "address": self.addresses[i],
+                "latitude": float(self.lat[i]), "longitude": float(self.lng[i])}
+
+    def blend(self, results_by_cat, rows, category="Attraction", weight=1.0, lat=None, lng=None, decay_km=None,
+              top_k=None):
+        """
+        results_by_cat: {영문 카테고리: [{id, category, final_score}, ...]} 에 축제를 섞어 점수 순으로 재정렬.
+        축제 항목은 {id(음수), category, final_score, "festival": True}.
+        축제 점수 = weight * (해당 카테고리 최고 점수) [* exp(-거리 / decay_km)] — 임베딩이 없어
+        기존 후보와 같은 스케일에 맞추고, 앵커(숙소)에서 멀수록 낮춤.
+        top_k: 섞은 뒤 자를 개수 (None이면 기존 목록 길이 — 축제가 장소를 밀어내며 길이 유지, 목록이 비었으면 전부)
+        """
+        if len(rows) == 0:
+            return results_by_cat
+        items = list(results_by_cat.get(category, []))
+        top_k = top_k if top_k is not None else (len(items) or len(rows))
+        top = max((item["final_score"] for item in items), default=1.0)
+        scores = np.full(len(rows), weight * top)
+        if decay_km is not None and lat is not None:
+            dist = np.nan_to_num(haversine_km(lat, lng, self.lat[rows], self.lng[rows]), nan=np.inf)
+            scores *= np.exp(-dist / decay_km)
+
+        items += [
+            {"id": self.festival_id(r), "category": category, "final_score": float(s), "festival": True}
+            for r, s in zip(rows.tolist(), scores.tolist())
+        ]
+        out = dict(results_by_cat)
+        out[category] = sorted(items, key=lambda x: x["final_score"], reverse=True)[:top_k]
+        return out
+
+    def blend_trip(self, results_by_cat, start_date, duration_days, metadata=None, category="Attraction",
+                   weight=1.0, radius_km=None, decay_km=None, top_k=None):
+        """여행 기간과 겹치는 축제를 찾아 blend — 1순위 숙소 좌표 (metadata) 를 반경 / 거리 감쇠 기준으로 사용"""
+        lat = lng = None
+        acc = results_by_cat.get("Accommodation")
+        if acc and metadata is not None:
+            r = metadata.rows([acc[0]["id"]], "Accommodation")[0]
+            if r >= 0 and np.isfinite(metadata.lat[r]):
+                lat, lng = metadata.lat[r], metadata.lng[r]
+        rows = self.active(start_date, duration_days, lat, lng, radius_km=radius_km)
+        return self.blend(results_by_cat, rows, category=category, weight=weight, lat=lat, lng=lng, decay_km=decay_km,
+                          top_k=top_k)
+
+
+def load_festival_index(data_dir):
+    return FestivalIndex(pd.read_csv(os.path.join(data_dir, FESTIVAL_FILE)))
@@ -0,0 +1,97 @@
+"""
+장소 좌표 공간 인덱스 (KD-tree)
+
+위경도를 단위구 위 3차원 좌표로 바꿔 scipy cKDTree에 저장 → 직선(chord) 거리가 대원 거리와 단조 관계라
+반경 / k-최근접 질의를 정확하게 처리. 카테고리별 트리를 따로 두어 카테고리 제한 질의도 해당 카테고리만 탐색.
+
+    geo = build_geo_index(store, metadata)          # 임베딩 저장소 행 순서에 맞춤
+    rows, dist_km = geo.within(lat, lng, 5, "카페")   # 반경 5km 카페 (가까운 순)
+    rows, dist_km = geo.nearest(lat, lng, 10)         # 전체 카테고리 중 가장 가까운 10곳
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _to_xyz(lat, lng):
+    lat, lng = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lng, dtype=np.float64))
+    return np.stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)], axis=-1)
+
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def _km_to_chord(km):
+    return 2 * np.sin(np.minimum(km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class GeoIndex:
+    """
+    lat, lng: (N,) 좌표 (NaN이면 인덱스에서 제외), categories: (N,) 카테고리
+    반환 행 번호는 입력 배열 기준.
+    """
+
+    def __init__(self, lat, lng, categories):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.categories = np.asarray(categories)
+        valid = np.isfinite(self.lat) & np.isfinite(self.lng)
+
+        self.trees = {}   # None(전체) / 카테고리 → (tree, 행 번호)
+        for cat in [None, *np.unique(self.categories[valid])]:
+            rows = np.flatnonzero(valid if cat is None else valid & (self.categories == cat))
+            self.trees[cat] = (cKDTree(_to_xyz(self.lat[rows], self.lng[rows])), rows)
+
+    def __len__(self):
+        return len(self.trees[None][1])
+
+    def _tree(self, category):
+        return self.trees.get(category, (None, np.empty(0, dtype=np.int64)))
+
+    def within(self, lat, lng, radius_km, category=None):
+        """반경 radius_km 안의 (행 번호, 거리 km) — 가까운 순"""
+        tree, rows = self._tree(category)
+        if tree is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        query = _to_xyz(lat, lng)
+        idx = np.asarray(tree.query_ball_point(query, _km_to_chord(radius_km)), dtype=np.int64)
+        if len(idx) == 0:
+            return idx, np.empty(0)
+        dist = _chord_to_km(np.linalg.norm(tree.data[idx] - query, axis=1))
+        order = np.argsort(dist, kind="stable")
+        return rows[idx[order]], dist[order]
+
+    def nearest(self, lat, lng, k, category=None):
+        """가장 가까운 k곳의 (행 번호, 거리 km)"""
+        tree, rows = self._tree(category)
+        k = min(k, len(rows))
+        if tree is None or k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        chord, idx = tree.query(_to_xyz(lat, lng), k=k)
+        return rows[np.atleast_1d(idx)], _chord_to_km(np.atleast_1d(chord))
+
+    def distance_km(self, lat, lng, rows):
+        """앵커에서 지정 행들까지의 거리 (좌표 없으면 NaN)"""
+        return haversine_km(lat, lng, self.lat[rows], self.lng[rows])
+
+
+def build_geo_index(store, metadata):
+    """임베딩 저장소 행 순서에 맞춘 GeoIndex (좌표는 PlaceMetadata에서)"""
+    lat = np.full(len(store), np.nan)
+    lng = np.full(len(store), np.nan)
+    for cat in np.unique(store.categories):
+        rows = store.unique_category_rows(cat)   # 반복된 (카테고리, id) 행은 좌표 없음 → 인덱스에서 제외
+        meta_rows = metadata.rows(store.ids[rows], cat)
+        found = meta_rows >= 0
+        lat[rows[found]] = metadata.lat[meta_rows[found]]
+        lng[rows[found]] = metadata.lng[meta_rows[found]]
+    return GeoIndex(lat, lng, store.categories)
@@ -0,0 +1,118 @@
+"""
+BM25 키워드 역색인 (장소 like 키워드 + description + sub_category)
+
+문서-단어 BM25 가중치를 미리 계산해 카테고리별 posting list (단어 → 문서, 가중치; 단어 기준 CSR) 로 보관.
+질의 점수 = 질의 단어 posting 들을 이어붙여 np.bincount 한 번 — 해당 카테고리 문서만 계산.
+
+    bm25 = build_bm25_index(store, data_dir)      # 임베딩 저장소 행 순서에 맞춤
+    rows, scores = bm25.search(["Fresh seafood", "Delicious food"], "음식점", limit=90)
+"""
+import os
+import re
+from collections import Counter
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from place_metadata import CATEGORY_FILES
+
+
+TOKEN_RE = re.compile(r"\w+")
+
+# 필드별 가중치 (단어 빈도에 곱함) — like 키워드가 유저 키워드와 같은 어휘라 가장 크게
+FIELD_WEIGHTS = {"like": 2.0, "description": 1.0, "sub_category": 1.0}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+class BM25Index:
+    """
+    documents: 행별 {필드: 텍스트}, categories: (N,) 카테고리
+    반환 행 번호는 documents 순서 기준.
+    """
+
+    def __init__(self, documents, categories, k1=1.2, b=0.75, field_weights=None):
+        field_weights = field_weights or FIELD_WEIGHTS
+        self.categories = np.asarray(categories)
+        self.vocab = {}
+
+        indptr, indices, tfs = [0], [], []
+        for doc in documents:
+            counts = Counter()
+            for field, text in doc.items():
+                for tok in tokenize(text):
+                    counts[tok] += field_weights.get(field, 1.0)
+            for tok, tf in counts.items():
+                indices.append(self.vocab.setdefault(tok, len(self.vocab)))
+                tfs.append(tf)
+            indptr.append(len(indices))
+
+        tf = sparse.csr_matrix((np.asarray(tfs, dtype=np.float32), indices, indptr),
+                               shape=(len(documents), len(self.vocab)))
+        doc_len = np.asarray(tf.sum(axis=1)).ravel()
+        avg_len = doc_len.mean() if len(doc_len) and doc_len.mean() > 0 else 1.0
+
+        df = np.bincount(tf.indices, minlength=len(self.vocab))
+        idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        # BM25: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg_len))
+        norm = (k1 * (1 - b + b * doc_len / avg_len)).astype(np.float32)
+        row_of = np.repeat(np.arange(len(documents)), np.diff(tf.indptr))
+        data = tf.data * (k1 + 1) / (tf.data + norm[row_of]) * idf[tf.indices]
+        weights = sparse.csr_matrix((data, tf.indices, tf.indptr), shape=tf.shape)
+
+        self.cat_rows = {cat: np.flatnonzero(self.categories == cat) for cat in np.unique(self.categories)}
+        # 카테고리별 (단어 × 문서) CSR = 단어별 posting list
+        self.postings = {cat: weights[rows].T.tocsr() for cat, rows in self.cat_rows.items()}
+
+    def query_terms(self, keywords):
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        terms = {self.vocab[tok] for kw in keywords for tok in tokenize(kw) if tok in self.vocab}
+        return np.fromiter(terms, dtype=np.int64)
+
+    def scores(self, keywords, category):
+        """카테고리 전체 문서 점수 (cat_rows[category] 순서)"""
+        n_docs = len(self.cat_rows[category])
+        terms = self.query_terms(keywords)
+        if len(terms) == 0:
+            return np.zeros(n_docs, dtype=np.float32)
+
+        post = self.postings[category]
+        starts, ends = post.indptr[terms], post.indptr[terms + 1]
+        idx = np.concatenate([np.arange(a, b) for a, b in zip(starts, ends)])
+        return np.bincount(post.indices[idx], weights=post.data[idx], minlength=n_docs).astype(np.float32)
+
+    def search(self, keywords, category, limit, offset=0, allowed=None):
+        """(행 번호, BM25 점수) — 점수 내림차순, 점수 0(단어 불일치)은 제외. allowed: (N,) bool 속성 필터"""
+        rows = self.cat_rows.get(category)
+        if rows is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = self.scores(keywords, category)
+        matched = scores > 0
+        if allowed is not None:
+            matched &= allowed[rows]
+        matched = np.flatnonzero(matched)
+        k = min(offset + limit, len(matched))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]] if k < len(matched) else matched
+        top = top[np.argsort(-scores[top], kind="stable")][offset:]
+        return rows[top], scores[top]
+
+
+def build_bm25_index(store, data_dir, **kwargs):
+    """임베딩 저장소 행 순서에 맞춘 BM25Index (텍스트는 카테고리 CSV에서)"""
+    documents = [{} for _ in range(len(store))]
+    for cat, fname in CATEGORY_FILES.items():
+        df = pd.read_csv(os.path.join(data_dir, fname))
+        text = {
+            pid: {field: "" if pd.isna(row.get(field)) else row.get(field) for field in FIELD_WEIGHTS}
+            for pid, row in zip(df["id"], df.to_dict(orient="records"))
+        }
+        for r in store.unique_category_rows(cat):   # 반복된 (카테고리, id) 행은 빈 문서 → 검색 안 됨
+            documents[r] = text.get(int(store.ids[r]), {})
+    return BM25Index(documents, store.categories, **kwargs)
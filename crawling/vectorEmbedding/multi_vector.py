@@ -0,0 +1,79 @@
+"""
+장소별 키워드 멀티벡터 (ragged 배열)
+
+장소 i의 키워드 벡터 = matrix[offsets[i]:offsets[i+1]]
+    offsets: (N+1,) int64, matrix: (K, D) float32 (행 단위 L2 정규화)
+
+dislike 패널티 = max_{유저 키워드 u, 장소 키워드 p} cos(u, p)
+후보 전체에 대해 (U, T) 행렬곱 한 번 + 구간별 max(reduceat)로 계산.
+"""
+import numpy as np
+
+from embedding_store import normalize_rows
+
+
+# ========== 패킹 ==========
+def pack_keywords(keyword_lists, encode_fn):
+    """
+    keyword_lists: 장소별 키워드 리스트 [[kw, ...], ...]
+    encode_fn: list[str] → (M, D) 배열 (중복 제거된 키워드만 한 번 인코딩)
+    반환: (offsets (N+1,), matrix (K, D))
+    """
+    lengths = np.array([len(kws) for kws in keyword_lists], dtype=np.int64)
+    offsets = np.zeros(len(keyword_lists) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    flat = [kw for kws in keyword_lists for kw in kws]
+    if not flat:
+        return offsets, np.zeros((0, 0), dtype=np.float32)
+
+    unique = sorted(set(flat))
+    unique_idx = {kw: i for i, kw in enumerate(unique)}
+    unique_vecs = normalize_rows(encode_fn(unique))
+
+    matrix = unique_vecs[[unique_idx[kw] for kw in flat]]
+    return offsets, np.ascontiguousarray(matrix, dtype=np.float32)
+
+
+# ========== 조회 ==========
+def gather_segments(offsets, rows):
+    """
+    rows의 구간을 이어붙인 인덱스와 구간별 시작 위치
+    반환: (flat_idx (T,), seg_starts (len(rows),), lengths (len(rows),))
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+
+    seg_starts = np.zeros(len(rows), dtype=np.int64)
+    if len(rows) > 1:
+        np.cumsum(lengths[:-1], out=seg_starts[1:])
+
+    total = int(lengths.sum())
+    # 구간 [starts[i], starts[i]+lengths[i]) 을 한 번에 펼침
+    flat_idx = np.arange(total, dtype=np.int64) - np.repeat(seg_starts - starts, lengths)
+    return flat_idx, seg_starts, lengths
+
+
+def ragged_max_sim(user_vecs, offsets, matrix, rows):
+    """
+    user_vecs: (U, D) 유저 키워드 벡터, rows: 후보 장소 행 번호
+    반환: (len(rows),) 후보별 최대 코사인 유사도 (키워드 없는 장소 / 유저는 0)
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    out = np.zeros(len(rows), dtype=np.float32)
+    user_vecs = np.asarray(user_vecs, dtype=np.float32)
+    if len(rows) == 0 or user_vecs.size == 0:
+        return out
+
+    flat_idx, seg_starts, lengths = gather_segments(offsets, rows)
+    if len(flat_idx) == 0:
+        return out
+
+    # (U, T) 행렬곱 한 번
+    sims = normalize_rows(user_vecs.reshape(-1, matrix.shape[1])) @ matrix[flat_idx].T
+    best = sims.max(axis=0)
+
+    nonempty = lengths > 0
+    out[nonempty] = np.maximum.reduceat(best, seg_starts[nonempty])
+    return out
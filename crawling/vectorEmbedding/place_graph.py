@@ -0,0 +1,150 @@
+"""
+장소 → 장소 kNN 유사도 그래프 ("이 장소와 비슷한 곳")
+
+같은 카테고리 안에서 like 임베딩 코사인 기준 상위 k개 이웃을 미리 계산해 CSR 배열로 저장:
+    knn_indptr.npy   (N+1,)  int64    행 i의 이웃 = indices[indptr[i]:indptr[i+1]] (유사도 내림차순)
+    knn_indices.npy  (E,)    int32    이웃 행 번호 (임베딩 저장소 행 순서)
+    knn_scores.npy   (E,)    float16  코사인 유사도
+like 벡터가 없는 장소는 이웃 0개. 같은 (카테고리, id)가 여러 행이면 첫 행 (EmbeddingStore.row) 만 그래프에 포함.
+
+계산은 (블록 행 × 카테고리 전체) 행렬곱 + argpartition 을 블록 단위로 스레드 풀에 나눠 실행
+(numpy 행렬곱이 GIL을 놓으므로 코어 수만큼 병렬). 조회는 (카테고리, id) → 행 번호 dict + 슬라이스 한 번 (O(1)).
+
+    python place_graph.py                          # CONFIG["STORE_DIR"] 에 그래프 저장
+    graph = load_place_graph(store_dir, store)
+    graph.neighbors(place_id, "음식점", k=5)         # [(place_id, 유사도), ...]
+    graph.neighbors(place_id, "음식점", k=5, lat=..., lng=..., radius_km=2)  # 좌표 기준 반경 안만
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from embedding_store import load_embedding_store, normalize_rows
+from geo_index import haversine_km
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "K": 20,
+    "BLOCK": 512,   # 한 번에 점수를 계산할 장소 수 (블록 × 카테고리 크기 float32 메모리)
+    "WORKERS": os.cpu_count() or 1
+}
+
+GRAPH_FILES = ("knn_indptr.npy", "knn_indices.npy", "knn_scores.npy")
+
+
+def _block_topk(like_cat, ids_cat, start, stop, k):
+    """
+    카테고리 행렬의 [start, stop) 행 각각의 상위 k 이웃 — (이웃 위치 (b, k), 유사도 (b, k))
+    같은 place_id (자기 자신 포함) 는 -inf 로 제외 — 이웃이 k개보다 적으면 -inf 가 섞여 나오므로 호출 쪽에서 거름.
+    """
+    sims = like_cat[start:stop] @ like_cat.T
+    sims[ids_cat[start:stop, None] == ids_cat[None, :]] = -np.inf
+    k = min(k, like_cat.shape[0] - 1)
+    if k <= 0:
+        return np.empty((stop - start, 0), dtype=np.int64), np.empty((stop - start, 0), dtype=np.float32)
+    top = np.argpartition(-sims, k - 1, axis=1)[:, :k] if k < sims.shape[1] - 1 else np.argsort(-sims, axis=1)[:, :k]
+    top_sims = np.take_along_axis(sims, top, axis=1)
+    order = np.argsort(-top_sims, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_sims, order, axis=1)
+
+
+def build_knn_graph(store, k=20, block=512, workers=None):
+    """반환: (indptr, indices, scores) — 임베딩 저장소 행 순서"""
+    n = len(store)
+    neighbors = [None] * n
+    tasks = []
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        for cat in np.unique(store.categories):
+            # 데이터에 반복된 (카테고리, id) 행은 첫 행만 — 같은 장소가 이웃 목록에 두 번 나오지 않도록
+            rows = store.unique_category_rows(cat)
+            rows = rows[store.like_mask[rows]]   # 0벡터(like 없음)는 이웃 계산에서 제외
+            if len(rows) < 2:
+                continue
+            like_cat = normalize_rows(store.like[rows])
+            ids_cat = store.ids[rows]
+            for start in range(0, len(rows), block):
+                stop = min(start + block, len(rows))
+                tasks.append((rows, start, pool.submit(_block_topk, like_cat, ids_cat, start, stop, k)))
+
+        for rows, start, future in tasks:
+            top, top_sims = future.result()
+            for i, (nbr, sim) in enumerate(zip(top, top_sims)):
+                keep = np.isfinite(sim)
+                neighbors[rows[start + i]] = (rows[nbr[keep]], sim[keep])
+
+    counts = np.array([0 if nb is None else len(nb[0]) for nb in neighbors], dtype=np.int64)
+    indptr = np.concatenate([[0], np.cumsum(counts)])
+    filled = [nb for nb in neighbors if nb is not None and len(nb[0])]
+    indices = np.concatenate([nb[0] for nb in filled]).astype(np.int32) if filled else np.empty(0, dtype=np.int32)
+    scores = np.concatenate([nb[1] for nb in filled]).astype(np.float16) if filled else np.empty(0, dtype=np.float16)
+    return indptr, indices, scores
+
+
+def save_knn_graph(store_dir, indptr, indices, scores):
+    for fname, arr in zip(GRAPH_FILES, (indptr, indices, scores)):
+        np.save(os.path.join(store_dir, fname), arr)
+
+
+class PlaceGraph:
+    """
+    indptr / indices / scores: build_knn_graph 결과, store: EmbeddingStore (id ↔ 행 번호)
+    lat, lng: 저장소 행 순서 좌표 (geo_index.build_geo_index(store, metadata).lat / .lng) — 반경 조회용 (선택)
+    """
+
+    def __init__(self, indptr, indices, scores, store, lat=None, lng=None):
+        self.indptr = indptr
+        self.indices = indices
+        self.scores = scores
+        self.store = store
+        self.lat = lat
+        self.lng = lng
+
+    def row(self, place_id, category):
+        """(place_id, 카테고리) → 행 번호 (저장소의 (카테고리, id) dict 조회, 없으면 None)"""
+        return self.store.row(place_id, category)
+
+    def neighbor_rows(self, row, k=None):
+        """(이웃 행 번호, 유사도) — 유사도 내림차순"""
+        start, stop = self.indptr[row], self.indptr[row + 1]
+        if k is not None:
+            stop = min(stop, start + k)
+        return self.indices[start:stop], self.scores[start:stop]
+
+    def neighbors(self, place_id, category, k=10, lat=None, lng=None, radius_km=None):
+        """
+        같은 카테고리에서 비슷한 장소 [(place_id, 유사도), ...]
+        radius_km 지정 시 (lat, lng) (기본: 기준 장소 좌표) 반경 안 이웃만 — 저장된 이웃 범위 안에서 거름.
+        """
+        r = self.row(place_id, category)
+        if r is None:
+            return []
+        rows, sims = self.neighbor_rows(r, None if radius_km is not None else k)
+        if radius_km is not None:
+            if self.lat is None:
+                raise ValueError("반경 조회에는 좌표(lat, lng)가 필요합니다.")
+            if lat is None:
+                lat, lng = self.lat[r], self.lng[r]
+            keep = haversine_km(lat, lng, self.lat[rows], self.lng[rows]) <= radius_km
+            rows, sims = rows[keep][:k], sims[keep][:k]
+        return list(zip(self.store.ids[rows].tolist(), sims.astype(np.float32).tolist()))
+
+
+def load_place_graph(store_dir, store=None, lat=None, lng=None, mmap=True):
+    store = store if store is not None else load_embedding_store(store_dir)
+    arrays = [np.load(os.path.join(store_dir, fname), mmap_mode="r" if mmap else None) for fname in GRAPH_FILES]
+    return PlaceGraph(*arrays, store, lat=lat, lng=lng)
+
+
+if __name__ == "__main__":
+    store = load_embedding_store(CONFIG["STORE_DIR"])
+    t0 = time.perf_counter()
+    indptr, indices, scores = build_knn_graph(store, k=CONFIG["K"], block=CONFIG["BLOCK"], workers=CONFIG["WORKERS"])
+    elapsed = time.perf_counter() - t0
+    save_knn_graph(CONFIG["STORE_DIR"], indptr, indices, scores)
+
+    size_kb = (indptr.nbytes + indices.nbytes + scores.nbytes) / 1024
+    print(f"✅ kNN 그래프 저장 완료: 장소 {len(store)}개, 간선 {len(indices)}개, {size_kb:.1f} KB, "
+          f"{elapsed:.2f}s (k={CONFIG['K']}, workers={CONFIG['WORKERS']})")
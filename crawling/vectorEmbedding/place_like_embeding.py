@@ -1,19 +1,30 @@
 import pandas as pd
+import numpy as np
 import os
-from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
 import json
 import pickle
 
-# 모델 로드
-model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
+from embedding_store import save_embedding_store, save_keyword_vectors, store_disk_size, load_embedding_store
+from quantize import save_quantized
+from encoder_backend import get_encoder
+from multi_vector import pack_keywords
+
+# ========== CONFIG ==========
+CONFIG = {
+    "DATA_DIR": r"C:\Users\changjin\workspace\lab\pln\data_set\null_X",
+    "OUTPUT_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding",
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "BATCH_SIZE": 64,
+    "ENCODER_BACKEND": "auto",   # "auto" (서버 우선) | "server" | "torch" | "onnx" (int8) | "onnx_fp32"
+    "QUANT_KINDS": [],   # 저장 후 함께 만들 양자화 행렬: "int8" | "fp16" (기존 양자화 파일은 저장 시 지워짐)
+    "SAVE_LEGACY": False   # True면 기존 JSONL / Pickle도 함께 저장
+}
 
-# 경로 및 파일
-path = r"C:\Users\changjin\workspace\lab\pln\data_set\null_X"
 files = ["attractions_fixed.csv", "restaurants_fixed.csv", "accommodations_fixed.csv", "cafe_fixed.csv"]
 
-# 결과 저장
-embedding_results = []
+# 모델 로드
+model = get_encoder(CONFIG["ENCODER_BACKEND"])
+
 
 # --- 키워드 분리 함수 ---
 def split_keywords(keyword_str):
@@ -21,40 +32,92 @@ def split_keywords(keyword_str):
         return []
     return [kw.strip() for kw in keyword_str.split(";") if kw.strip()]
 
+
+# --- 키워드 문자열 목록 → (N, D) 행렬 + 유효 마스크 ---
+def encode_texts(texts):
+    """빈 문자열은 인코딩하지 않고 0벡터 + mask=False"""
+    mask = np.array([bool(t) for t in texts], dtype=bool)
+    dim = model.get_sentence_embedding_dimension()
+    mat = np.zeros((len(texts), dim), dtype=np.float32)
+
+    valid_idx = np.flatnonzero(mask)
+    if len(valid_idx):
+        mat[valid_idx] = model.encode(
+            [texts[i] for i in valid_idx],
+            batch_size=CONFIG["BATCH_SIZE"],
+            convert_to_numpy=True,
+            show_progress_bar=True
+        )
+    return mat, mask
+
+
 # --- 각 파일 처리 ---
-for fname in files:
-    df = pd.read_csv(os.path.join(path, fname))
+records = []
+like_texts = []
+dislike_texts = []
+keyword_lists = {"like": [], "dislike": []}
 
-    for _, row in tqdm(df.iterrows(), total=len(df), desc=f"Processing {fname}"):
-        item_id = row.get("id")
-        name = row.get("name", "")
-        category = row.get("category", "")
-        sub_category = row.get("sub_category", "")
+for fname in files:
+    df = pd.read_csv(os.path.join(CONFIG["DATA_DIR"], fname))
+    print(f"📄 {fname}: {len(df)} rows")
 
+    for _, row in df.iterrows():
+        records.append({
+            "id": row.get("id"),
+            "name": row.get("name", ""),
+            "category": row.get("category", ""),
+            "sub_category": "" if pd.isna(row.get("sub_category")) else row.get("sub_category")
+        })
         like_keywords = split_keywords(row.get("like", ""))
         dislike_keywords = split_keywords(row.get("dislike", ""))
+        keyword_lists["like"].append(like_keywords)
+        keyword_lists["dislike"].append(dislike_keywords)
+        like_texts.append(" ".join(like_keywords))
+        dislike_texts.append(" ".join(dislike_keywords))
+
+like_mat, like_mask = encode_texts(like_texts)
+dislike_mat, dislike_mask = encode_texts(dislike_texts)
 
-        like_emb = model.encode(" ".join(like_keywords), convert_to_numpy=True).tolist() if like_keywords else []
-        dislike_emb = model.encode(" ".join(dislike_keywords), convert_to_numpy=True).tolist() if dislike_keywords else []
+# --- 바이너리 저장소 저장 ---
+save_embedding_store(
+    CONFIG["STORE_DIR"],
+    records,
+    matrices={"like": like_mat, "dislike": dislike_mat},
+    masks={"like": like_mask, "dislike": dislike_mask}
+)
 
+# --- 키워드별 멀티벡터 (중복 키워드는 한 번만 인코딩) ---
+for vtype, lists in keyword_lists.items():
+    offsets, kw_matrix = pack_keywords(
+        lists,
+        lambda kws: model.encode(kws, batch_size=CONFIG["BATCH_SIZE"], convert_to_numpy=True, show_progress_bar=True)
+    )
+    save_keyword_vectors(CONFIG["STORE_DIR"], vtype, offsets, kw_matrix)
+    print(f"   {vtype} 키워드 벡터: {len(kw_matrix)}개")
+
+for kind in CONFIG["QUANT_KINDS"]:
+    save_quantized(load_embedding_store(CONFIG["STORE_DIR"]), kind)
+    print(f"   {kind} 양자화 저장")
+
+print(f"✅ 임베딩 저장소 저장 완료: {CONFIG['STORE_DIR']} ({store_disk_size(CONFIG['STORE_DIR']) / 1e6:.1f} MB)")
+
+# --- (선택) 기존 JSONL / Pickle 저장 ---
+if CONFIG["SAVE_LEGACY"]:
+    embedding_results = []
+    for i, rec in enumerate(records):
         embedding_results.append({
-            "id": item_id,
-            "name": name,
-            "category": category,
-            "sub_category": sub_category,
-            "like_embedding": like_emb,
-            "dislike_embedding": dislike_emb
+            **rec,
+            "like_embedding": like_mat[i].tolist() if like_mask[i] else [],
+            "dislike_embedding": dislike_mat[i].tolist() if dislike_mask[i] else []
         })
 
-# --- JSONL 저장 ---
-jsonl_path = os.path.join(r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding", "place_embeddings.jsonl")
-with open(jsonl_path, "w", encoding="utf-8") as f_jsonl:
-    for item in embedding_results:
-        f_jsonl.write(json.dumps(item, ensure_ascii=False) + "\n")
-print("✅ JSONL 저장 완료:", jsonl_path)
-
-# --- Pickle 저장 ---
-pkl_path = os.path.join(r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding", "place_embeddings.pkl")
-with open(pkl_path, "wb") as f_pkl:
-    pickle.dump(embedding_results, f_pkl)
-print("✅ Pickle 저장 완료:", pkl_path)
+    jsonl_path = os.path.join(CONFIG["OUTPUT_DIR"], "place_embeddings.jsonl")
+    with open(jsonl_path, "w", encoding="utf-8") as f_jsonl:
+        for item in embedding_results:
+            f_jsonl.write(json.dumps(item, ensure_ascii=False) + "\n")
+    print("✅ JSONL 저장 완료:", jsonl_path)
+
+    pkl_path = os.path.join(CONFIG["OUTPUT_DIR"], "place_embeddings.pkl")
+    with open(pkl_path, "wb") as f_pkl:
+        pickle.dump(embedding_results, f_pkl)
+    print("✅ Pickle 저장 완료:", pkl_path)
@@ -0,0 +1,100 @@
+"""
+장소 메타데이터 저장소 (한 번 로드해서 공유)
+
+카테고리 CSV 4개를 한 번만 읽어 numpy 배열로 보관:
+    review_counts : 리뷰수 (숙소는 review_count, 나머지는 all_review_count, 결측 → 0)
+    lat, lng      : 좌표 (숙소 CSV의 lat/lng 컬럼도 같은 이름으로 통일)
+    prices        : {컬럼명: (N,) float} — 해당 카테고리가 아니거나 결측이면 NaN
+    sub_categories, entrance_fees (관광지 입장료 원문), store_hours (영업시간 원문)
+
+id 조회는 카테고리별 정렬 id + searchsorted (카페/음식점 사이에 같은 id가 있어 카테고리 단위로 조회).
+유저별 리뷰 가중치 계산은 CSV 파싱 없이 배열 인덱싱만 수행.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+
+CATEGORY_FILES = {
+    "Accommodation": "accommodations_fixed.csv",
+    "카페": "cafe_fixed.csv",
+    "음식점": "restaurants_fixed.csv",
+    "관광지": "attractions_fixed.csv"
+}
+
+PRICE_COLUMNS = [
+    "min_price", "max_price", "avg_price",
+    *[f"{season}_{day}_price_{stat}"
+      for season in ("offpeak", "peak") for day in ("weekday", "weekend") for stat in ("max", "min", "avg")]
+]
+
+
+def review_column(category):
+    return "review_count" if category == "Accommodation" else "all_review_count"
+
+
+def _float_column(df, col):
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _text_column(df, col):
+    if col not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    return df[col].fillna("").astype(str).to_numpy()
+
+
+class PlaceMetadata:
+    def __init__(self, data_dir):
+        frames = []
+        for cat, fname in CATEGORY_FILES.items():
+            df = pd.read_csv(os.path.join(data_dir, fname))
+            df = df.rename(columns={"lat": "latitude", "lng": "longitude"})
+            df["category"] = cat
+            df["_review"] = _float_column(df, review_column(cat))
+            frames.append(df)
+        df = pd.concat(frames, ignore_index=True)
+
+        self.ids = df["id"].to_numpy(dtype=np.int64)
+        self.names = df["name"].astype(str).tolist()
+        self.categories = df["category"].to_numpy()
+        self.sub_categories = df["sub_category"].fillna("").astype(str).to_numpy()
+        self.review_counts = np.nan_to_num(df["_review"].to_numpy(dtype=np.float64))
+        self.lat = _float_column(df, "latitude")
+        self.lng = _float_column(df, "longitude")
+        self.prices = {col: _float_column(df, col) for col in PRICE_COLUMNS}
+        self.entrance_fees = _text_column(df, "entrance_fee")
+        self.store_hours = _text_column(df, "store_hours")
+
+        # 카테고리별 (정렬된 id, 행 번호) — 중복 id는 마지막 행 (기존 dict(zip(...)) 과 동일)
+        self._index = {}
+        for cat in CATEGORY_FILES:
+            rows = np.flatnonzero(self.categories == cat)
+            _, last = np.unique(self.ids[rows][::-1], return_index=True)
+            rows = rows[::-1][last]
+            self._index[cat] = (self.ids[rows], rows)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def category_rows(self, category):
+        return np.flatnonzero(self.categories == category)
+
+    def rows(self, pids, category):
+        """id 배열 → 행 번호 배열 (없으면 -1)"""
+        sorted_ids, rows = self._index[category]
+        pids = np.asarray(pids, dtype=np.int64)
+        if len(sorted_ids) == 0:
+            return np.full(len(pids), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(sorted_ids, pids), len(sorted_ids) - 1)
+        return np.where(sorted_ids[pos] == pids, rows[pos], -1)
+
+    def review_counts_for(self, pids, category):
+        """id 배열 → 리뷰수 배열 (없는 id → 0)"""
+        rows = self.rows(pids, category)
+        return np.where(rows >= 0, self.review_counts[np.maximum(rows, 0)], 0.0)
+
+
+def load_place_metadata(data_dir):
+    return PlaceMetadata(data_dir)
@@ -0,0 +1,201 @@
+"""
+임베딩 스칼라 양자화 (int8 / fp16)
+
+- int8: 행(벡터)별 scale = max|x| / 127, x ≈ q * scale
+- fp16: 단순 반정밀도 캐스팅
+
+저장소 디렉토리에 {vtype}_int8.npy + {vtype}_scale.npy 또는 {vtype}_fp16.npy 로 저장.
+검색은 양자화 행렬로 후보(shortlist)를 뽑은 뒤 float32 원본으로 정확히 재채점함.
+
+양자화 파일은 별도 빌드 단계로 생성 (임베딩 저장소를 다시 만들면 save_embedding_store 가 지움):
+    python quantize.py        # CONFIG["STORE_DIR"] 에 CONFIG["KINDS"] 생성
+quant_meta.json 에 생성 당시 저장소 fingerprint 를 기록하고, QuantizedMatrix 는 일치할 때만 로드.
+"""
+import os
+import json
+import numpy as np
+
+from embedding_store import load_embedding_store, normalize_rows
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "KINDS": ["int8"]   # "int8" | "fp16"
+}
+
+QUANT_KINDS = ("int8", "fp16")
+QUANT_META_FILE = "quant_meta.json"
+
+
+# ========== 양자화 / 복원 ==========
+def quantize_int8(mat):
+    """(N, D) float → (q int8 (N, D), scale float32 (N,))"""
+    mat = np.asarray(mat, dtype=np.float32)
+    scale = np.abs(mat).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0  # 0벡터 보호
+    q = np.clip(np.rint(mat / scale[:, None]), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def dequantize_int8(q, scale):
+    return q.astype(np.float32) * scale[:, None]
+
+
+def quantize_fp16(mat):
+    return np.asarray(mat, dtype=np.float16)
+
+
+def quantized_nbytes(n, dim, kind):
+    """양자화 후 행렬 바이트 수 (scale 포함)"""
+    if kind == "int8":
+        return n * dim + n * 4
+    if kind == "fp16":
+        return n * dim * 2
+    return n * dim * 4
+
+
+# ========== 저장 / 로드 ==========
+def _quant_meta_path(store):
+    return os.path.join(store.store_dir, QUANT_META_FILE)
+
+
+def _read_quant_meta(store):
+    """{"{vtype}_{kind}": 생성 당시 저장소 fingerprint}"""
+    if not os.path.exists(_quant_meta_path(store)):
+        return {}
+    with open(_quant_meta_path(store), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_quantized(store, kind, vtypes=("like", "dislike")):
+    """EmbeddingStore의 float32 행렬을 양자화해서 같은 디렉토리에 저장 (+ quant_meta.json 에 fingerprint 기록)"""
+    if kind not in QUANT_KINDS:
+        raise ValueError(f"지원하지 않는 양자화 방식: {kind}")
+    meta = _read_quant_meta(store)
+
+    for vtype in vtypes:
+        mat = getattr(store, vtype)
+        # 코사인 근사용 원본 노름 (N,) — 검색 시 float32 행렬 전체를 읽지 않기 위함
+        norms = np.linalg.norm(np.asarray(mat), axis=1).astype(np.float32)
+        norms[norms == 0] = 1.0
+        np.save(os.path.join(store.store_dir, f"{vtype}_norm.npy"), norms)
+
+        if kind == "int8":
+            q, scale = quantize_int8(mat)
+            np.save(os.path.join(store.store_dir, f"{vtype}_int8.npy"), q)
+            np.save(os.path.join(store.store_dir, f"{vtype}_scale.npy"), scale)
+        else:
+            np.save(os.path.join(store.store_dir, f"{vtype}_fp16.npy"), quantize_fp16(mat))
+        meta[f"{vtype}_{kind}"] = store.fingerprint
+
+    with open(_quant_meta_path(store), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+class QuantizedMatrix:
+    """
+    저장소의 양자화 행렬 하나 (mmap). scores()는 float32 결과를 반환
+    save_quantized (python quantize.py) 로 미리 만든 파일만 읽음 — 없거나 저장소가 바뀌었으면 ValueError.
+    """
+
+    def __init__(self, store, vtype, kind):
+        self.store = store
+        self.vtype = vtype
+        self.kind = kind
+        base = os.path.join(store.store_dir, f"{vtype}_{kind}.npy")
+        norm_path = os.path.join(store.store_dir, f"{vtype}_norm.npy")
+        key = f"{vtype}_{kind}"
+        meta = _read_quant_meta(store)
+        if not (os.path.exists(base) and os.path.exists(norm_path)) or key not in meta:
+            raise ValueError(f"{key} 양자화 파일이 없습니다 — python quantize.py (KINDS에 {kind}) 로 먼저 생성하세요.")
+        if meta[key] != store.fingerprint:
+            raise ValueError(f"{key} 양자화 파일이 현재 임베딩 저장소와 다릅니다 — python quantize.py 로 다시 생성하세요.")
+
+        self.q = np.load(base, mmap_mode="r")
+        self.scale = np.load(os.path.join(store.store_dir, f"{vtype}_scale.npy")) if kind == "int8" else None
+        self.norms = np.load(norm_path)
+
+    @property
+    def nbytes(self):
+        return quantized_nbytes(self.q.shape[0], self.q.shape[1], self.kind) + self.norms.nbytes
+
+    def rows(self, rows):
+        """행 번호 배열 → 복원된 float32 (len(rows), D)"""
+        q = np.asarray(self.q[rows])
+        if self.kind == "int8":
+            return dequantize_int8(q, self.scale[rows])
+        return q.astype(np.float32)
+
+    def scores(self, query, rows):
+        """query (D,) 와 지정 행들의 내적 (근사)"""
+        q = np.asarray(self.q[rows], dtype=np.float32)
+        s = q @ np.asarray(query, dtype=np.float32)
+        if self.kind == "int8":
+            s *= self.scale[rows]
+        return s
+
+
+# ========== 검색 (양자화 후보 + float32 재채점) ==========
+def top_k_indices(scores, k):
+    """scores 내림차순 상위 k 인덱스 (argpartition + 부분 정렬)"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def quantized_search(qmat, query, rows, k, shortlist_factor=4, rescore=True):
+    """
+    qmat: QuantizedMatrix, query: (D,) 정규화된 유저 벡터, rows: 후보 행 번호
+    반환: (상위 k 행 번호, 코사인 유사도)
+    """
+    query = normalize_rows(query)
+    approx = qmat.scores(query, rows) / qmat.norms[rows]
+
+    if not rescore:
+        idx = top_k_indices(approx, k)
+        return rows[idx], approx[idx]
+
+    short = top_k_indices(approx, k * shortlist_factor)
+    short_rows = rows[short]
+    exact = normalize_rows(np.asarray(getattr(qmat.store, qmat.vtype)[short_rows])) @ query
+    idx = top_k_indices(exact, k)
+    return short_rows[idx], exact[idx]
+
+
+# ========== Weaviate 속성 ↔ dislike 벡터 ==========
+def dislike_properties(vec, storage):
+    """
+    업로드용 dislike 속성 생성
+    storage: "float" (NUMBER_ARRAY 그대로) | "int8" (INT_ARRAY + scale) | "none" (업로드 안 함, 로컬 저장소 사용)
+    """
+    if storage == "none":
+        return {}
+    if vec is None:
+        return {"dislike_embedding": []} if storage == "float" else {"dislike_q": [], "dislike_scale": 0.0}
+    if storage == "float":
+        return {"dislike_embedding": np.asarray(vec, dtype=np.float32).tolist()}
+    if storage == "int8":
+        q, scale = quantize_int8(np.asarray(vec, dtype=np.float32)[None, :])
+        return {"dislike_q": q[0].tolist(), "dislike_scale": float(scale[0])}
+    raise ValueError(f"지원하지 않는 dislike 저장 방식: {storage}")
+
+
+def dislike_from_properties(props):
+    """Weaviate 객체 속성 → dislike 벡터 (없으면 None)"""
+    vec = props.get("dislike_embedding")
+    if vec:
+        return np.asarray(vec, dtype=np.float32)
+    q = props.get("dislike_q")
+    if q:
+        return np.asarray(q, dtype=np.float32) * float(props.get("dislike_scale", 1.0))
+    return None
+
+
+if __name__ == "__main__":
+    store = load_embedding_store(CONFIG["STORE_DIR"])
+    for kind in CONFIG["KINDS"]:
+        save_quantized(store, kind)
+        print(f"✅ {kind} 양자화 저장 완료 → {CONFIG['STORE_DIR']}")
@@ -0,0 +1,177 @@
+"""
+추천 HTTP 서비스 (FastAPI, asyncio)
+
+인코더 / 장소 메타데이터 / 검색 인덱스를 프로세스에 한 번만 올려두고 요청마다 추천만 계산.
+
+    POST /recommend   body: 1000_user_info.csv 한 행과 같은 스키마 (JSON)
+        {"user_id": "U0001", "like_keywords": ["Quiet atmosphere", ...], "dislike_keywords": [...], ...}
+        (like_keywords / dislike_keywords 는 CSV처럼 "['a', 'b']" 문자열도 허용)
+    응답: {"Accommodation": [{"id", "category", "final_score"}, ...], "Cafe": [...], ...}
+          — all_user_top_k_review.py 의 유저별 JSON과 같은 구조
+          FESTIVALS=True 면 start_date + duration_days 와 겹치는 축제가 Attraction에 음수 id + "festival": true 로 섞임
+          (Attraction 개수는 TOP_K 그대로)
+    GET /festival/{id}   축제 음수 id → 축제 정보
+    GET /health
+
+인코딩 + 검색 + 재정렬은 전용 스레드 1개에서 순서대로 실행 (인코더/임베딩 클라이언트는 스레드 안전하지 않음,
+로컬 검색은 요청당 수 ms라 이벤트 루프는 요청 수신/응답만 담당).
+
+실행 (pip install fastapi uvicorn):
+    python recommend_server.py
+부하 테스트: bench_recommend_server.py
+"""
+import os
+import ast
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import List, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, field_validator
+
+from embedding_store import load_embedding_store
+from encoder_backend import get_encoder
+from place_metadata import load_place_metadata
+from recommendation_cache import RecommendationCache
+from retrieval import build_retriever
+from recommender import Recommender
+from festival_index import load_festival_index
+
+
+# ========== CONFIG ==========
+CONFIG = {
+    "HOST": "127.0.0.1",
+    "PORT": 8000,
+    "DATA_DIR": r"C:\Users\changjin\workspace\lab\pln\data_set\null_X",
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    "RETRIEVER": "exact",   # "exact" | "hnsw" (메모리 상주 인덱스) | "weaviate" (원격 왕복 포함)
+    "LIKE_QUANT": None,   # RETRIEVER="exact" 검색 행렬 양자화: None | "int8" | "fp16"
+    "WEAVIATE_MODE": "cloud",
+    "ENCODER_BACKEND": "auto",   # "auto" (서버 우선) | "server" | "torch" | "onnx" (int8) | "onnx_fp32"
+    "PENALTY_MODE": "blob",
+    "TOP_K": 30,
+    "GAMMA": 0.3,
+    "CACHE_SIZE": 1024,   # 같은 키워드 조합 결과 캐시 (0이면 사용 안 함)
+    "FESTIVALS": False,   # True: 요청의 start_date + duration_days 와 겹치는 축제를 Attraction에 섞음 (음수 id)
+    "FESTIVAL_PARAMS": {"weight": 0.9, "radius_km": None, "decay_km": 5.0}
+}
+
+
+class UserProfile(BaseModel):
+    """1000_user_info.csv 스키마 (추천에는 like/dislike 키워드만 사용)"""
+    user_id: Optional[str] = None
+    companion: Optional[str] = None
+    travel_style: Optional[str] = None
+    budget: Optional[float] = None
+    duration_days: Optional[int] = None
+    like_keywords: List[str]
+    dislike_keywords: List[str] = []
+    crowd_tolerance: Optional[float] = None
+    age: Optional[int] = None
+    gender: Optional[str] = None
+    start_date: Optional[date] = None   # "YYYY-MM-DD" (형식이 틀리면 422)
+
+    @field_validator("like_keywords", "dislike_keywords", mode="before")
+    @classmethod
+    def parse_keywords(cls, value):
+        """CSV처럼 "['a', 'b']" 문자열이면 리스트로 변환 (리스트 리터럴이 아니면 422)"""
+        if not isinstance(value, str):
+            return value
+        try:
+            parsed = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            raise ValueError("키워드 리스트 문자열 형식이 아닙니다 (예: \"['a', 'b']\")")
+        if not isinstance(parsed, (list, tuple)):
+            raise ValueError("키워드는 리스트여야 합니다")
+        return list(parsed)
+
+
+class RecommendService:
+    """요청 1건 = 인코딩 → 카테고리별 검색/재정렬 → 리뷰수 가중치 (모든 리소스는 생성 시 한 번 로드)"""
+
+    def __init__(self):
+        t0 = time.perf_counter()
+        store = load_embedding_store(CONFIG["STORE_DIR"]) if os.path.isdir(CONFIG["STORE_DIR"]) else None
+        retriever = build_retriever(CONFIG["RETRIEVER"], store=store, weaviate_mode=CONFIG["WEAVIATE_MODE"],
+                                    quantization=CONFIG["LIKE_QUANT"])
+        self.festivals = load_festival_index(CONFIG["DATA_DIR"]) if CONFIG["FESTIVALS"] else None
+        self.recommender = Recommender(retriever, store=store, penalty_mode=CONFIG["PENALTY_MODE"],
+                                       metadata=load_place_metadata(CONFIG["DATA_DIR"]),
+                                       festival_index=self.festivals, festival_params=CONFIG["FESTIVAL_PARAMS"])
+        self.model = get_encoder(CONFIG["ENCODER_BACKEND"])
+        self.cache = RecommendationCache(capacity=CONFIG["CACHE_SIZE"], tolerance=None) if CONFIG["CACHE_SIZE"] else None
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        # 첫 요청 지연 제거 (모델 / BLAS 워밍업) — 캐시를 거치지 않음
+        self._compute(["warm up"], [])
+        print(f"✅ 추천 서비스 준비 완료 ({CONFIG['RETRIEVER']}, {time.perf_counter() - t0:.1f}s)")
+
+    def recommend(self, like_keywords, dislike_keywords, trip=None):
+        # 캐시에는 축제를 섞기 전 결과를 저장 (축제는 요청의 여행 기간마다 다름)
+        if self.cache is not None:
+            cached = self.cache.lookup_exact(like_keywords, dislike_keywords)
+            if cached is not None:
+                return self.recommender.blend_festivals(cached, trip)
+
+        user_like_vec, user_dislike_vecs, result = self._compute(like_keywords, dislike_keywords)
+        if self.cache is not None:
+            self.cache.count_miss()
+            self.cache.put(like_keywords, dislike_keywords, user_like_vec, user_dislike_vecs, result)
+        return self.recommender.blend_festivals(result, trip)
+
+    def _compute(self, like_keywords, dislike_keywords):
+        """인코딩 + 검색/재정렬 (캐시 / 축제 없이) → (like 벡터, dislike 벡터 목록, 결과)"""
+        user_like_vec = self.model.encode(" ".join(like_keywords), convert_to_numpy=True)
+        user_dislike_vecs = list(self.model.encode(dislike_keywords, convert_to_numpy=True)) if dislike_keywords else []
+        result = self.recommender.recommend(user_like_vec, user_dislike_vecs,
+                                            top_k=CONFIG["TOP_K"], gamma=CONFIG["GAMMA"])
+        return user_like_vec, user_dislike_vecs, result
+
+    async def arecommend(self, profile):
+        trip = (profile.start_date, profile.duration_days or 1) if profile.start_date else None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.recommend,
+                                          profile.like_keywords, profile.dislike_keywords, trip)
+
+    def close(self):
+        self.executor.shutdown()
+        self.recommender.retriever.close()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.service = RecommendService()
+    yield
+    app.state.service.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.post("/recommend")
+async def recommend(profile: UserProfile):
+    return await app.state.service.arecommend(profile)
+
+
+@app.get("/festival/{festival_id}")
+async def festival(festival_id: int):
+    """추천 결과의 음수 id (축제) → 축제 정보"""
+    festivals = app.state.service.festivals
+    if festivals is None or not -len(festivals) <= festival_id < 0:
+        raise HTTPException(status_code=404, detail="festival not found")
+    return festivals.festival(festival_id)
+
+
+@app.get("/health")
+async def health():
+    service = app.state.service
+    return {"status": "ok", "retriever": CONFIG["RETRIEVER"],
+            "cache": service.cache.stats() if service.cache is not None else None}
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=CONFIG["HOST"], port=CONFIG["PORT"], log_level="warning")
@@ -0,0 +1,143 @@
+"""
+추천 결과 캐시 (같거나 비슷한 유저 선호 → 메모리에서 바로 반환)
+
+조회 순서:
+    1) exact    : (like 키워드 목록, dislike 키워드 목록) 이 순서까지 같으면 인코딩 없이 바로 히트
+                  (like 벡터는 키워드를 이어붙인 문장의 임베딩이라 순서가 바뀌면 결과도 달라짐)
+    2) semantic : like 벡터의 LSH 버킷 (랜덤 초평면 n_bits, 해밍 거리 1까지 탐색) 안에서
+                  cos(like) >= tolerance 이고 dislike 도 비슷한 (둘 다 없음 / 평균 벡터 cos >= dislike_tolerance) 항목
+LRU로 capacity 개까지 유지, 히트율 통계 제공.
+"""
+from collections import OrderedDict
+import numpy as np
+
+
+def _unit(vec):
+    vec = np.asarray(vec, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+def _dislike_centroid(dislike_vecs):
+    vecs = [v for v in dislike_vecs if len(v) > 0]
+    if not vecs:
+        return None
+    return _unit(np.mean([_unit(v) for v in vecs], axis=0))
+
+
+def exact_key(like_keywords, dislike_keywords):
+    return tuple(like_keywords), tuple(dislike_keywords)
+
+
+class RecommendationCache:
+    """
+    capacity: 최대 항목 수 (LRU 제거)
+    tolerance: semantic 히트 최소 코사인 유사도 (None이면 exact 키만 사용)
+    dislike_tolerance: dislike 평균 벡터 최소 코사인 유사도 (None이면 tolerance와 같음)
+    n_bits: LSH 초평면 수 (클수록 버킷이 잘게 나뉨)
+    """
+
+    def __init__(self, capacity=1024, tolerance=0.98, dislike_tolerance=None, n_bits=12, seed=0):
+        self.capacity = capacity
+        self.tolerance = tolerance
+        self.dislike_tolerance = tolerance if dislike_tolerance is None else dislike_tolerance
+        self.n_bits = n_bits
+        self.seed = seed
+        self.planes = None   # 첫 put 때 벡터 차원에 맞춰 생성
+
+        self.entries = OrderedDict()   # exact key → (like_vec, dislike_centroid, bucket, result)
+        self.buckets = {}   # bucket → {exact key, ...}
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    # ---------- LSH ----------
+    def _bucket(self, like_vec):
+        if self.planes is None:
+            rng = np.random.default_rng(self.seed)
+            self.planes = rng.standard_normal((self.n_bits, len(like_vec))).astype(np.float32)
+        bits = (self.planes @ like_vec) > 0
+        return int(np.dot(bits, 1 << np.arange(self.n_bits)))
+
+    def _probe(self, bucket):
+        """자기 버킷 + 해밍 거리 1 버킷 (경계 근처 벡터 누락 방지)"""
+        yield bucket
+        for b in range(self.n_bits):
+            yield bucket ^ (1 << b)
+
+    # ---------- 조회 ----------
+    def lookup_exact(self, like_keywords, dislike_keywords):
+        key = exact_key(like_keywords, dislike_keywords)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        self.hits["exact"] += 1
+        return entry[3]
+
+    def lookup_similar(self, like_vec, dislike_vecs):
+        """exact 미스 이후 호출. 히트가 없으면 미스로 집계."""
+        if self.tolerance is None or not self.entries:
+            self.misses += 1
+            return None
+
+        like_vec = _unit(like_vec)
+        dislike_c = _dislike_centroid(dislike_vecs)
+
+        best_key, best_sim = None, self.tolerance
+        for bucket in self._probe(self._bucket(like_vec)):
+            for key in self.buckets.get(bucket, ()):
+                cached_like, cached_dislike, _, _ = self.entries[key]
+                if (dislike_c is None) != (cached_dislike is None):
+                    continue
+                if dislike_c is not None and float(dislike_c @ cached_dislike) < self.dislike_tolerance:
+                    continue
+                sim = float(like_vec @ cached_like)
+                if sim >= best_sim:
+                    best_key, best_sim = key, sim
+
+        if best_key is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(best_key)
+        self.hits["semantic"] += 1
+        return self.entries[best_key][3]
+
+    def count_miss(self):
+        """lookup_similar 없이 exact 만 쓰는 호출자가 미스를 집계할 때"""
+        self.misses += 1
+
+    # ---------- 저장 ----------
+    def put(self, like_keywords, dislike_keywords, like_vec, dislike_vecs, result):
+        key = exact_key(like_keywords, dislike_keywords)
+        if key in self.entries:
+            self._remove(key)
+
+        like_vec = _unit(like_vec)
+        bucket = self._bucket(like_vec)
+        self.entries[key] = (like_vec, _dislike_centroid(dislike_vecs), bucket, result)
+        self.buckets.setdefault(bucket, set()).add(key)
+
+        while len(self.entries) > self.capacity:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        _, _, bucket, _ = self.entries.pop(key)
+        keys = self.buckets[bucket]
+        keys.discard(key)
+        if not keys:
+            del self.buckets[bucket]
+
+    # ---------- 통계 ----------
+    def stats(self):
+        total = self.hits["exact"] + self.hits["semantic"] + self.misses
+        return {
+            "lookups": total,
+            "exact_hits": self.hits["exact"],
+            "semantic_hits": self.hits["semantic"],
+            "misses": self.misses,
+            "hit_rate": (self.hits["exact"] + self.hits["semantic"]) / total if total else 0.0,
+            "size": len(self.entries)
+        }
@@ -0,0 +1,299 @@
+"""
+유저 선호 기반 장소 추천 (카테고리별 like 검색 → dislike 패널티 재정렬 → 리뷰수 가중치)
+
+검색 백엔드(Weaviate / 로컬)는 retrieval.Retriever 로 주입.
+all_user_top_k_review.py, user_top_k.py 에서 공통으로 사용.
+"""
+import asyncio
+from collections import defaultdict
+import numpy as np
+
+from quantize import dislike_from_properties
+from multi_vector import ragged_max_sim
+from reranker import blob_dislike_sims, select_top_k
+from place_metadata import CATEGORY_FILES, load_place_metadata
+
+# 카테고리 한글 → 영어 변환 매핑
+CATEGORY_TRANSLATE = {
+    "Accommodation": "Accommodation",
+    "카페": "Cafe",
+    "음식점": "Restaurant",
+    "관광지": "Attraction"
+}
+CATEGORY_KOREAN = {en: kor for kor, en in CATEGORY_TRANSLATE.items()}   # 영어 → 저장소 카테고리
+
+
+class Recommender:
+    """
+    retriever: retrieval.Retriever (arecommend 사용 시 retrieval.AsyncWeaviateRetriever)
+    store: EmbeddingStore (dislike 벡터가 Weaviate 속성에 없을 때 / keyword 패널티에 사용)
+    penalty_mode: "blob" (dislike 키워드 합친 벡터 1개) | "keyword" (키워드별 멀티벡터 max-sim)
+    metadata: PlaceMetadata (없으면 data_dir에서 한 번 로드해 모든 유저가 공유)
+    adaptive_fetch: True면 dislike 하드 필터 후 top_k가 안 채워질 때 offset으로 다음 페이지를 더 가져옴
+                    (누적 후보 수를 2배씩, 최대 top_k * max_fetch_factor 개까지)
+    attribute_index: attribute_filter.AttributeIndex — recommend(filters={카테고리: 조건}) 의 조건을
+                     bool 비트맵으로 바꿔 retriever.search(allowed=...) 에 pre-filter로 전달
+    diversifier: diversity.MMRReranker — 최종 점수 계산 후 카테고리별 MMR 다양성 재정렬 (None이면 생략)
+    festival_index: festival_index.FestivalIndex — recommend(trip=(start_date, duration_days)) 의 여행 기간과 겹치는
+                    축제를 Attraction 결과에 섞음 (음수 id + "festival": True, 상위 top_k로 다시 자름,
+                    상세는 festival_index.festival(id))
+    festival_params: FestivalIndex.blend_trip 인자 (weight / radius_km / decay_km)
+    """
+
+    def __init__(self, retriever, store=None, data_dir=None, penalty_mode="blob", dislike_qmat=None, metadata=None,
+                 fetch_factor=3, adaptive_fetch=False, max_fetch_factor=24, attribute_index=None,
+                 diversifier=None, festival_index=None, festival_params=None):
+        self.retriever = retriever
+        self.store = store
+        self.data_dir = data_dir
+        self.metadata = metadata if metadata is not None or data_dir is None else load_place_metadata(data_dir)
+        self.penalty_mode = penalty_mode
+        self.dislike_qmat = dislike_qmat
+        self.fetch_factor = fetch_factor
+        self.adaptive_fetch = adaptive_fetch
+        self.max_fetch_factor = max_fetch_factor
+        self.attribute_index = attribute_index
+        self.diversifier = diversifier
+        self.festival_index = festival_index
+        self.festival_params = festival_params or {}
+        self.fetch_stats = defaultdict(list)   # 카테고리 → [(가져온 후보 수, 필터 통과 수, top_k), ...]
+
+    # ---------- dislike 벡터 ----------
+    def place_dislike_vector(self, hit, category_name):
+        """검색 결과 → 장소 dislike 벡터 (속성 우선, 없으면 로컬 저장소, 둘 다 없으면 None)"""
+        vec = dislike_from_properties(hit.properties)
+        if vec is not None or self.store is None:
+            return vec
+
+        r = self.store.row(hit.place_id, category_name)
+        if r is None or not self.store.dislike_mask[r]:
+            return None
+        return self.dislike_qmat.rows([r])[0] if self.dislike_qmat else np.asarray(self.store.dislike[r])
+
+    def blob_dislike_matrix(self, hits, category_name):
+        """후보 dislike 벡터를 (n, D) 행렬 + 유효 마스크로 쌓음"""
+        n = len(hits)
+        props_vecs = [dislike_from_properties(hit.properties) for hit in hits]
+
+        if self.store is not None and all(v is None for v in props_vecs):
+            # 로컬 저장소에서 한 번에 gather
+            rows = self.store.rows([hit.place_id for hit in hits], category_name)
+            valid = rows >= 0
+            valid[valid] = self.store.dislike_mask[rows[valid]]
+            safe_rows = np.where(valid, rows, 0)
+            mat = self.dislike_qmat.rows(safe_rows) if self.dislike_qmat else np.asarray(self.store.dislike[safe_rows])
+            return mat, valid
+
+        vecs = [self.place_dislike_vector(hit, category_name) if v is None else v for hit, v in zip(hits, props_vecs)]
+        valid = np.array([v is not None for v in vecs], dtype=bool)
+        dim = next((len(v) for v in vecs if v is not None), 0)
+        mat = np.zeros((n, dim), dtype=np.float32)
+        for i in np.flatnonzero(valid):
+            mat[i] = vecs[i]
+        return mat, valid
+
+    def keyword_dislike_sims(self, hits, user_dislike_vecs, category_name):
+        """후보 전체의 (유저 dislike 키워드 × 장소 dislike 키워드) max 유사도 — 행렬곱 한 번"""
+        if self.store is None or "dislike" not in self.store.keywords:
+            raise ValueError("penalty_mode='keyword'는 키워드 멀티벡터가 있는 저장소가 필요합니다 (place_like_embeding.py 재실행)")
+
+        offsets, kw_matrix = self.store.keywords["dislike"]
+        rows = self.store.rows([hit.place_id for hit in hits], category_name)
+        user_mat = [ud for ud in user_dislike_vecs if len(ud) > 0]
+
+        sims = np.zeros(len(hits), dtype=np.float32)
+        found = rows >= 0
+        if user_mat and found.any():
+            sims[found] = ragged_max_sim(np.stack(user_mat), offsets, kw_matrix, rows[found])
+        return sims
+
+    # ---------- 추천 ----------
+    def dislike_sims(self, hits, user_dislike_vecs, category_name):
+        """후보별 최대 dislike 유사도 (n,) — hits 는 모두 category_name 카테고리 검색 결과"""
+        if self.penalty_mode == "keyword":
+            return self.keyword_dislike_sims(hits, user_dislike_vecs, category_name)
+
+        user_mat = [ud for ud in user_dislike_vecs if len(ud) > 0]
+        if not user_mat or not hits:
+            return np.zeros(len(hits), dtype=np.float32)
+        place_mat, valid = self.blob_dislike_matrix(hits, category_name)
+        return blob_dislike_sims(np.stack(user_mat), place_mat, valid)
+
+    # ---------- 속성 필터 ----------
+    def allowed_mask(self, filters, category_name):
+        """filters: {카테고리: 조건 dict} → 해당 카테고리 bool 비트맵 (조건 없으면 None)"""
+        spec = (filters or {}).get(category_name)
+        if not spec:
+            return None
+        if self.attribute_index is None:
+            raise ValueError("속성 필터를 쓰려면 attribute_index가 필요합니다.")
+        return self.attribute_index.mask(spec)
+
+    # ---------- 후보 검색 (적응형 over-fetch) ----------
+    def _next_page_size(self, fetched, requested, dislike_sims, top_k, dislike_threshold):
+        """다음 페이지 크기 (0이면 중단) — 통과 후보가 top_k 미만이고, 결과가 더 있고, 상한 이내일 때"""
+        if not self.adaptive_fetch or fetched < requested:
+            return 0
+        if int((dislike_sims <= dislike_threshold).sum()) >= top_k:
+            return 0
+        return max(0, min(fetched, top_k * self.max_fetch_factor - fetched))
+
+    def _record_fetch(self, category_name, dislike_sims, top_k, dislike_threshold):
+        survivors = int((dislike_sims <= dislike_threshold).sum())
+        self.fetch_stats[category_name].append((len(dislike_sims), survivors, top_k))
+
+    def fetch_candidates(self, user_like_vec, user_dislike_vecs, category_name, top_k=30, dislike_threshold=0.75,
+                         allowed=None):
+        """반환: (hits, dislike_sims)"""
+        limit = top_k * self.fetch_factor
+        extra = {} if allowed is None else {"allowed": allowed}
+        hits = list(self.retriever.search(user_like_vec, category_name, limit=limit, **extra))
+        dislike_sims = self.dislike_sims(hits, user_dislike_vecs, category_name)
+
+        requested = limit
+        while (n := self._next_page_size(len(hits), requested, dislike_sims, top_k, dislike_threshold)) > 0:
+            page = self.retriever.search(user_like_vec, category_name, limit=n, offset=len(hits), **extra)
+            requested = len(hits) + n
+            hits += page
+            dislike_sims = np.concatenate([dislike_sims, self.dislike_sims(page, user_dislike_vecs, category_name)])
+
+        self._record_fetch(category_name, dislike_sims, top_k, dislike_threshold)
+        return hits, dislike_sims
+
+    async def afetch_candidates(self, user_like_vec, user_dislike_vecs, category_name, top_k=30, dislike_threshold=0.75,
+                                allowed=None):
+        """fetch_candidates 의 asyncio 버전"""
+        limit = top_k * self.fetch_factor
+        extra = {} if allowed is None else {"allowed": allowed}
+        hits = list(await self.retriever.search(user_like_vec, category_name, limit=limit, **extra))
+        dislike_sims = self.dislike_sims(hits, user_dislike_vecs, category_name)
+
+        requested = limit
+        while (n := self._next_page_size(len(hits), requested, dislike_sims, top_k, dislike_threshold)) > 0:
+            page = await self.retriever.search(user_like_vec, category_name, limit=n, offset=len(hits), **extra)
+            requested = len(hits) + n
+            hits += page
+            dislike_sims = np.concatenate([dislike_sims, self.dislike_sims(page, user_dislike_vecs, category_name)])
+
+        self._record_fetch(category_name, dislike_sims, top_k, dislike_threshold)
+        return hits, dislike_sims
+
+    def overfetch_report(self):
+        """카테고리별 over-fetch 통계: {카테고리: {queries, mean_ratio, p95_ratio, max_ratio, starved}}
+        ratio = 가져온 후보 수 / top_k, starved = 필터 후 top_k 미만으로 끝난 비율"""
+        report = {}
+        for cat, rows in self.fetch_stats.items():
+            fetched, survivors, top_k = (np.array(col, dtype=float) for col in zip(*rows))
+            ratio = fetched / top_k
+            report[cat] = {
+                "queries": len(rows),
+                "mean_ratio": float(ratio.mean()),
+                "p95_ratio": float(np.percentile(ratio, 95)),
+                "max_ratio": float(ratio.max()),
+                "starved": float((survivors < top_k).mean())
+            }
+        return report
+
+    # ---------- 재정렬 ----------
+    def rerank_with_penalty(self, user_like_vec, user_dislike_vecs, category_name,
+                            top_k=30, alpha=1.0, beta=0.5, dislike_threshold=0.75, allowed=None):
+        hits, dislike_sims = self.fetch_candidates(user_like_vec, user_dislike_vecs, category_name,
+                                                   top_k=top_k, dislike_threshold=dislike_threshold, allowed=allowed)
+        return self.rerank_hits(hits, user_dislike_vecs, top_k=top_k, alpha=alpha, beta=beta,
+                                dislike_threshold=dislike_threshold, dislike_sims=dislike_sims)
+
+    def rerank_hits(self, hits, user_dislike_vecs, top_k=30, alpha=1.0, beta=0.5, dislike_threshold=0.75,
+                    dislike_sims=None, category_name=None):
+        """검색 결과(Hit 리스트) → [(hit, score)] — 동기/비동기 검색 공통 (dislike_sims 없으면 category_name 필요)"""
+        if not hits:
+            return []
+
+        like_sims = 1 - np.array([hit.distance for hit in hits], dtype=np.float32)
+        if dislike_sims is None:
+            dislike_sims = self.dislike_sims(hits, user_dislike_vecs, category_name)
+
+        idx, scores = select_top_k(like_sims, dislike_sims, top_k,
+                                   alpha=alpha, beta=beta, dislike_threshold=dislike_threshold)
+        return [(hits[i], float(sc)) for i, sc in zip(idx, scores)]
+
+    # ---------- 리뷰수 기반 정규화 + 최종 스코어 ----------
+    def attach_review_scores_and_final(self, results_by_cat, gamma=0.3):
+        final_scores = {}
+
+        for cat, scored_list in results_by_cat.items():
+            if not scored_list:
+                continue
+
+            pids = [hit.place_id for hit, _ in scored_list]
+            sim_scores = [sim_score for _, sim_score in scored_list]
+            counts = self.metadata.review_counts_for(pids, cat)
+
+            if counts.sum() > 0:
+                counts = np.log1p(counts)
+                exp_counts = np.exp(counts - counts.max())
+                review_norms = exp_counts / exp_counts.sum()
+            else:
+                review_norms = np.ones(len(pids)) / len(pids)
+
+            cat_list = []
+            for pid, sim_score, rn in zip(pids, sim_scores, review_norms):
+                final_score = (1 - gamma) * sim_score + gamma * rn
+                cat_list.append({
+                    "id": pid,
+                    "category": CATEGORY_TRANSLATE[cat],  # ✅ 영어 변환
+                    "final_score": float(final_score)
+                })
+
+            cat_list = sorted(cat_list, key=lambda x: x["final_score"], reverse=True)
+
+            # ✅ key 자체도 영어로 변환
+            final_scores[CATEGORY_TRANSLATE[cat]] = cat_list
+
+        return final_scores
+
+    def diversify(self, final_scores):
+        """최종 결과 → MMR 다양성 재정렬 (diversifier 없으면 그대로)"""
+        return final_scores if self.diversifier is None else self.diversifier.rerank(final_scores)
+
+    def blend_festivals(self, final_scores, trip):
+        """trip: (start_date, duration_days) — 겹치는 축제를 Attraction 결과에 섞음 (festival_index / trip 없으면 그대로)"""
+        if self.festival_index is None or trip is None:
+            return final_scores
+        start_date, duration_days = trip
+        return self.festival_index.blend_trip(final_scores, start_date, duration_days, self.metadata,
+                                              category=CATEGORY_TRANSLATE["관광지"], **self.festival_params)
+
+    def recommend(self, user_like_vec, user_dislike_vecs, top_k=30, gamma=0.3, filters=None, trip=None):
+        """
+        유저 벡터 → {영문 카테고리: [{id, category, final_score}, ...]}
+        retriever가 GeoRetriever면 1순위 숙소를 앵커로 나머지 카테고리를 거리 기준으로 검색.
+        filters: {한글 카테고리: 속성 조건} (예: {"음식점": {"avg_price": (None, 15000)}})
+        trip: (start_date, duration_days) — festival_index 가 있으면 기간이 겹치는 축제를 섞음
+        """
+        geo = hasattr(self.retriever, "set_anchor_place")
+        if geo:
+            self.retriever.clear_anchor()
+
+        results_by_cat = {}
+        for cat in CATEGORY_FILES.keys():
+            results_by_cat[cat] = self.rerank_with_penalty(user_like_vec, user_dislike_vecs, cat, top_k=top_k,
+                                                           allowed=self.allowed_mask(filters, cat))
+            if geo and cat == "Accommodation" and results_by_cat[cat]:
+                self.retriever.set_anchor_place(results_by_cat[cat][0][0].place_id, cat)
+        return self.blend_festivals(self.diversify(self.attach_review_scores_and_final(results_by_cat, gamma=gamma)),
+                                    trip)
+
+    async def arecommend(self, user_like_vec, user_dislike_vecs, top_k=30, gamma=0.3, filters=None, trip=None):
+        """recommend 의 asyncio 버전 (retriever.search 가 코루틴) — 4개 카테고리 동시 검색"""
+        cats = list(CATEGORY_FILES.keys())
+        candidates = await asyncio.gather(*[
+            self.afetch_candidates(user_like_vec, user_dislike_vecs, cat, top_k=top_k,
+                                   allowed=self.allowed_mask(filters, cat))
+            for cat in cats
+        ])
+        results_by_cat = {
+            cat: self.rerank_hits(hits, user_dislike_vecs, top_k=top_k, dislike_sims=dislike_sims)
+            for cat, (hits, dislike_sims) in zip(cats, candidates)
+        }
+        return self.blend_festivals(self.diversify(self.attach_review_scores_and_final(results_by_cat, gamma=gamma)),
+                                    trip)
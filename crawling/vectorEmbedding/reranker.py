@@ -0,0 +1,52 @@
+"""
+dislike 패널티 재정렬 (벡터화)
+
+후보 n개에 대해
+    dislike_sim = max_u cos(유저 dislike u, 장소 dislike)      # (U, D) @ (D, n) 한 번
+    score       = alpha * like_sim - beta * dislike_sim
+    dislike_sim > threshold 인 후보는 제외, 남은 후보 중 상위 top_k (argpartition)
+"""
+import numpy as np
+
+from embedding_store import normalize_rows
+
+
+def blob_dislike_sims(user_dislike_mat, place_dislike_mat, place_valid):
+    """
+    user_dislike_mat: (U, D) 유저 dislike 키워드 벡터
+    place_dislike_mat: (n, D) 후보 장소 dislike 벡터, place_valid: (n,) 벡터 유무
+    반환: (n,) 후보별 최대 코사인 유사도 (장소 벡터 없음 / 유저 dislike 없음 → 0)
+    """
+    n = len(place_valid)
+    out = np.zeros(n, dtype=np.float32)
+    user_dislike_mat = np.asarray(user_dislike_mat, dtype=np.float32)
+    if n == 0 or user_dislike_mat.size == 0 or not np.any(place_valid):
+        return out
+
+    valid = np.flatnonzero(place_valid)
+    sims = normalize_rows(user_dislike_mat.reshape(-1, place_dislike_mat.shape[1])) @ normalize_rows(place_dislike_mat[valid]).T
+    out[valid] = sims.max(axis=0)
+    return out
+
+
+def select_top_k(like_sims, dislike_sims, top_k, alpha=1.0, beta=0.5, dislike_threshold=0.75):
+    """
+    반환: (후보 인덱스 배열, 점수 배열) — 점수 내림차순, 최대 top_k개
+    동점은 원래 후보 순서(검색 순위)를 유지.
+    """
+    like_sims = np.asarray(like_sims, dtype=np.float32)
+    dislike_sims = np.asarray(dislike_sims, dtype=np.float32)
+
+    scores = alpha * like_sims - beta * dislike_sims
+    keep = np.flatnonzero(dislike_sims <= dislike_threshold)  # 하드 필터링
+    if len(keep) == 0:
+        return keep, scores[keep]
+
+    kept_scores = scores[keep]
+    k = min(top_k, len(keep))
+    if k < len(keep):
+        part = np.sort(np.argpartition(-kept_scores, k - 1)[:k])
+    else:
+        part = np.arange(len(keep))
+    order = part[np.argsort(-kept_scores[part], kind="stable")]
+    return keep[order], kept_scores[order]
@@ -0,0 +1,120 @@
+"""
+추천 결과 저장소 (SQLite 한 파일)
+
+유저별 JSON 파일 수천 개 대신 테이블 하나:
+    recommendations(user_id, category, rank, place_id, final_score)
+    PRIMARY KEY (user_id, category, rank) WITHOUT ROWID → 기본키 B-tree 순서로 저장, 유저/카테고리 조회 O(log n)
+
+- ResultStoreWriter: 유저 결과를 버퍼에 모아 batch_size 행마다 executemany (스트리밍 저장)
+- ResultStore      : get(user_id, category=None) → {카테고리: [{id, category, final_score}, ...]} (기존 JSON과 같은 구조)
+                     export_json(output_dir) → 기존 user_results/{user_id}_recommendations.json 호환 출력
+"""
+import os
+import json
+import sqlite3
+
+from recommender import CATEGORY_TRANSLATE
+
+# 기존 JSON과 같은 카테고리 순서 (Accommodation, Cafe, Restaurant, Attraction)
+CATEGORY_ORDER = {cat: i for i, cat in enumerate(CATEGORY_TRANSLATE.values())}
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recommendations (
+    user_id     TEXT    NOT NULL,
+    category    TEXT    NOT NULL,
+    rank        INTEGER NOT NULL,
+    place_id    INTEGER NOT NULL,
+    final_score REAL    NOT NULL,
+    PRIMARY KEY (user_id, category, rank)
+) WITHOUT ROWID
+"""
+
+
+class ResultStoreWriter:
+    def __init__(self, path, batch_size=5000):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(SCHEMA)
+        self.batch_size = batch_size
+        self.users = []
+        self.rows = []
+
+    def write(self, user_id, results_by_cat):
+        """results_by_cat: {영문 카테고리: [{id, category, final_score}, ...]} (점수 내림차순)"""
+        self.users.append((str(user_id),))
+        for cat, items in results_by_cat.items():
+            self.rows.extend(
+                (str(user_id), cat, rank, int(item["id"]), float(item["final_score"]))
+                for rank, item in enumerate(items)
+            )
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.users:
+            return
+        with self.conn:
+            # 다시 실행한 유저는 이전 결과를 지우고 덮어씀 (카테고리/개수가 달라졌을 수 있음)
+            self.conn.executemany("DELETE FROM recommendations WHERE user_id = ?", self.users)
+            self.conn.executemany("INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?, ?)", self.rows)
+        self.users, self.rows = [], []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ResultStore:
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def get(self, user_id, category=None, limit=None):
+        """유저 결과 (없으면 빈 dict). category 지정 시 해당 카테고리만, limit은 카테고리별 상위 개수."""
+        query = "SELECT category, place_id, final_score FROM recommendations WHERE user_id = ?"
+        params = [str(user_id)]
+        if category is not None:
+            query += " AND category = ?"
+            params.append(category)
+        if limit is not None:
+            query += " AND rank < ?"
+            params.append(int(limit))
+        query += " ORDER BY category, rank"
+
+        results = {}
+        for cat, pid, score in self.conn.execute(query, params):
+            results.setdefault(cat, []).append({"id": pid, "category": cat, "final_score": score})
+        return dict(sorted(results.items(), key=lambda kv: CATEGORY_ORDER.get(kv[0], len(CATEGORY_ORDER))))
+
+    def users(self):
+        return [u for (u,) in self.conn.execute("SELECT DISTINCT user_id FROM recommendations ORDER BY user_id")]
+
+    def export_json(self, output_dir, user_ids=None):
+        """호환 모드: user_results/{user_id}_recommendations.json 형태로 내보내기"""
+        os.makedirs(output_dir, exist_ok=True)
+        for user_id in (user_ids if user_ids is not None else self.users()):
+            out_path = os.path.join(output_dir, f"{user_id}_recommendations.json")
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(self.get(user_id), f, ensure_ascii=False, indent=2)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_result_store(path):
+    return ResultStore(path)
@@ -0,0 +1,436 @@
+"""
+후보 검색(retrieval) 인터페이스
+
+    retriever.search(vector, category, limit, offset=0, allowed=None) → [Hit, ...]  (유사도 내림차순)
+
+allowed: 임베딩 저장소 행 순서의 (N,) bool 비트맵 (attribute_filter.AttributeIndex.mask) — 검색 단계에서
+         통과 행만 후보로 (사후 필터가 아니라 pre-filter라 limit개가 모두 조건을 만족).
+
+- WeaviateRetriever: Weaviate near_vector + category 필터 (기존 방식)
+- AsyncWeaviateRetriever: 같은 쿼리를 Weaviate async 클라이언트로 (await search, 동시 요청 수 제한)
+- LocalRetriever   : 임베딩 저장소(mmap) 위에서 프로세스 내 검색
+    method="exact" : numpy brute force (정규화 행렬 @ 쿼리)
+    method="hnsw"  : hnswlib HNSW 인덱스 (category 필터는 검색 시 label 필터로 적용)
+    partitioned=True: 카테고리별 하위 인덱스로 라우팅 (Weaviate는 카테고리별 tenant)
+- GeoRetriever     : LocalRetriever + 공간 인덱스 (geo_index.GeoIndex) — 앵커 좌표 반경 안의 장소만 점수 계산
+    mode="restrict": 반경 밖 제외,  mode="decay": like 유사도 * exp(-거리 / decay_km)
+- HybridRetriever  : 벡터 검색 + BM25 키워드 검색 (keyword_index.BM25Index) 을 동시에 실행해 RRF로 융합
+
+Hit.distance 는 Weaviate와 같은 코사인 거리 (1 - cos).
+"""
+import time
+import asyncio
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from recommender import CATEGORY_TRANSLATE
+from embedding_store import normalize_rows
+from quantize import QUANT_KINDS, QuantizedMatrix, quantized_search
+
+
+Hit = namedtuple("Hit", ["place_id", "distance", "properties"])
+
+
+class Retriever:
+    def search(self, vector, category, limit, offset=0, allowed=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# ========== Weaviate ==========
+class WeaviateRetriever(Retriever):
+    """
+    store: allowed 비트맵 → place_id 필터 변환용 (필터를 쓰지 않으면 생략 가능)
+    partitioned: True면 카테고리별 tenant (run_weaviate.py PARTITION="tenant") 로 보내고 category 필터 생략
+    """
+
+    def __init__(self, client, collection_name="Place", store=None, partitioned=False):
+        self.client = client
+        self.collection = client.collections.get(collection_name)
+        self.store = store
+        self.partitioned = partitioned
+
+    def search(self, vector, category, limit, offset=0, allowed=None):
+        allowed_ids = _allowed_ids(self.store, allowed)
+        collection = _partition(self.collection, category) if self.partitioned else self.collection
+        results = collection.query.near_vector(
+            **_near_vector_args(vector, category, limit, offset, allowed_ids, category_filter=not self.partitioned))
+        return _weaviate_hits(results)
+
+    def close(self):
+        self.client.close()
+
+
+class AsyncWeaviateRetriever:
+    """
+    Weaviate async 클라이언트 기반 검색 (asyncio 실행 모드)
+    max_in_flight: 동시에 보내는 쿼리 수 상한. latencies_ms 에 쿼리별 왕복 시간 기록.
+    """
+
+    def __init__(self, client, collection_name="Place", max_in_flight=16, store=None, partitioned=False):
+        self.client = client
+        self.collection = client.collections.get(collection_name)
+        self.store = store
+        self.partitioned = partitioned
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.latencies_ms = []
+
+    async def search(self, vector, category, limit, offset=0, allowed=None):
+        allowed_ids = _allowed_ids(self.store, allowed)
+        collection = _partition(self.collection, category) if self.partitioned else self.collection
+        async with self.semaphore:
+            t0 = time.perf_counter()
+            results = await collection.query.near_vector(
+                **_near_vector_args(vector, category, limit, offset, allowed_ids, category_filter=not self.partitioned))
+            self.latencies_ms.append((time.perf_counter() - t0) * 1e3)
+        return _weaviate_hits(results)
+
+    async def close(self):
+        await self.client.close()
+
+
+def _allowed_ids(store, allowed):
+    if allowed is None:
+        return None
+    if store is None:
+        raise ValueError("Weaviate 검색에 속성 필터를 쓰려면 임베딩 저장소(store)가 필요합니다.")
+    return store.ids[np.asarray(allowed, dtype=bool)].tolist()
+
+
+def partition_name(category):
+    """카테고리 → tenant 이름 (tenant 이름은 영문/숫자만 허용되어 영문 카테고리 사용)"""
+    return CATEGORY_TRANSLATE.get(category, category)
+
+
+def _partition(collection, category):
+    return collection.with_tenant(partition_name(category))
+
+
+def _near_vector_args(vector, category, limit, offset, allowed_ids=None, category_filter=True):
+    from weaviate.classes import query as wq
+
+    filters = wq.Filter.by_property("category").equal(category) if category_filter else None
+    if allowed_ids is not None:
+        # 속성 필터 통과 id만 (Weaviate 내부 allow-list pre-filter로 HNSW 탐색)
+        id_filter = wq.Filter.by_property("place_id").contains_any(allowed_ids or [-1])
+        filters = id_filter if filters is None else filters & id_filter
+    return dict(
+        near_vector=np.asarray(vector, dtype=np.float32).tolist(),
+        limit=limit,
+        offset=offset or None,
+        return_metadata=["distance"],
+        filters=filters
+    )
+
+
+def _weaviate_hits(results):
+    return [
+        Hit(obj.properties.get("place_id"), obj.metadata.distance, obj.properties)
+        for obj in results.objects
+    ]
+
+
+# ========== 로컬 (in-process) ==========
+def _store_hits(store, rows, sims):
+    """(행 번호, 코사인 유사도) → Hit 리스트 (numpy 스칼라 변환을 배열 단위로 한 번에)"""
+    rows = np.asarray(rows, dtype=np.int64)
+    return [
+        Hit(pid, 1.0 - sim, {"place_id": pid, "name": store.names[r], "category": cat,
+                             "sub_category": store.sub_categories[r]})
+        for r, pid, cat, sim in zip(rows.tolist(), store.ids[rows].tolist(),
+                                    store.categories[rows].tolist(), np.asarray(sims, dtype=np.float64).tolist())
+    ]
+
+
+class LocalRetriever(Retriever):
+    """
+    store: EmbeddingStore. like 벡터가 없는 장소는 Weaviate와 같이 0벡터(유사도 0)로 취급.
+    partitioned: True면 카테고리별로 나눈 인덱스에서 검색 (필터 없이 해당 파티션만)
+        exact: 카테고리별 연속 like 행렬 (검색마다 행 gather 복사 없음)
+        hnsw : 카테고리별 HNSW 인덱스 (작은 카테고리가 큰 그래프 안에서 필터로 걸러지며 느려지는 문제 제거)
+    quantization: (exact 전용) "int8" | "fp16" — float32 행렬 대신 양자화 행렬(quantize.QuantizedMatrix, mmap)로
+        후보 limit * shortlist_factor 개를 뽑고 float32 원본(저장소 mmap)으로 재채점. float32 like 행렬을 상주시키지 않음.
+    """
+
+    def __init__(self, store, method="exact", hnsw_params=None, partitioned=False, quantization=None,
+                 shortlist_factor=4):
+        if quantization is not None and (method != "exact" or quantization not in QUANT_KINDS):
+            raise ValueError(f"양자화 검색은 method='exact' + {QUANT_KINDS} 만 지원합니다: {method}, {quantization}")
+        self.store = store
+        self.method = method
+        self.partitioned = partitioned
+        self.qmat = QuantizedMatrix(store, "like", quantization) if quantization else None
+        self.shortlist_factor = shortlist_factor
+        self.like = None if self.qmat is not None else normalize_rows(store.like)  # (N, D) 메모리 상주
+        self.cat_rows = {cat: store.unique_category_rows(cat) for cat in np.unique(store.categories)}
+        self.cat_like = {}
+        if partitioned and self.like is not None:
+            self.cat_like = {cat: self.like[rows] for cat, rows in self.cat_rows.items()}
+
+        self.index = None
+        self.cat_index = {}
+        if method == "hnsw":
+            self._build_hnsw(**(hnsw_params or {}))
+        elif method != "exact":
+            raise ValueError(f"지원하지 않는 로컬 검색 방식: {method}")
+
+    def _build_hnsw(self, M=16, ef_construction=200, ef=64, num_threads=-1):
+        # like 벡터 없는 장소(0벡터)는 코사인이 정의되지 않으므로 인덱스에서 제외
+        if not self.partitioned:
+            valid = np.flatnonzero(self.store.like_mask & self.store.first_mask)
+            self.index = _hnsw_index(self.like, valid, M, ef_construction, ef, num_threads)
+            return
+        for cat, rows in self.cat_rows.items():
+            valid = rows[self.store.like_mask[rows]]
+            if len(valid):
+                self.cat_index[cat] = _hnsw_index(self.like, valid, M, ef_construction, ef, num_threads)
+
+    def _hits(self, rows, sims):
+        return _store_hits(self.store, rows, sims)
+
+    def row_sims(self, rows, query):
+        """지정 행들과 정규화된 query 의 코사인 유사도 (양자화 검색이면 float32 원본에서 계산)"""
+        if self.like is not None:
+            return self.like[rows] @ query
+        return normalize_rows(np.asarray(self.store.like[rows])) @ query
+
+    def search_rows(self, vector, category, limit, offset=0, allowed=None):
+        """(행 번호 배열, 코사인 유사도 배열) — Hit 객체 생성 없이 쓰는 저수준 API"""
+        rows = self.cat_rows.get(category)
+        if rows is None or len(rows) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = normalize_rows(vector)
+
+        if self.qmat is not None:
+            if allowed is not None:
+                rows = rows[allowed[rows]]
+            rows, sims = quantized_search(self.qmat, query, rows, offset + limit,
+                                          shortlist_factor=self.shortlist_factor)
+            return rows[offset:], sims[offset:]
+
+        if self.method == "exact":
+            if self.partitioned:
+                sims = self.cat_like[category] @ query
+                if allowed is not None:
+                    keep = allowed[rows]
+                    rows, sims = rows[keep], sims[keep]
+            else:
+                if allowed is not None:
+                    rows = rows[allowed[rows]]
+                sims = self.like[rows] @ query
+            k = min(offset + limit, len(rows))
+            if k == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            top = np.argpartition(-sims, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+            top = top[np.argsort(-sims[top], kind="stable")][offset:]
+            return rows[top], sims[top]
+
+        if self.partitioned:
+            # 파티션 인덱스: 카테고리 필터 불필요 (속성 필터만)
+            index = self.cat_index.get(category)
+            if index is None:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            n = index.get_current_count() if allowed is None else int((allowed[rows] & self.store.like_mask[rows]).sum())
+            label_filter = None if allowed is None else (lambda label: bool(allowed[label]))
+        else:
+            # HNSW: 카테고리 (+ 속성 필터) label만 통과시키는 필터
+            index = self.index
+            cat_mask = (self.store.categories == category) & self.store.first_mask
+            if allowed is not None:
+                cat_mask &= allowed
+            n = int((cat_mask & self.store.like_mask).sum())
+            label_filter = lambda label: bool(cat_mask[label])
+
+        k = min(offset + limit, len(rows), n)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        # hnswlib 은 검색마다 max(ef, k) 후보를 탐색하므로 공유 인덱스의 ef는 바꾸지 않음
+        labels, distances = index.knn_query(query, k=k, filter=label_filter)
+        return labels[0][offset:].astype(np.int64), (1 - distances[0][offset:]).astype(np.float32)
+
+    def search(self, vector, category, limit, offset=0, allowed=None):
+        rows, sims = self.search_rows(vector, category, limit, offset, allowed)
+        return self._hits(rows, sims)
+
+
+def _hnsw_index(like, rows, M, ef_construction, ef, num_threads):
+    """like[rows] 로 만든 hnswlib 인덱스 (label = 저장소 행 번호)"""
+    import hnswlib
+
+    index = hnswlib.Index(space="cosine", dim=like.shape[1])
+    index.init_index(max_elements=max(len(rows), 1), M=M, ef_construction=ef_construction)
+    index.add_items(like[rows], rows, num_threads=num_threads)
+    index.set_ef(ef)
+    return index
+
+
+class GeoRetriever(Retriever):
+    """
+    base: LocalRetriever, geo: GeoIndex (base.store 행 순서)
+    set_anchor(lat, lng) 이후 geo_categories 검색은 반경 radius_km 안의 장소만 공간 인덱스로 뽑아 그 행들만 점수 계산.
+    앵커가 없거나 geo_categories 밖의 카테고리(예: 앵커가 되는 숙소)는 base 검색 그대로.
+    Hit.properties["distance_km"] 에 앵커와의 거리 기록.
+    """
+
+    def __init__(self, base, geo, mode="restrict", radius_km=10.0, decay_km=5.0,
+                 geo_categories=("카페", "음식점", "관광지")):
+        if mode not in ("restrict", "decay"):
+            raise ValueError(f"지원하지 않는 geo 모드: {mode}")
+        self.base = base
+        self.geo = geo
+        self.mode = mode
+        self.radius_km = radius_km
+        self.decay_km = decay_km
+        self.geo_categories = set(geo_categories)
+        self.anchor = None
+
+    def set_anchor(self, lat, lng):
+        self.anchor = (float(lat), float(lng))
+
+    def set_anchor_place(self, place_id, category="Accommodation"):
+        """장소 id (예: 선택한 숙소) 좌표를 앵커로. 좌표가 없으면 앵커 해제."""
+        r = self.base.store.row(place_id, category)
+        if r is None or not np.isfinite(self.geo.lat[r]):
+            self.anchor = None
+        else:
+            self.set_anchor(self.geo.lat[r], self.geo.lng[r])
+
+    def clear_anchor(self):
+        self.anchor = None
+
+    def uses_geo(self, category):
+        return self.anchor is not None and category in self.geo_categories
+
+    def search_rows(self, vector, category, limit, offset=0, allowed=None):
+        """(행 번호, 조정된 유사도, 거리 km) — 앵커가 없거나 geo_categories 밖이면 base 검색 (거리는 NaN)"""
+        if not self.uses_geo(category):
+            rows, sims = self.base.search_rows(vector, category, limit, offset, allowed)[:2]
+            return rows, sims, np.full(len(rows), np.nan)
+
+        rows, dist = self.geo.within(*self.anchor, self.radius_km, category)
+        if allowed is not None:
+            keep = allowed[rows]
+            rows, dist = rows[keep], dist[keep]
+        if len(rows) == 0:
+            return rows, np.empty(0, dtype=np.float32), dist
+
+        sims = self.base.row_sims(rows, normalize_rows(vector))
+        if self.mode == "decay":
+            sims = sims * np.exp(-dist / self.decay_km).astype(np.float32)
+
+        k = min(offset + limit, len(rows))
+        top = np.argpartition(-sims, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        top = top[np.argsort(-sims[top], kind="stable")][offset:]
+        return rows[top], sims[top], dist[top]
+
+    def search(self, vector, category, limit, offset=0, allowed=None):
+        if not self.uses_geo(category):
+            return self.base.search(vector, category, limit, offset, allowed=allowed)
+
+        rows, sims, dist = self.search_rows(vector, category, limit, offset, allowed)
+        hits = self.base._hits(rows, sims)
+        for hit, d in zip(hits, dist):
+            hit.properties["distance_km"] = float(d)
+        return hits
+
+    def close(self):
+        self.base.close()
+
+
+class HybridRetriever(Retriever):
+    """
+    base: 벡터 검색 Retriever, bm25: BM25Index, store: EmbeddingStore (bm25 행 순서)
+    set_query(like_keywords) 이후 search는 두 검색을 동시에 (BM25는 별도 스레드) 실행하고
+        RRF(d) = sum_leg 1 / (rrf_k + 순위)
+    로 융합한 상위 limit개를 반환. 각 leg는 offset + limit * leg_factor 개까지 가져옴.
+    like_score: Hit.distance 에 담을 점수
+        "cosine" : 유저 like 벡터와의 코사인 (재정렬의 like 유사도 의미 유지, 후보 구성만 RRF로)
+        "rrf"    : RRF 점수를 최대값(2 / (rrf_k + 1))으로 나눈 0~1 값 (융합 순위를 그대로 반영)
+    """
+
+    def __init__(self, base, bm25, store, rrf_k=60, leg_factor=2, like_score="cosine"):
+        if like_score not in ("cosine", "rrf"):
+            raise ValueError(f"지원하지 않는 like_score: {like_score}")
+        self.base = base
+        self.bm25 = bm25
+        self.store = store
+        self.like = getattr(base, "like", None)
+        if self.like is None:
+            self.like = normalize_rows(store.like)
+        self.rrf_k = rrf_k
+        self.leg_factor = leg_factor
+        self.like_score = like_score
+        self.keywords = None
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def set_query(self, like_keywords):
+        self.keywords = list(like_keywords) if like_keywords else None
+
+    def search(self, vector, category, limit, offset=0, allowed=None):
+        if not self.keywords:
+            return self.base.search(vector, category, limit, offset, allowed=allowed)
+
+        leg_limit = offset + limit * self.leg_factor
+        bm25_future = self.executor.submit(self.bm25.search, self.keywords, category, leg_limit, 0, allowed)
+        if hasattr(self.base, "search_rows"):
+            vector_rows = self.base.search_rows(vector, category, leg_limit, allowed=allowed)[0]
+        else:
+            vector_rows = self.store.rows([hit.place_id for hit in
+                                           self.base.search(vector, category, leg_limit, allowed=allowed)], category)
+            vector_rows = vector_rows[vector_rows >= 0]
+        bm25_rows, _ = bm25_future.result()
+
+        # RRF: 두 순위 리스트를 이어붙여 행별로 1 / (rrf_k + 순위) 합산
+        all_rows = np.concatenate([vector_rows, bm25_rows])
+        if len(all_rows) == 0:
+            return []
+        ranks = np.concatenate([np.arange(len(vector_rows)), np.arange(len(bm25_rows))])
+        rows, inverse = np.unique(all_rows, return_inverse=True)
+        rrf = np.bincount(inverse, weights=1.0 / (self.rrf_k + ranks + 1))
+
+        order = np.lexsort((rows, -rrf))[offset:offset + limit]
+        rows, rrf = rows[order], rrf[order]
+
+        if self.like_score == "rrf":
+            sims = rrf / (2.0 / (self.rrf_k + 1))
+        else:
+            sims = self.like[rows] @ normalize_rows(vector)
+        hits = _store_hits(self.store, rows, sims)
+        for hit, score in zip(hits, rrf):
+            hit.properties["rrf_score"] = float(score)
+        return hits
+
+    def close(self):
+        self.executor.shutdown()
+        self.base.close()
+
+
+# ========== 생성 ==========
+def build_retriever(kind, store=None, weaviate_mode="cloud", collection_name="Place", hnsw_params=None,
+                    partitioned=False, quantization=None):
+    """
+    kind: "weaviate" | "exact" | "hnsw", partitioned: 카테고리별 파티션(tenant / 로컬 하위 인덱스)으로 검색
+    quantization: None | "int8" | "fp16" (exact 전용, 양자화 후보 + float32 재채점)
+    """
+    if kind == "weaviate":
+        from weaviate_conn import connect_weaviate
+        return WeaviateRetriever(connect_weaviate(weaviate_mode), collection_name, store=store, partitioned=partitioned)
+    if store is None:
+        raise ValueError(f"로컬 검색({kind})에는 임베딩 저장소가 필요합니다.")
+    return LocalRetriever(store, method=kind, hnsw_params=hnsw_params, partitioned=partitioned,
+                          quantization=quantization)
+
+
+async def build_async_retriever(weaviate_mode="cloud", collection_name="Place", max_in_flight=16, store=None,
+                                partitioned=False):
+    """연결까지 마친 AsyncWeaviateRetriever (HTTP 풀 크기는 max_in_flight 기준)"""
+    from weaviate_conn import connect_weaviate_async
+
+    client = connect_weaviate_async(weaviate_mode, pool_connections=max_in_flight,
+                                    pool_maxsize=max(100, max_in_flight))
+    await client.connect()
+    return AsyncWeaviateRetriever(client, collection_name, max_in_flight=max_in_flight, store=store,
+                                  partitioned=partitioned)
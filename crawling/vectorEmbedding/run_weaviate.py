@@ -1,91 +1,366 @@
-import os
-from dotenv import load_dotenv
-import weaviate
-from weaviate.auth import AuthApiKey
-from weaviate.classes.config import Property, DataType
-import pickle
+import time
+import json
+import hashlib
+import numpy as np
+from weaviate.classes.config import Property, DataType, Configure, VectorDistances
+from weaviate.classes.tenants import Tenant
+from weaviate.classes.query import Filter
+from weaviate.util import generate_uuid5
 from tqdm import tqdm
-import uuid
-
-# --- 1. 환경 변수 로드 ---
-load_dotenv()
-
-api_key = os.getenv("WEAVIATE_API_KEY")
-cluster_url = os.getenv("WEAVIATE_CLUSTER_URL")
-
-# --- 2. Weaviate 클라이언트 연결 (v4 방식) ---
-client = weaviate.connect_to_weaviate_cloud(
-    cluster_url=cluster_url,
-    auth_credentials=AuthApiKey(api_key)
-)
-print("✅ 연결 성공")
-
-try:
-    # --- 3. 기존 컬렉션 있으면 삭제 (선택 사항) ---
-    collection_name = "Place"
-    if client.collections.exists(collection_name):
-        client.collections.delete(collection_name)
-        print("♻️ 기존 컬렉션 삭제 완료")
-
-    # --- 4. 스키마(컬렉션) 생성 ---
-    from weaviate.classes.config import Configure, VectorDistances
-    
+
+from embedding_store import load_embedding_store
+from quantize import dislike_properties
+from weaviate_conn import connect_weaviate
+from retrieval import partition_name
+
+# ========== CONFIG ==========
+CONFIG = {
+    "WEAVIATE_MODE": "cloud",   # "cloud" | "local" | "embedded" (벤치마크용)
+    "COLLECTION": "Place",
+    # "recreate": 컬렉션 삭제 후 전체 업로드 | "sync": 기존 컬렉션과 diff 후 변경분만 upsert / delete
+    "SYNC_MODE": "recreate",
+    # None: 한 컬렉션 + 검색 시 category 필터 | "tenant": 카테고리별 tenant (파티션마다 HNSW 인덱스 분리)
+    #   → 검색 쪽은 build_retriever(..., partitioned=True)
+    "PARTITION": None,
+    "STORE_DIR": r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store",
+    # HNSW 벡터 압축: None | "sq" (int8 스칼라) | "pq" | "bq"
+    "QUANTIZER": None,
+    # HNSW 파라미터 (None이면 Weaviate 기본값) — bench_hnsw.py 로 recall / 지연시간 확인 후 설정
+    #   ef: 검색 후보 리스트 크기 (-1: limit 기반 동적), ef_construction: 구축 시 후보 크기, max_connections: 노드당 간선 수
+    "HNSW": {"ef": None, "ef_construction": None, "max_connections": None},
+    # dislike 벡터 저장 방식: "float" (NUMBER_ARRAY) | "int8" (INT_ARRAY + scale) | "none" (로컬 저장소에서 조회)
+    "DISLIKE_STORAGE": "float",
+    # 업로드 방식: "insert" (객체 1개씩, 기존 방식) | "fixed" (고정 크기 배치) | "dynamic" (서버 부하 기반 배치)
+    "IMPORT_MODE": "fixed",
+    "BATCH_SIZE": 200,
+    "CONCURRENT_REQUESTS": 4,
+    "MAX_RETRIES": 3,
+    # 0보다 크면 저장소 대신 랜덤 벡터 N개를 업로드 (대용량 import 벤치마크)
+    "SYNTHETIC_COUNT": 0
+}
+
+
+def vector_index_config(hnsw=None):
+    """hnsw: HNSW 파라미터 dict (None이면 CONFIG["HNSW"], 값이 None인 항목은 Weaviate 기본값)"""
+    quantizer = None
+    if CONFIG["QUANTIZER"] == "sq":
+        quantizer = Configure.VectorIndex.Quantizer.sq()
+    elif CONFIG["QUANTIZER"] == "pq":
+        quantizer = Configure.VectorIndex.Quantizer.pq()
+    elif CONFIG["QUANTIZER"] == "bq":
+        quantizer = Configure.VectorIndex.Quantizer.bq()
+
+    hnsw = CONFIG["HNSW"] if hnsw is None else hnsw
+    hnsw_params = {name: value for name, value in hnsw.items() if value is not None}
+    return Configure.VectorIndex.hnsw(
+        distance_metric=VectorDistances.COSINE,  # 코사인 유사도
+        quantizer=quantizer,
+        **hnsw_params
+    )
+
+
+def dislike_schema():
+    if CONFIG["DISLIKE_STORAGE"] == "float":
+        return [Property(name="dislike_embedding", data_type=DataType.NUMBER_ARRAY)]
+    if CONFIG["DISLIKE_STORAGE"] == "int8":
+        return [
+            Property(name="dislike_q", data_type=DataType.INT_ARRAY),
+            Property(name="dislike_scale", data_type=DataType.NUMBER)
+        ]
+    return []
+
+
+def place_uuid(place_id, category, collection_name=None):
+    """
+    (카테고리, place_id) → 결정적 UUID (재업로드해도 같은 객체를 가리킴, collection_name 이 네임스페이스 — 기본 CONFIG["COLLECTION"])
+    카페/음식점 사이에 같은 id가 있어 id만으로 만들면 한쪽이 덮어써짐.
+    (id만으로 만든 이전 UUID 컬렉션은 첫 sync에서 전체 신규 + 전체 삭제로 잡힘)
+    """
+    return generate_uuid5(f"{category}:{int(place_id)}", collection_name or CONFIG["COLLECTION"])
+
+
+def content_hash(properties, vector):
+    """속성 + 벡터(float32 바이트) 해시 — 변경 감지용"""
+    h = hashlib.sha1()
+    h.update(json.dumps(properties, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    h.update(np.asarray(vector, dtype=np.float32).tobytes())
+    return h.hexdigest()
+
+
+def with_identity(properties, vector, collection_name=None):
+    """(properties, vector) → (properties + content_hash, vector, uuid)"""
+    properties["content_hash"] = content_hash(properties, vector)
+    return properties, vector, place_uuid(properties["place_id"], properties["category"], collection_name)
+
+
+# ========== 업로드 객체 생성 (스트리밍) ==========
+def unique_store_rows(store, rows=None):
+    """업로드할 행 번호 — 같은 (카테고리, id)가 여러 행이면 첫 행만 (EmbeddingStore.row 와 같은 행)"""
+    rows = np.arange(len(store)) if rows is None else np.asarray(rows)
+    return rows[store.first_mask[rows]]
+
+
+def iter_store_objects(store, rows=None, collection_name=None):
+    """저장소 행 → (properties, vector, uuid). mmap에서 한 행씩 읽으므로 메모리 사용량 일정"""
+    for i in (range(len(store)) if rows is None else rows):
+        # 벡터가 없으면 저장소에 이미 제로 벡터로 채워져 있음
+        dislike_vec = store.dislike[i] if store.dislike_mask[i] else None
+        properties = {
+            "place_id": int(store.ids[i]),  # 원본 ID 저장
+            "name": store.names[i],
+            "category": str(store.categories[i]),
+            "sub_category": store.sub_categories[i],
+            **dislike_properties(dislike_vec, CONFIG["DISLIKE_STORAGE"])
+        }
+        yield with_identity(properties, store.like[i].tolist(), collection_name)
+
+
+def iter_synthetic_objects(n, dim, seed=0, chunk=1000, collection_name=None):
+    """벤치마크용 랜덤 장소 n개 (chunk 단위로 생성)"""
+    rng = np.random.default_rng(seed)
+    categories = ["Accommodation", "카페", "음식점", "관광지"]
+    for start in range(0, n, chunk):
+        size = min(chunk, n - start)
+        like = rng.standard_normal((size, dim), dtype=np.float32)
+        like /= np.linalg.norm(like, axis=1, keepdims=True)
+        dislike = rng.standard_normal((size, dim), dtype=np.float32)
+        dislike /= np.linalg.norm(dislike, axis=1, keepdims=True)
+        for j in range(size):
+            pid = start + j
+            properties = {
+                "place_id": pid,
+                "name": f"synthetic-{pid}",
+                "category": categories[pid % len(categories)],
+                "sub_category": "",
+                **dislike_properties(dislike[j], CONFIG["DISLIKE_STORAGE"])
+            }
+            yield with_identity(properties, like[j].tolist(), collection_name)
+
+
+# ========== 업로드 ==========
+def insert_one_by_one(collection, objects, total):
+    """기존 방식: 객체 1개당 요청 1번"""
+    failed = []
+    for properties, vector, obj_uuid in tqdm(objects, total=total, desc="Weaviate 업로드 중"):
+        try:
+            collection.data.insert(properties=properties, vector=vector, uuid=obj_uuid)
+        except Exception as e:
+            failed.append((properties.get("place_id"), str(e)))
+    return failed
+
+
+def _batch_context(collection):
+    if CONFIG["IMPORT_MODE"] == "dynamic":
+        return collection.batch.dynamic()
+    return collection.batch.fixed_size(
+        batch_size=CONFIG["BATCH_SIZE"],
+        concurrent_requests=CONFIG["CONCURRENT_REQUESTS"]
+    )
+
+
+def batch_import(collection, objects, total):
+    """
+    배치 업로드(같은 uuid가 있으면 덮어쓰기 = upsert) + 실패 객체 재시도
+    반환: 최종 실패 목록 [(place_id, message), ...]
+    """
+    pending = objects
+    pending_total = total
+
+    for attempt in range(CONFIG["MAX_RETRIES"] + 1):
+        with _batch_context(collection) as batch:
+            for properties, vector, obj_uuid in tqdm(pending, total=pending_total,
+                                                     desc="Weaviate 배치 업로드" if attempt == 0 else f"재시도 {attempt}"):
+                batch.add_object(properties=properties, vector=vector, uuid=obj_uuid)
+
+        failed = collection.batch.failed_objects
+        if not failed:
+            return []
+
+        print(f"⚠️ 실패 {len(failed)}건 (시도 {attempt + 1}) — 예: {failed[0].message}")
+        # 같은 uuid로 재시도하므로 일부 반영된 객체도 중복되지 않음
+        pending = [(err.object_.properties, err.object_.vector, err.object_.uuid) for err in failed]
+        pending_total = len(pending)
+
+    return [(err.object_.properties.get("place_id"), err.message) for err in failed]
+
+
+# ========== 증분 동기화 ==========
+def fetch_existing_hashes(collection):
+    """컬렉션의 {uuid(str): content_hash} (벡터는 받지 않음)"""
+    existing = {}
+    for obj in collection.iterator(return_properties=["content_hash"]):
+        existing[str(obj.uuid)] = obj.properties.get("content_hash")
+    return existing
+
+
+def diff_objects(objects, existing):
+    """
+    원하는 상태(objects) vs 현재 컬렉션(existing) 비교
+    반환: (upserts [(properties, vector, uuid)], removed_uuids [str], stats)
+    같은 uuid가 여러 번 오면 첫 객체만 반영하고 나머지는 stats["duplicate"] 로 셈 (마지막 행이 덮어쓰지 않도록).
+    """
+    upserts = []
+    desired = set()
+    stats = {"new": 0, "changed": 0, "unchanged": 0, "duplicate": 0}
+
+    for properties, vector, obj_uuid in objects:
+        key = str(obj_uuid)
+        if key in desired:
+            stats["duplicate"] += 1
+            continue
+        desired.add(key)
+        if key not in existing:
+            stats["new"] += 1
+        elif existing[key] != properties["content_hash"]:
+            stats["changed"] += 1
+        else:
+            stats["unchanged"] += 1
+            continue
+        upserts.append((properties, vector, obj_uuid))
+
+    removed = [key for key in existing if key not in desired]
+    stats["removed"] = len(removed)
+    return upserts, removed, stats
+
+
+def delete_objects(collection, uuids, chunk=1000):
+    deleted = 0
+    for start in range(0, len(uuids), chunk):
+        res = collection.data.delete_many(where=Filter.by_id().contains_any(uuids[start:start + chunk]))
+        deleted += res.successful
+    return deleted
+
+
+def sync_collection(collection, objects):
+    """diff 계산 → 변경분만 배치 upsert + 삭제. 반환: (stats, 실패 목록)"""
+    existing = fetch_existing_hashes(collection)
+    upserts, removed, stats = diff_objects(objects, existing)
+    print(f"🔍 diff: 신규 {stats['new']}, 변경 {stats['changed']}, 삭제 {stats['removed']}, 유지 {stats['unchanged']}")
+    if stats["duplicate"]:
+        print(f"⚠️ 중복 uuid {stats['duplicate']}건은 첫 객체만 반영")
+
+    failed = batch_import(collection, iter(upserts), len(upserts)) if upserts else []
+    if removed:
+        stats["deleted"] = delete_objects(collection, removed)
+    return stats, failed
+
+
+def create_collection(client, collection_name, hnsw=None, partition="config"):
+    """hnsw: HNSW 파라미터 (None이면 CONFIG["HNSW"]), partition: None | "tenant" ("config"면 CONFIG["PARTITION"])"""
+    hnsw = CONFIG["HNSW"] if hnsw is None else hnsw
+    partition = CONFIG["PARTITION"] if partition == "config" else partition
     client.collections.create(
         name=collection_name,
         vectorizer_config=None,  # 직접 벡터 제공
-        vector_index_config=Configure.VectorIndex.hnsw(
-            distance_metric=VectorDistances.COSINE  # 코사인 유사도
-        ),
+        vector_index_config=vector_index_config(hnsw),
+        multi_tenancy_config=Configure.multi_tenancy(enabled=partition == "tenant"),
         properties=[
             Property(name="place_id", data_type=DataType.INT),  # 원본 ID 보존
             Property(name="name", data_type=DataType.TEXT),
             Property(name="category", data_type=DataType.TEXT),
             Property(name="sub_category", data_type=DataType.TEXT),
-            Property(name="dislike_embedding", data_type=DataType.NUMBER_ARRAY)
+            Property(name="content_hash", data_type=DataType.TEXT),  # 증분 동기화용
+            *dislike_schema()
         ]
     )
-    print("✅ 컬렉션 생성 완료")
-
-    # --- 5. Pickle 파일 로드 ---
-    pkl_path = r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_embeddings.pkl"
-    with open(pkl_path, "rb") as f:
-        data = pickle.load(f)
-
-    # --- 6. 데이터 업로드 ---
-    collection = client.collections.get(collection_name)
-    
-    # 벡터 차원 확인 (첫 번째 유효한 벡터에서)
-    vector_dim = None
-    for item in data:
-        if item.get("like_embedding"):
-            vector_dim = len(item["like_embedding"])
-            break
-    
-    if vector_dim is None:
-        raise ValueError("유효한 벡터를 찾을 수 없습니다.")
-    
-    print(f"📐 벡터 차원: {vector_dim}")
-
-    for item in tqdm(data, desc="Weaviate 업로드 중"):
-        # 벡터가 없으면 제로 벡터로 대체
-        vector = item.get("like_embedding")
-        if not vector or len(vector) == 0:
-            vector = [0.0] * vector_dim
-        
-        collection.data.insert(
-            properties={
-                "place_id": item["id"],  # 원본 ID 저장
-                "name": item["name"],
-                "category": item["category"],
-                "sub_category": item["sub_category"],
-                "dislike_embedding": item.get("dislike_embedding", [])
-            },
-            vector=vector
-        )
-
-    print("✅ 데이터 업로드 완료")
-
-finally:
-    # --- 7. 연결 종료 ---
-    client.close()
-    print("🔒 연결 종료")
\ No newline at end of file
+    print(f"✅ 컬렉션 생성 완료 (quantizer={CONFIG['QUANTIZER']}, dislike={CONFIG['DISLIKE_STORAGE']}, "
+          f"partition={partition}, hnsw={hnsw})")
+
+
+def upload_targets(collection, store=None):
+    """
+    업로드 단위 [(컬렉션 또는 tenant 핸들, 객체 iterator, 개수)]
+    PARTITION="tenant" 면 카테고리마다 tenant를 만들고 해당 카테고리 객체만 보냄.
+    """
+    categories = ["Accommodation", "카페", "음식점", "관광지"]
+    synthetic = CONFIG["SYNTHETIC_COUNT"]
+
+    def objects_for(cat=None):
+        if synthetic > 0:
+            objects = iter_synthetic_objects(synthetic, dim=768, collection_name=collection.name)
+            return objects if cat is None else (o for o in objects if o[0]["category"] == cat)
+        return iter_store_objects(store, store_rows[cat], collection.name)
+
+    def count_for(cat=None):
+        if synthetic > 0:
+            return synthetic if cat is None else len(range(categories.index(cat), synthetic, len(categories)))
+        return len(store_rows[cat])
+
+    if synthetic <= 0:
+        # 데이터에 같은 (카테고리, id) 행이 반복되는 경우가 있어 첫 행만 업로드
+        store_rows = {None: unique_store_rows(store)}
+        store_rows.update({cat: unique_store_rows(store, store.category_rows(cat)) for cat in categories})
+        if len(store_rows[None]) < len(store):
+            print(f"⚠️ 중복 (카테고리, id) 행 {len(store) - len(store_rows[None])}개는 첫 행만 업로드")
+
+    if CONFIG["PARTITION"] != "tenant":
+        return [(collection, objects_for(), count_for())]
+
+    existing = set(collection.tenants.get())
+    new_tenants = [Tenant(name=partition_name(cat)) for cat in categories if partition_name(cat) not in existing]
+    if new_tenants:
+        collection.tenants.create(new_tenants)
+    return [(collection.with_tenant(partition_name(cat)), objects_for(cat), count_for(cat)) for cat in categories]
+
+
+if __name__ == "__main__":
+    # --- 1~2. Weaviate 클라이언트 연결 (v4 방식) ---
+    client = connect_weaviate(CONFIG["WEAVIATE_MODE"])
+    print("✅ 연결 성공")
+
+    try:
+        # --- 3. 기존 컬렉션 있으면 삭제 (recreate 모드만) ---
+        collection_name = CONFIG["COLLECTION"]
+        if CONFIG["SYNC_MODE"] == "recreate" and client.collections.exists(collection_name):
+            client.collections.delete(collection_name)
+            print("♻️ 기존 컬렉션 삭제 완료")
+
+        # --- 4. 스키마(컬렉션) 생성 ---
+        if not client.collections.exists(collection_name):
+            create_collection(client, collection_name)
+        else:
+            # 이전 버전 스키마에는 content_hash가 없음 → 추가 후 첫 sync에서 전체가 "변경"으로 잡힘
+            existing_props = {p.name for p in client.collections.get(collection_name).config.get().properties}
+            if "content_hash" not in existing_props:
+                client.collections.get(collection_name).config.add_property(
+                    Property(name="content_hash", data_type=DataType.TEXT)
+                )
+
+        # --- 5. 업로드 대상 (mmap 저장소 또는 합성 데이터, tenant 파티션이면 카테고리별) ---
+        store = None
+        if CONFIG["SYNTHETIC_COUNT"] > 0:
+            print(f"🧪 합성 데이터 {CONFIG['SYNTHETIC_COUNT']}개 업로드")
+        else:
+            store = load_embedding_store(CONFIG["STORE_DIR"])
+            if not store.like_mask.any():
+                raise ValueError("유효한 벡터를 찾을 수 없습니다.")
+            print(f"📐 벡터 차원: {store.dim}")
+
+        # --- 6. 데이터 업로드 ---
+        collection = client.collections.get(collection_name)
+
+        t0 = time.perf_counter()
+        total, failed = 0, []
+        for target, objects, count in upload_targets(collection, store):
+            if CONFIG["SYNC_MODE"] == "sync":
+                stats, target_failed = sync_collection(target, objects)
+                count = stats["new"] + stats["changed"]
+            elif CONFIG["IMPORT_MODE"] == "insert":
+                target_failed = insert_one_by_one(target, objects, count)
+            else:
+                target_failed = batch_import(target, objects, count)
+            total += count
+            failed += target_failed
+        elapsed = time.perf_counter() - t0
+
+        uploaded = total - len(failed)
+        print(f"✅ 데이터 업로드 완료: {uploaded}/{total}개, {elapsed:.1f}s ({uploaded / max(elapsed, 1e-9):.0f} objects/sec, mode={CONFIG['IMPORT_MODE']})")
+        if failed:
+            print(f"❌ 최종 실패 {len(failed)}건")
+            for pid, msg in failed[:10]:
+                print(f"   place_id={pid}: {msg}")
+
+    finally:
+        # --- 7. 연결 종료 ---
+        client.close()
+        print("🔒 연결 종료")
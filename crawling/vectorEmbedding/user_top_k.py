@@ -3,34 +3,29 @@ import json
 import pickle
 import numpy as np
 import pandas as pd
-from dotenv import load_dotenv
 from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 
-import weaviate
-from weaviate.auth import AuthApiKey
-from weaviate.classes import query as wq
+from embedding_store import load_embedding_store
+from encoder_backend import get_encoder
+from retrieval import build_retriever
+from recommender import Recommender
+from place_metadata import load_place_metadata
 
 
-# ========== 1. 환경 변수 및 클라이언트 연결 ==========
-print("🔐 환경 변수 로딩...")
-load_dotenv()
+# ========== 1. 검색 백엔드 연결 ==========
+RETRIEVER = "weaviate"   # "weaviate" | "exact" (로컬 numpy) | "hnsw" (로컬 hnswlib)
+store_dir = r"C:\Users\changjin\workspace\lab\pln\vectorEmbedding\place_store"
+store = load_embedding_store(store_dir) if os.path.isdir(store_dir) else None
 
-api_key = os.getenv("WEAVIATE_API_KEY")
-cluster_url = os.getenv("WEAVIATE_CLUSTER_URL")
+retriever = build_retriever(RETRIEVER, store=store)
+print(f"✅ 검색 백엔드 준비 완료 ({RETRIEVER})\n")
 
-client = weaviate.connect_to_weaviate_cloud(
-    cluster_url=cluster_url,
-    auth_credentials=AuthApiKey(api_key)
-)
-print("✅ Weaviate 연결 완료\n")
-
-collection = client.collections.get("Place")
+recommender = Recommender(retriever, store=store)
 
 
 # ========== 2. 모델 로드 ==========
-model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
+ENCODER_BACKEND = "auto"   # "auto" (서버 우선) | "server" | "torch" | "onnx" (int8) | "onnx_fp32"
+model = get_encoder(ENCODER_BACKEND)
 
 
 # ========== 3. 유저 데이터 로드 ==========
@@ -53,43 +48,9 @@ user_dislike_vecs = [model.encode(kw, convert_to_numpy=True) for kw in dislike_k
 # ========== 4. 추천 함수 ==========
 def rerank_with_penalty(category_name, top_k=30, alpha=1.0, beta=0.5, dislike_threshold=0.75):
     print(f"\n🏷️ 카테고리: {category_name} (Top-{top_k})")
-
-    # 1차 후보군 (like 기반)
-    results = collection.query.near_vector(
-        near_vector=user_like_vec.tolist(),
-        limit=top_k*3,  # 여유있게 뽑음
-        return_metadata=["distance"],
-        include_vector=True,
-        filters=wq.Filter.by_property("category").equal(category_name)
-    )
-
-    scored = []
-    for obj in results.objects:
-        like_sim = 1 - obj.metadata.distance  # 코사인 유사도
-
-        # dislike 비교
-        place_dislike_vec = obj.properties.get("dislike_embedding", [])
-        max_dislike_sim = 0
-        if place_dislike_vec:
-            sims = [
-                cosine_similarity([ud], [place_dislike_vec])[0][0]
-                for ud in user_dislike_vecs if len(ud) > 0
-            ]
-            max_dislike_sim = max(sims) if sims else 0
-
-        # 하드 필터링
-        if max_dislike_sim > dislike_threshold:
-            continue
-
-        # 점수 계산 (like - dislike)
-        final_score = alpha * like_sim - beta * max_dislike_sim
-        scored.append((obj, final_score, like_sim, max_dislike_sim))
-
-    # 점수순 정렬 후 Top-K
-    scored.sort(key=lambda x: x[1], reverse=True)
-    scored = scored[:top_k]
-
-    return scored
+    return recommender.rerank_with_penalty(user_like_vec, user_dislike_vecs, category_name,
+                                           top_k=top_k, alpha=alpha, beta=beta,
+                                           dislike_threshold=dislike_threshold)
 
 
 # ========== 5. 카테고리별 추천 ==========
@@ -101,34 +62,19 @@ for cat in categories:
 
 
 # ========== 6. 리뷰수 기반 정규화 (카테고리별) ==========
-def attach_review_scores_by_category(results_by_cat, data_dir):
-    fname_map = {
-        "Accommodation": "accommodations_fixed.csv",
-        "카페": "cafe_fixed.csv",
-        "음식점": "restaurants_fixed.csv",
-        "관광지": "attractions_fixed.csv"
-    }
-
+def attach_review_scores_by_category(results_by_cat, metadata):
     final_scores = {}
 
     for cat, scored_list in results_by_cat.items():
         if not scored_list:
             continue
 
-        # ✅ CSV 로드
-        df = pd.read_csv(os.path.join(data_dir, fname_map[cat]))
-        review_col = "review_count" if cat == "Accommodation" else "all_review_count"
-        review_dict = dict(zip(df["id"], df[review_col]))
-
-        # ✅ review count 붙이기
-        enriched = []
-        for obj, _, _, _ in scored_list:
-            pid = obj.properties.get("place_id")
-            rc = review_dict.get(pid, 0)
-            enriched.append((pid, rc))
+        # ✅ review count 붙이기 (미리 로드한 메타데이터에서 배열 조회)
+        pids = [hit.place_id for hit, _ in scored_list]
+        counts = metadata.review_counts_for(pids, cat)
+        enriched = list(zip(pids, counts))
 
         # ✅ log + softmax 계산
-        counts = np.array([rc for _, rc in enriched], dtype=float)
         if counts.sum() > 0:
             counts = np.log1p(counts)  # 로그 변환
             exp_counts = np.exp(counts - counts.max())  # 안정적 softmax
@@ -153,7 +99,7 @@ def attach_review_scores_by_category(results_by_cat, data_dir):
 
 # ========== 7. 실행 ==========
 data_dir = r"C:\Users\changjin\workspace\lab\pln\data_set\null_X"
-review_scores_by_cat = attach_review_scores_by_category(results_by_cat, data_dir)
+review_scores_by_cat = attach_review_scores_by_category(results_by_cat, load_place_metadata(data_dir))
 
 print("✅ 카테고리별 리뷰수 정규화 + 정렬 완료")
 
@@ -165,5 +111,5 @@ for cat, items in review_scores_by_cat.items():
 
 
 # ========== 8. 연결 종료 ==========
-client.close()
+retriever.close()
 print("\n🔒 연결 종료 완료")
@@ -0,0 +1,63 @@
+"""
+Weaviate 연결 헬퍼
+
+mode:
+    "cloud"    : WEAVIATE_CLUSTER_URL / WEAVIATE_API_KEY (.env) — 기존 방식
+    "local"    : 로컬 Weaviate (WEAVIATE_HOST / WEAVIATE_PORT / WEAVIATE_GRPC_PORT, 기본 localhost:8080)
+    "embedded" : Embedded Weaviate (docker 없이 바이너리 실행, 벤치마크용)
+
+connect_weaviate_async: 같은 mode로 WeaviateAsyncClient 생성 (asyncio 실행 모드용)
+    반환된 클라이언트는 `await client.connect()` 후 사용.
+"""
+import os
+from dotenv import load_dotenv
+import weaviate
+from weaviate.auth import AuthApiKey
+from weaviate.config import AdditionalConfig, ConnectionConfig
+
+
+def connect_weaviate(mode="cloud", **kwargs):
+    load_dotenv()
+
+    if mode == "cloud":
+        return weaviate.connect_to_weaviate_cloud(
+            cluster_url=os.getenv("WEAVIATE_CLUSTER_URL"),
+            auth_credentials=AuthApiKey(os.getenv("WEAVIATE_API_KEY")),
+            **kwargs
+        )
+    if mode == "local":
+        return weaviate.connect_to_local(
+            host=os.getenv("WEAVIATE_HOST", "localhost"),
+            port=int(os.getenv("WEAVIATE_PORT", 8080)),
+            grpc_port=int(os.getenv("WEAVIATE_GRPC_PORT", 50051)),
+            **kwargs
+        )
+    if mode == "embedded":
+        return weaviate.connect_to_embedded(**kwargs)
+    raise ValueError(f"지원하지 않는 Weaviate 연결 방식: {mode}")
+
+
+def connect_weaviate_async(mode="cloud", pool_connections=20, pool_maxsize=100, **kwargs):
+    """pool_connections / pool_maxsize: HTTP 세션 풀 크기 (gRPC 쿼리는 채널 하나를 다중화)"""
+    load_dotenv()
+    kwargs.setdefault("additional_config", AdditionalConfig(
+        connection=ConnectionConfig(session_pool_connections=pool_connections,
+                                    session_pool_maxsize=pool_maxsize)
+    ))
+
+    if mode == "cloud":
+        return weaviate.use_async_with_weaviate_cloud(
+            cluster_url=os.getenv("WEAVIATE_CLUSTER_URL"),
+            auth_credentials=AuthApiKey(os.getenv("WEAVIATE_API_KEY")),
+            **kwargs
+        )
+    if mode == "local":
+        return weaviate.use_async_with_local(
+            host=os.getenv("WEAVIATE_HOST", "localhost"),
+            port=int(os.getenv("WEAVIATE_PORT", 8080)),
+            grpc_port=int(os.getenv("WEAVIATE_GRPC_PORT", 50051)),
+            **kwargs
+        )
+    if mode == "embedded":
+        return weaviate.use_async_with_embedded(**kwargs)
+    raise ValueError(f"지원하지 않는 Weaviate 연결 방식: {mode}")